@@ -0,0 +1,102 @@
+"""
+JVM vs embedded engine for the keyed save path of generated/app_v1.py.
+
+Times Spark session startup (JVM launch plus Delta extensions), then the same
+MERGE ... WHEN MATCHED THEN UPDATE SET on a synthetic table with Spark SQL and
+with deltalake's Rust merge (eerssa.writes.merge_changes). Every merge runs on a
+fresh copy of the table. DuckDB is not included: its delta extension only reads.
+
+    python benchmarks/bench_merge_engines.py --size 1m --files 32
+"""
+import argparse
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.run_benchmarks import DATA_DIR, SCRATCH_DIRS, YEAR, edited_copy, scratch_copy, window_frame
+from benchmarks.synthetic import SIZES, build_table
+from eerssa.writes import merge_changes
+
+KEY_COLUMNS = ["id"]
+
+SPARK_CONFIG = {
+    "spark.sql.extensions": "io.delta.sql.DeltaSparkSessionExtension",
+    "spark.sql.catalog.spark_catalog": "org.apache.spark.sql.delta.catalog.DeltaCatalog",
+    "spark.serializer": "org.apache.spark.serializer.KryoSerializer",
+}
+
+
+def start_spark():
+    """Spark session configured like app_v1.py used to; returns None without pyspark"""
+    try:
+        from delta import configure_spark_with_delta_pip
+        from pyspark.sql import SparkSession
+    except ImportError:
+        return None
+    builder = SparkSession.builder.appName("bench_merge_engines").master("local[*]")
+    for key, value in SPARK_CONFIG.items():
+        builder = builder.config(key, value)
+    spark = configure_spark_with_delta_pip(builder).getOrCreate()
+    spark.sparkContext.setLogLevel("WARN")
+    return spark
+
+
+def spark_merge(spark, table_path, changes):
+    """The MERGE statement app_v1.py ran through a temp view"""
+    spark.createDataFrame(changes).createOrReplaceTempView("changes_temp")
+    on = " AND ".join(f"target.{col} = source.{col}" for col in KEY_COLUMNS)
+    update_set = ", ".join(f"{col} = source.{col}" for col in changes.columns if col not in KEY_COLUMNS)
+    spark.sql(f"""
+        MERGE INTO delta.`{table_path}` AS target
+        USING changes_temp AS source
+        ON {on}
+        WHEN MATCHED THEN UPDATE SET {update_set}
+    """)
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="10k", choices=sorted(SIZES))
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = str(DATA_DIR / f"ordenes_{args.size}_{args.files}f")
+    build_table(path, SIZES[args.size], args.files, year=YEAR)
+    edited = edited_copy(window_frame(path))
+    changes = edited[edited["Actividad"] == "EDIT"].reset_index(drop=True)
+    print(f"table {path}: merging {len(changes)} changed rows")
+
+    try:
+        embedded = [timed(merge_changes, scratch_copy(path), changes, KEY_COLUMNS) for _ in range(args.repeat)]
+        print(f"{'deltalake merge':<24} best {min(embedded):8.3f}s  first {embedded[0]:8.3f}s")
+
+        started = time.perf_counter()
+        spark = start_spark()
+        startup = time.perf_counter() - started
+        if spark is None:
+            print("pyspark/delta-spark not installed; skipping the JVM engine")
+            return 0
+        print(f"{'spark startup':<24} {startup:13.3f}s")
+
+        jvm = [timed(spark_merge, spark, scratch_copy(path), changes) for _ in range(args.repeat)]
+        print(f"{'spark merge':<24} best {min(jvm):8.3f}s  first {jvm[0]:8.3f}s")
+        print(f"{'spark first save':<24} {startup + jvm[0]:13.3f}s  (startup + first merge)")
+        spark.stop()
+    finally:
+        for scratch in SCRATCH_DIRS:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Scaling benchmark for eerssa.parallel_reader.
+
+Reads the same Delta table (optionally filtered by a date range) with 1..N
+fragment workers and compares against the plain DeltaTable.to_pandas() path.
+
+    python benchmarks/bench_parallel_read.py /path/to/deltalake_2025 --date-column Fecha --days 30
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from deltalake import DeltaTable
+
+from eerssa.parallel_reader import date_range_filter, detect_storage_kind, read_dataset_parallel
+
+
+def best_of(repeat, fn):
+    """Return the fastest wall time of several runs and the last result"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('table_path')
+    parser.add_argument('--date-column', default=None)
+    parser.add_argument('--days', type=int, default=30, help='size of the date window ending today')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    dataset = DeltaTable(args.table_path).to_pyarrow_dataset()
+    storage_kind = detect_storage_kind(args.table_path)
+
+    filter_expr = None
+    if args.date_column:
+        end_date = date.today()
+        filter_expr = date_range_filter(dataset.schema, args.date_column, end_date - timedelta(days=args.days - 1), end_date)
+
+    n_fragments = len(list(dataset.get_fragments(filter=filter_expr)))
+    print(f"table={args.table_path} storage={storage_kind} fragments={n_fragments} filter={filter_expr}")
+
+    baseline, _ = best_of(args.repeat, lambda: DeltaTable(args.table_path).to_pandas())
+    print(f"{'to_pandas (full table)':<24} {baseline:8.3f}s")
+
+    worker_counts = sorted({2 ** i for i in range(args.max_workers.bit_length()) if 2 ** i <= args.max_workers} | {args.max_workers})
+    single = None
+    for workers in worker_counts:
+        elapsed, table = best_of(args.repeat, lambda: read_dataset_parallel(
+            dataset, filter=filter_expr, max_workers=workers, storage_kind=storage_kind
+        ))
+        single = single or elapsed
+        print(f"{f'workers={workers}':<24} {elapsed:8.3f}s  rows={table.num_rows:<10} speedup={single / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
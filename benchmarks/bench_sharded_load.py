@@ -0,0 +1,56 @@
+"""
+Scaling of the process-pool year load with the number of processes.
+
+Times the in-process load (eerssa.loader, one process) and then
+eerssa.sharded_load.load_sharded at growing process counts on a synthetic
+year, for plain normalized rows and for the daily counts aggregation, and
+prints the speedup and the parallel efficiency (speedup / processes).
+
+    python benchmarks/bench_sharded_load.py --size 10m --files 64 --processes 1 2 4 8
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.run_benchmarks import DATA_DIR, YEAR, time_case
+from benchmarks.synthetic import SIZES, build_table
+from eerssa.daily_aggregates import daily_counts
+from eerssa.loader import load_date_range
+from eerssa.registry import TableConfig
+from eerssa.sharded_load import load_sharded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="1m", choices=sorted(SIZES))
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = str(DATA_DIR / f"ordenes_{args.size}_{args.files}f")
+    build_table(path, SIZES[args.size], args.files, year=YEAR)
+    tables = [TableConfig(name="bench", path=path, year=YEAR)]
+
+    cases = {
+        "rows": (lambda: load_date_range(path), None),
+        "daily_counts": (lambda: daily_counts(load_date_range(path, normalize=False)), "daily_counts"),
+    }
+    for name, (in_process, aggregate) in cases.items():
+        baseline = time_case(in_process, None, args.repeat)
+        print(f"{name}: in-process {baseline:.3f}s")
+        for processes in args.processes:
+            seconds = time_case(lambda: load_sharded(tables, aggregate=aggregate, processes=processes), None,
+                                args.repeat)
+            speedup = baseline / seconds
+            print(f"  {processes:>3} processes {seconds:8.3f}s  speedup {speedup:5.2f}x  "
+                  f"efficiency {speedup / processes:5.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Table-open latency against log length, with and without a checkpoint.
+
+Grows a small table one single-row commit at a time, with deltalake's automatic
+checkpoints turned off, the way a table looks after many grid saves from a
+writer that never checkpoints. At each log length it times DeltaTable(path)
+from the bare JSON log, then runs eerssa.log_maintenance.maintain_log on a copy
+and times the open again.
+
+    python benchmarks/bench_table_open.py --commits 10 100 1000 3000
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from deltalake import DeltaTable, write_deltalake
+
+from benchmarks.synthetic import work_orders
+from eerssa.log_maintenance import maintain_log
+
+# Large enough that the commit hook never checkpoints on its own
+NO_CHECKPOINTS = {"delta.checkpointInterval": "1000000000"}
+
+
+def open_seconds(path: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        DeltaTable(path).version()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commits", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="bench_open_"))
+    path = str(scratch / "table")
+    try:
+        write_deltalake(path, work_orders(1000), configuration=NO_CHECKPOINTS)
+        commits = 1
+        print(f"{'commits':>8} {'json log':>10} {'checkpointed':>13}")
+        for target in sorted(args.commits):
+            while commits < target:
+                write_deltalake(path, work_orders(1, start_id=1000 + commits, seed=commits), mode="append")
+                commits += 1
+            replay = open_seconds(path, args.repeat)
+
+            checkpointed = str(scratch / f"checkpointed_{commits}")
+            shutil.copytree(path, checkpointed)
+            maintain_log(checkpointed, checkpoint_interval=1, cleanup=False)
+            after = open_seconds(checkpointed, args.repeat)
+            shutil.rmtree(checkpointed)
+            print(f"{commits:>8} {replay * 1000:>8.1f}ms {after * 1000:>11.1f}ms")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
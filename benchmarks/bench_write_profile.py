@@ -0,0 +1,111 @@
+"""
+Read/write trade-offs of Parquet write profiles on work-order data.
+
+Writes the same synthetic year with deltalake's defaults and with several
+eerssa.write_profile profiles (zstd levels, row-group sizes, dictionary and
+statistics columns, sorted or not by Fecha), then times a one-month window
+load, a 100-row keyed save and a compaction on each, reports the size on disk
+and how many files the window load had to open, and loads the window again
+after compaction (sorted by Fecha when the profile sorts). Saves and compaction
+always go through a profile, so the "defaults" table uses WriteProfile() for
+those two columns.
+
+    python benchmarks/bench_write_profile.py --size 1m --appends 24
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pyarrow.compute as pc
+from deltalake import write_deltalake
+
+from benchmarks.run_benchmarks import WINDOW, YEAR, time_case
+from benchmarks.synthetic import SIZES, work_orders
+from eerssa.delta_log import add_actions
+from eerssa.loader import load_date_range
+from eerssa.parallel_reader import date_range_filter
+from eerssa.storage import open_dataset, open_table
+from eerssa.write_profile import WriteProfile, register
+from eerssa.writes import apply_changes, compact, sorted_for_write, write_options
+
+STATS_COLUMNS = ("id", "Fecha", "InicioEvento", "FinEvento")
+DICTIONARY_COLUMNS = ("Cuenta", "Actividad", "Grupo", "Descripcion")
+
+PROFILES = {
+    # deltalake's own defaults: no writer properties, unsorted appends
+    "defaults": None,
+    "zstd3": WriteProfile(),
+    "zstd1": WriteProfile(zstd_level=1),
+    "zstd9": WriteProfile(zstd_level=9),
+    "zstd3 32k groups": WriteProfile(row_group_rows=32 * 1024),
+    "zstd3 dict+stats": WriteProfile(dictionary_columns=DICTIONARY_COLUMNS, stats_columns=STATS_COLUMNS),
+    "zstd3 unsorted": WriteProfile(sort_by=()),
+}
+
+
+def write_year(path: str, rows: int, appends: int, profile):
+    """Append the year in batches that each cover the whole year, like saves arriving out of date order"""
+    per_append = -(-rows // appends)
+    for part, start in enumerate(range(0, rows, per_append)):
+        batch = work_orders(min(per_append, rows - start), start_id=start, year=YEAR, seed=part)
+        if profile is None:
+            write_deltalake(path, batch, mode="append")
+        else:
+            # The profile's table properties go in the commit that creates the table
+            write_deltalake(path, sorted_for_write(batch, profile), mode="append",
+                            configuration=profile.table_properties(batch.column_names) if part == 0 else None,
+                            **write_options(profile, batch.schema))
+
+
+def window_files(path: str) -> int:
+    dataset = open_dataset(open_table(path))
+    return len(list(dataset.get_fragments(filter=date_range_filter(dataset.schema, "Fecha", *WINDOW))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="1m", choices=sorted(SIZES))
+    parser.add_argument("--appends", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = SIZES[args.size]
+    scratch = Path(tempfile.mkdtemp(prefix="bench_write_"))
+    header = f"{'profile':<18} {'write':>8} {'MiB':>8} {'files':>6} {'window':>8} {'opened':>7} {'save':>8} {'compact':>8} {'after':>8} {'opened':>7}"
+    print(header)
+    try:
+        for name, profile in PROFILES.items():
+            path = str(scratch / name.replace(" ", "_").replace("+", "_"))
+            if profile is not None:
+                register(path, profile)
+            started = time.perf_counter()
+            write_year(path, rows, args.appends, profile)
+            write_seconds = time.perf_counter() - started
+
+            actions = add_actions(open_table(path))
+            size_mib = pc.sum(actions["size_bytes"]).as_py() / 1024 ** 2
+            window = time_case(lambda: load_date_range(path, "Fecha", *WINDOW, normalize=False), None, args.repeat)
+            opened = window_files(path)
+
+            edited = load_date_range(path, "Fecha", *WINDOW, normalize=False).slice(0, 100).to_pandas()
+            edited["Descripcion"] = "EDITADO"
+            save = time_case(lambda: apply_changes(path, ["id"], updates=edited), None, args.repeat)
+            started = time.perf_counter()
+            compact(path, sort=profile is not None and bool(profile.sort_by))
+            compact_seconds = time.perf_counter() - started
+            after = time_case(lambda: load_date_range(path, "Fecha", *WINDOW, normalize=False), None, args.repeat)
+
+            print(f"{name:<18} {write_seconds:7.2f}s {size_mib:8.1f} {actions.num_rows:6d} {window:7.3f}s "
+                  f"{opened:7d} {save:7.3f}s {compact_seconds:7.2f}s {after:7.3f}s {window_files(path):7d}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Import-time budget for the app entry points.
+
+Runs only the module-level imports of each app (plus its sys.path setup and
+lazy_import bindings) in a fresh interpreter, times them, and fails when they
+take longer than the budget or when a heavy library or engine is imported
+before the code that needs it runs.
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --budget 1.5 --top 15
+
+Exits with status 1 when an app is over budget or imports a heavy module eagerly.
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from eerssa.lazy import HEAVY_MODULES
+
+APPS = ["edit_deltalake_v1.py", "generated/app_v1.py"]
+DEFAULT_BUDGET_SECONDS = 2.0
+
+CHILD = """
+import json, sys, time
+path, prelude, heavy = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+started = time.perf_counter()
+exec(compile(prelude, path, "exec"), {"__file__": path, "__name__": "__import_budget__"})
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "eager": [name for name in heavy if name in sys.modules]}))
+"""
+
+
+def import_prelude(path: Path) -> str:
+    """Source of the module-level imports, sys.path setup and lazy_import bindings of a script"""
+    kept = []
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            kept.append(node)
+        elif isinstance(node, (ast.Expr, ast.Assign)) and isinstance(node.value, ast.Call) \
+                and ast.unparse(node.value.func) in ("sys.path.insert", "lazy_import"):
+            kept.append(node)
+    return ast.unparse(ast.Module(body=kept, type_ignores=[]))
+
+
+def slowest_imports(stderr: str, top: int):
+    """(cumulative seconds, module) pairs from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def measure(path: Path, prelude: str, repeat: int, top: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        run = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD, str(path), prelude, json.dumps(HEAVY_MODULES)],
+            capture_output=True, text=True, cwd=ROOT, check=True
+        )
+        result = json.loads(run.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = dict(result, slowest=slowest_imports(run.stderr, top))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("apps", nargs="*", default=APPS)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="seconds per app")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    # Whatever streamlit itself imports is outside the apps' control
+    baseline = measure(ROOT / APPS[0], "import streamlit", 1, 0)
+    print(f"{'import streamlit':<28} {baseline['seconds']:7.3f}s")
+
+    failures = 0
+    for app in args.apps:
+        path = ROOT / app
+        result = measure(path, import_prelude(path), args.repeat, args.top)
+        eager = [name for name in result["eager"] if name not in baseline["eager"]]
+        over = result["seconds"] > args.budget
+        status = "OVER BUDGET" if over else "ok"
+        print(f"{app:<28} {result['seconds']:7.3f}s  (budget {args.budget:.1f}s)  {status}")
+        if eager:
+            print(f"  imported before first use: {', '.join(eager)}")
+        for seconds, name in result["slowest"]:
+            print(f"  {seconds:7.3f}s  {name}")
+        failures += over or bool(eager)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
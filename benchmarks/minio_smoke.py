@@ -0,0 +1,130 @@
+"""
+End-to-end smoke test against a local S3 stand-in (MinIO).
+
+Writes a synthetic table to a bucket, then goes through what the apps do on
+it — open, windowed load (cold and with cached footers), key-based save,
+corrections, audit log and log maintenance — timing each step and checking
+the results. Start MinIO first:
+
+    docker run --rm -p 9000:9000 minio/minio server /data
+    python benchmarks/minio_smoke.py --endpoint http://localhost:9000 --rows 50000 --files 16
+
+Any S3-compatible server with conditional writes works the same way, e.g.
+moto's (`pip install "moto[server]" && moto_server -p 9000`) where Docker is
+not available.
+
+Exits with status 1 when a step fails or returns the wrong rows.
+"""
+import argparse
+import sys
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pyarrow.fs as pafs
+from deltalake import CommitProperties, write_deltalake
+
+from benchmarks.synthetic import work_orders
+from eerssa.audit import audit_log, commit_info
+from eerssa.corrections import append_corrections, fold_corrections
+from eerssa.loader import load_date_range
+from eerssa.log_maintenance import maintain_log
+from eerssa.storage import FRAGMENTS, open_table, register, storage_options
+from eerssa.table_stats import table_stats
+from eerssa.writes import apply_changes
+
+YEAR = 2025
+WINDOW = (date(YEAR, 3, 1), date(YEAR, 5, 31))
+
+
+def step(name: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{name:<28} {time.perf_counter() - started:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", default="http://localhost:9000")
+    parser.add_argument("--access-key", default="minioadmin")
+    parser.add_argument("--secret-key", default="minioadmin")
+    parser.add_argument("--bucket", default="eerssa-smoke")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--files", type=int, default=16)
+    args = parser.parse_args()
+
+    options = {
+        "AWS_ENDPOINT_URL": args.endpoint,
+        "AWS_ACCESS_KEY_ID": args.access_key,
+        "AWS_SECRET_ACCESS_KEY": args.secret_key,
+        "AWS_REGION": "us-east-1",
+        "AWS_ALLOW_HTTP": "true",
+        # MinIO supports conditional writes, so concurrent commits are safe without a lock table
+        "conditional_put": "etag",
+    }
+    register(f"s3://{args.bucket}", options)
+    endpoint = args.endpoint.split("://", 1)
+    admin = pafs.S3FileSystem(access_key=args.access_key, secret_key=args.secret_key, scheme=endpoint[0],
+                              endpoint_override=endpoint[1], allow_bucket_creation=True)
+    if admin.get_file_info(args.bucket).type == pafs.FileType.NotFound:
+        admin.create_dir(args.bucket)
+
+    path = f"s3://{args.bucket}/{uuid.uuid4().hex[:8]}/ordenes"
+    per_file = -(-args.rows // args.files)
+
+    def write():
+        for part, start in enumerate(range(0, args.rows, per_file)):
+            first_day = part * 365 // args.files
+            batch = work_orders(min(per_file, args.rows - start), start_id=start, year=YEAR, seed=part,
+                                first_day=first_day, days=max(1, (part + 1) * 365 // args.files - first_day))
+            write_deltalake(path, batch.sort_by("Fecha"), mode="append", storage_options=storage_options(path))
+
+    failures = []
+    print(f"table: {path}")
+    step("write", write)
+    version = step("open", lambda: open_table(path).version())
+    if version != args.files - 1:
+        failures.append(f"expected version {args.files - 1}, got {version}")
+
+    FRAGMENTS.clear()
+    cold = step("load window (cold)", lambda: load_date_range(path, "Fecha", *WINDOW, normalize=False))
+    warm = step("load window (cached footers)", lambda: load_date_range(path, "Fecha", *WINDOW, normalize=False))
+    if cold.num_rows == 0 or cold.num_rows != warm.num_rows:
+        failures.append(f"window loads disagree: {cold.num_rows} vs {warm.num_rows} rows")
+
+    edited = cold.slice(0, 10).to_pandas()
+    edited["Descripcion"] = "EDITADO EN MINIO"
+    info = commit_info("smoke", "smoke", edited["id"].tolist())
+    step("apply_changes (10 rows)", lambda: apply_changes(
+        path, ["id"], updates=edited, commit_properties=CommitProperties(custom_metadata=info)))
+    corrected = cold.slice(10, 5).to_pandas()
+    corrected["Descripcion"] = "CORREGIDO EN MINIO"
+    step("append_corrections (5 rows)", lambda: append_corrections(path, corrected, ["id"]))
+
+    after = step("load window (corrected)", lambda: load_date_range(path, "Fecha", *WINDOW, normalize=False))
+    descriptions = after.to_pandas().set_index("id")["Descripcion"]
+    if (descriptions.loc[edited["id"]] != "EDITADO EN MINIO").any():
+        failures.append("saved rows did not come back")
+    if (descriptions.loc[corrected["id"]] != "CORREGIDO EN MINIO").any():
+        failures.append("corrections were not applied")
+
+    step("fold_corrections", lambda: fold_corrections(path))
+    log = step("audit_log", lambda: audit_log(path, key=int(edited["id"].iloc[0])))
+    if log.empty or log["user"].iloc[0] != "smoke":
+        failures.append("audit log does not show the save")
+    stats = step("table_stats", lambda: table_stats(path))
+    if stats.row_count != args.rows:
+        failures.append(f"expected {args.rows} rows in stats, got {stats.row_count}")
+    step("maintain_log", lambda: maintain_log(path, checkpoint_interval=1))
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Benchmark suite over synthetic work-order tables.
+
+Builds (or reuses) synthetic tables under benchmarks/data for every size and
+file count, times each benchmark per engine, writes the results as JSON lines
+under benchmarks/results, and optionally compares them with an earlier run.
+
+    python benchmarks/run_benchmarks.py --sizes 10k 1m --files 8 64
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<earlier>.jsonl
+
+Exits with status 1 when a comparison finds a regression.
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from deltalake import DeltaTable, write_deltalake
+
+from benchmarks.synthetic import SIZES, build_table
+from eerssa.parallel_reader import date_range_filter, read_table_parallel
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+BENCH_DIR = Path(__file__).resolve().parent
+DATA_DIR = BENCH_DIR / "data"
+RESULTS_DIR = BENCH_DIR / "results"
+YEAR = 2025
+WINDOW = (date(YEAR, 6, 1), date(YEAR, 6, 30))
+EDITED_FRACTION = 0.001
+STR_DIFF_MAX_ROWS = 20_000
+
+BENCHMARKS = {}
+SCRATCH_DIRS = []
+
+
+def benchmark(name):
+    """Register a benchmark; it yields (engine, fn) or (engine, fn, setup) cases for a table path"""
+    def decorator(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return decorator
+
+
+def scratch_copy(path: str) -> str:
+    """Copy a table to a temporary directory so write benchmarks leave the source alone"""
+    scratch = Path(tempfile.mkdtemp(prefix="bench_"))
+    SCRATCH_DIRS.append(scratch)
+    target = scratch / "table"
+    shutil.copytree(path, target)
+    return str(target)
+
+
+def duckdb_connection():
+    con = duckdb.connect()
+    con.sql("INSTALL delta")
+    con.sql("LOAD delta")
+    return con
+
+
+def window_bounds():
+    return WINDOW[0].isoformat(), date.fromordinal(WINDOW[1].toordinal() + 1).isoformat()
+
+
+def edited_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of df with a small share of Actividad cells changed, like a grid session"""
+    edited = df.copy()
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(df), size=max(1, int(len(df) * EDITED_FRACTION)), replace=False)
+    edited.iloc[rows, edited.columns.get_loc("Actividad")] = "EDIT"
+    return edited
+
+
+def window_frame(path: str) -> pd.DataFrame:
+    dataset = DeltaTable(path).to_pyarrow_dataset()
+    return dataset.to_table(filter=date_range_filter(dataset.schema, "Fecha", *WINDOW)).to_pandas()
+
+
+@benchmark("load")
+def bench_load(path):
+    yield "deltalake", lambda: DeltaTable(path).to_pyarrow_table()
+    yield "parallel", lambda: read_table_parallel(path)
+    if duckdb is not None:
+        con = duckdb_connection()
+        yield "duckdb", lambda: con.sql(f"SELECT * FROM delta_scan('{path}')").arrow()
+
+
+@benchmark("filter")
+def bench_filter(path):
+    def deltalake_filter():
+        dataset = DeltaTable(path).to_pyarrow_dataset()
+        return dataset.to_table(filter=date_range_filter(dataset.schema, "Fecha", *WINDOW))
+
+    def parallel_filter():
+        schema = DeltaTable(path).to_pyarrow_dataset().schema
+        return read_table_parallel(path, filter=date_range_filter(schema, "Fecha", *WINDOW))
+
+    yield "deltalake", deltalake_filter
+    yield "parallel", parallel_filter
+    if duckdb is not None:
+        con = duckdb_connection()
+        lower, upper = window_bounds()
+        yield "duckdb", lambda: con.sql(
+            f"SELECT * FROM delta_scan('{path}') WHERE Fecha >= '{lower}' AND Fecha < '{upper}'"
+        ).arrow()
+
+
+@benchmark("diff")
+def bench_diff(path):
+    original = window_frame(path)
+    edited = edited_copy(original)
+
+    def vectorized():
+        changed = original.ne(edited) & ~(original.isna() & edited.isna())
+        return changed.to_numpy().nonzero()
+
+    def str_loop():
+        # The cell-by-cell comparison done by edit_deltalake_v1.py
+        return [
+            (idx, col) for idx in edited.index for col in edited.columns
+            if str(edited.loc[idx, col]) != str(original.loc[idx, col])
+        ]
+
+    yield "vectorized", vectorized
+    if len(original) <= STR_DIFF_MAX_ROWS:
+        yield "str_loop", str_loop
+
+
+@benchmark("save")
+def bench_save(path):
+    edited = edited_copy(window_frame(path))
+    changed = edited[edited["Actividad"] == "EDIT"]
+    target = {}
+
+    def setup():
+        target["path"] = scratch_copy(path)
+
+    def overwrite():
+        # What the editor does today: rewrite the table with the edited frame
+        write_deltalake(target["path"], edited, mode="overwrite")
+
+    def merge():
+        (
+            DeltaTable(target["path"])
+            .merge(changed, predicate="t.id = s.id", source_alias="s", target_alias="t")
+            .when_matched_update_all()
+            .execute()
+        )
+
+    yield "overwrite", overwrite, setup
+    yield "merge", merge, setup
+
+
+@benchmark("compaction")
+def bench_compaction(path):
+    target = {}
+
+    def setup():
+        target["path"] = scratch_copy(path)
+
+    yield "deltalake", lambda: DeltaTable(target["path"]).optimize.compact(), setup
+
+
+def time_case(fn, setup, repeat):
+    """Best wall time over several runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=BENCH_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path: Path, threshold: float):
+    """Print regressions against an earlier results file and return how many there were"""
+    baseline = {}
+    for line in baseline_path.read_text().splitlines():
+        record = json.loads(line)
+        baseline[(record["benchmark"], record["engine"], record["rows"], record["files"])] = record["seconds"]
+
+    regressions = 0
+    for record in results:
+        key = (record["benchmark"], record["engine"], record["rows"], record["files"])
+        if key in baseline and record["seconds"] > baseline[key] * threshold:
+            regressions += 1
+            print(f"REGRESSION {key}: {baseline[key]:.3f}s -> {record['seconds']:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["10k"], choices=sorted(SIZES))
+    parser.add_argument("--files", nargs="+", type=int, default=[8])
+    parser.add_argument("--benchmarks", nargs="+", default=None, help=f"subset of {sorted(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", type=Path, default=None)
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    started_at = datetime.now().isoformat(timespec="seconds")
+    results = []
+    try:
+        for size in args.sizes:
+            for files in args.files:
+                path = str(DATA_DIR / f"ordenes_{size}_{files}f")
+                build_table(path, SIZES[size], files, year=YEAR)
+                for name in args.benchmarks or BENCHMARKS:
+                    for case in BENCHMARKS[name](path):
+                        engine, fn, setup = (case + (None,))[:3]
+                        seconds = time_case(fn, setup, args.repeat)
+                        results.append({
+                            "benchmark": name,
+                            "engine": engine,
+                            "rows": SIZES[size],
+                            "files": files,
+                            "seconds": round(seconds, 4),
+                            "revision": revision,
+                            "started_at": started_at,
+                        })
+                        print(f"{name:<12} {engine:<12} {size:>4} {files:>4}f {seconds:9.3f}s")
+    finally:
+        for scratch in SCRATCH_DIRS:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    results_path = RESULTS_DIR / f"{started_at.replace(':', '')}_{revision}.jsonl"
+    results_path.write_text("".join(json.dumps(record) + "\n" for record in results))
+    print(f"results written to {results_path}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Synthetic Delta tables shaped like the work-order tables.
+
+Dates are stored as timezone strings ("2025-03-14T08:15:00-05:00") exactly like
+the source system exports them, and Cuenta, Actividad and Grupo draw from small
+pools of repeated values.
+
+    python benchmarks/synthetic.py /tmp/ordenes_1m --rows 1000000 --files 32
+"""
+import argparse
+import shutil
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from deltalake import write_deltalake
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+GRUPOS = [
+    "Zamora Z1 (Cuadrilla. Nro. 6",
+    "Zamora Z1 (Cuadrilla. AP Nro. 4)",
+    "Yacuambi Z1 (Cuadrilla. Nro. 8)",
+    "Yantzaza Z1 (Cuadrilla. Nro. 5)",
+    "Líneas Energizadas (Cuadrilla  Nro.6)",
+    "Paquisha Z1 (Cuadrilla Nro. 10)",
+    "Guayzimi Z1 (Cuadrilla. Nro. 7)",
+    "El Pangui Z1 (Cuadrilla. Nro. 4)",
+    "Gualaquiza Z1 (Cuadrilla. Nro. 3)",
+    "Zamora (Agencia)",
+    "Yanzatza (Agencia)",
+    "El Pangui (Agencia)",
+    "Gualaquiza (Agencia)",
+]
+ACTIVIDADES = ["INST", "CORT", "RECX", "MANT", "INSP", "CAMB", "REUB", "ALUM"]
+CALLES = ["Av. del Ejército", "Calle Diego de Vaca", "Av. Héroes de Paquisha", "Calle Sevilla de Oro", "Vía a Yantzaza"]
+DESCRIPCIONES = [
+    "Cambio de medidor por daño",
+    "Corte por falta de pago",
+    "Reconexión de servicio",
+    "Mantenimiento de luminaria",
+    "Inspección de acometida",
+    "Reubicación de poste",
+]
+TZ_SUFFIX = "-05:00"
+
+
+def _timestamps(seconds: np.ndarray) -> pa.Array:
+    """Format epoch seconds as '%Y-%m-%dT%H:%M:%S-05:00' strings"""
+    values = pa.array(seconds.astype("datetime64[s]"))
+    return pc.binary_join_element_wise(pc.strftime(values, format="%Y-%m-%dT%H:%M:%S"), TZ_SUFFIX, "")
+
+
+def work_orders(rows: int, start_id: int = 0, year: int = 2025, seed: int = 0,
+                first_day: int = 0, days: int = 365) -> pa.Table:
+    """Generate a batch of synthetic work orders spread over `days` days of a year"""
+    rng = np.random.default_rng(seed)
+    year_start = int(datetime(year, 1, 1).timestamp()) + first_day * 86400
+    inicio = year_start + rng.integers(0, days * 86400, rows)
+    fin = inicio + rng.integers(15 * 60, 8 * 3600, rows)
+    actividad = np.array(ACTIVIDADES, dtype=object)[rng.integers(0, len(ACTIVIDADES), rows)]
+    actividad[rng.random(rows) < 0.02] = None
+    return pa.table({
+        "id": pa.array(np.arange(start_id, start_id + rows, dtype=np.int64)),
+        "Fecha": _timestamps(inicio - inicio % 86400),
+        "InicioEvento": _timestamps(inicio),
+        "FinEvento": _timestamps(fin),
+        "Cuenta": pa.array(rng.integers(100000, 100000 + max(rows // 20, 1), rows).astype(str)),
+        "Actividad": pa.array(actividad, type=pa.string()),
+        "Grupo": pa.array(np.array(GRUPOS, dtype=object)[rng.integers(0, len(GRUPOS), rows)], type=pa.string()),
+        "Descripcion": pa.array(np.array(DESCRIPCIONES, dtype=object)[rng.integers(0, len(DESCRIPCIONES), rows)], type=pa.string()),
+        "Direccion": pa.array([f"{CALLES[i % len(CALLES)]} {i % 997}" for i in rng.integers(0, 10_000, rows)], type=pa.string()),
+    })
+
+
+def build_table(path: str, rows: int, files: int, year: int = 2025, overwrite: bool = False) -> str:
+    """Write a synthetic table with roughly `files` data files, one append per file"""
+    target = Path(path)
+    if target.exists():
+        if not overwrite:
+            return path
+        shutil.rmtree(target)
+    per_file = -(-rows // files)
+    for part, start in enumerate(range(0, rows, per_file)):
+        # Like the real table, each append covers a later stretch of the year,
+        # so file statistics can prune date windows
+        first_day = part * 365 // files
+        days = max(1, (part + 1) * 365 // files - first_day)
+        batch = work_orders(min(per_file, rows - start), start_id=start, year=year, seed=part,
+                            first_day=first_day, days=days)
+        write_deltalake(path, batch.sort_by("Fecha"), mode="append")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=SIZES["10k"])
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--year", type=int, default=date.today().year)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+    build_table(args.path, args.rows, args.files, args.year, args.overwrite)
+    print(f"wrote {args.rows} rows in {args.files} files to {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,86 +1,271 @@
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
-from datetime import datetime, date
-from deltalake import DeltaTable, write_deltalake  # FIXED: Correct import
+from datetime import datetime, date, timedelta, timezone
 import os
+import threading
+import time
+import logging
+import uuid
+from eerssa.arrow_cache import ArrowWindowCache
+from eerssa.background import BackgroundTask, Progress, check_cancelled
+from eerssa.lazy import lazy_import
+from eerssa.registry import cache_for, load_registry
+from eerssa.tracing import Tracer, activate, trace, traced
+
+# Heavy libraries and engines are imported on first use, after the page has
+# started rendering (see benchmarks/import_budget.py)
+pd = lazy_import("pandas")
+deltalake = lazy_import("deltalake")
+st_aggrid = lazy_import("st_aggrid")
+aggregates = lazy_import("eerssa.daily_aggregates")
+audit = lazy_import("eerssa.audit")
+corrections = lazy_import("eerssa.corrections")
+dtypes = lazy_import("eerssa.dtypes")
+edit_history = lazy_import("eerssa.edit_history")
+grid_codec = lazy_import("eerssa.grid_codec")
+key_index = lazy_import("eerssa.key_index")
+loader = lazy_import("eerssa.loader")
+log_maintenance = lazy_import("eerssa.log_maintenance")
+storage = lazy_import("eerssa.storage")
+table_stats = lazy_import("eerssa.table_stats")
+validation = lazy_import("eerssa.validation")
+
+# Configuration (table paths, keys and editable columns live in tables.json)
+REGISTRY = load_registry()
+READ_WORKERS = int(os.environ.get("DELTA_READ_WORKERS", os.cpu_count() or 1))
+
+logger = logging.getLogger(__name__)
+
+# Highlights the cells listed in the hidden error column of their row
+INVALID_CELL_STYLE = """
+function(params) {{
+    var errors = params.data['{column}'];
+    if (errors && errors.split('\\n').some(function(line) {{ return line.indexOf(params.colDef.field + ': ') === 0; }})) {{
+        return {{'backgroundColor': '#f8d7da'}};
+    }}
+    return null;
+}}
+"""
 
-# Configuration
-DELTA_TABLE_PATH = "/home/vlad/GIT/eerssa_gh/ordenes_de_trabajo/test/deltalake_2025"
+# Rows marked for deletion stay in the grid, struck through, until the save
+DELETED_ROW_STYLE = """
+function(params) {{
+    return params.data['{column}'] ? {{'textDecoration': 'line-through', 'opacity': 0.5}} : null;
+}}
+"""
+DELETED_COLUMN = '_deleted'
 
+@traced()
 def check_delta_table_exists(table_path: str) -> bool:
     """Check if Delta table exists"""
     try:
-        DeltaTable(table_path)
+        storage.open_table(table_path, without_files=True)
         return True
     except Exception:
         return False
 
+@st.cache_data(ttl=60, show_spinner=False)
+@traced()
 def get_table_info(table_path: str) -> dict:
     """Get information about the Delta table"""
     try:
-        dt = DeltaTable(table_path)
-        df_sample = dt.to_pandas().head(1)  # Get just one row for schema
+        # The schema comes from the log; no data file is read
+        schema = storage.open_dataset(storage.open_table(table_path)).schema
         
         # Detect date columns
         date_columns = []
-        for col in df_sample.columns:
-            if df_sample[col].dtype == 'datetime64[ns]' or 'date' in col.lower():
-                date_columns.append(col)
+        for field in schema:
+            if str(field.type).startswith(('timestamp', 'date')) or 'date' in field.name.lower():
+                date_columns.append(field.name)
         
         return {
-            'columns': list(df_sample.columns),
+            'columns': schema.names,
             'date_columns': date_columns,
+            'schema': schema,
             'exists': True
         }
     except Exception as e:
         return {'exists': False, 'error': str(e)}
 
-def load_data_from_delta(start_date: date, end_date: date, date_column: str = None) -> pd.DataFrame:
-    """Load data from Delta table with date filtering"""
+@traced()
+def load_data_from_delta(table_path: str, start_date: date, end_date: date, date_column: str = None,
+                         cache: ArrowWindowCache = None, compact: bool = False, progress: Progress = None,
+                         cancel_event: threading.Event = None, search: str = None,
+                         text_columns: tuple = (), string_columns: tuple = (),
+                         key_columns: tuple = ()) -> pd.DataFrame:
+    """Load data from Delta table with date filtering (runs as a background task)"""
+    progress = progress or Progress()
+    # Read before the rows, so corrections saved against it never miss a newer commit
+    base_version = storage.open_table(table_path, without_files=True).version()
+    if search:
+        # Only the rows the text index points at are read; the dates narrow them further
+        progress.stage = 'searching'
+        table = loader.load_search(
+            table_path, search, text_columns, date_column, start_date, end_date, normalize=False
+        )
+    else:
+        # Pushes the date range down to file pruning and reuses the local
+        # Arrow cache when no commit touched the files of this window
+        table = loader.load_date_range(
+            table_path,
+            date_column,
+            start_date,
+            end_date,
+            normalize=False,
+            cache=cache,
+            max_workers=READ_WORKERS,
+            progress=progress,
+            cancel_event=cancel_event
+        )
+    check_cancelled(cancel_event)
+    progress.stage = 'converting'
+    with trace('to_pandas') as span:
+        if compact:
+            # Smaller dtypes; the report is shown after loading
+            # Editable and text columns stay strings so the grid can take new values,
+            # and keys stay wide enough for the rows Add Row appends
+            df = dtypes.to_compact_pandas(table, string_columns=string_columns, key_columns=key_columns)
+            df.attrs['memory_report'] = dtypes.memory_report(table, df)
+            span.extra.update(df.attrs['memory_report'])
+        else:
+            df = table.to_pandas()
+        span.rows = len(df)
+    
+    # The date range was already pushed down to the scan (or applied to the
+    # search results), so the frame holds exactly the requested rows
+    df.attrs['base_version'] = base_version
+    progress.stage = 'done'
+    return df
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_known_values(table_path: str, column: str) -> list:
+    """Distinct values of a column over the whole table, from the daily aggregates"""
+    return aggregates.known_values(table_path, column)
+
+@st.cache_resource(show_spinner=False)
+def get_key_index(table_path: str, key_columns: tuple):
+    """Key index of a table, shared by all sessions; saves through it take its lock"""
+    return key_index.open_key_index(table_path, key_columns)
+
+@traced()
+def save_data_to_delta(table_path: str, key_columns: list, updates: pd.DataFrame, inserts: pd.DataFrame,
+                       deletes: pd.DataFrame, df_after: pd.DataFrame, commit_metadata: dict = None,
+                       progress: Progress = None, cancel_event: threading.Event = None) -> pd.DataFrame:
+    """Save updated, new and deleted rows in one commit (runs as a background task); returns df_after"""
+    progress = progress or Progress()
+    # Cancelling is only possible before the commit starts
+    check_cancelled(cancel_event)
+    progress.stage = 'writing'
+    rows = len(updates) + len(inserts) + len(deletes)
+    saved_at = time.time_ns() // 1000
+    version_before = storage.open_table(table_path, without_files=True).version()
+    with trace('apply_changes') as span:
+        # New rows alone are a plain append and deletes alone a predicate delete;
+        # a mix is a single merge, so one commit covers the whole save. The key
+        # index narrows the merge to the files holding the edited keys
+        metrics = key_index.save_rows(
+            get_key_index(table_path, tuple(key_columns)),
+            updates=updates,
+            inserts=inserts,
+            deletes=deletes,
+            commit_properties=deltalake.CommitProperties(custom_metadata=commit_metadata) if commit_metadata else None
+        )
+        span.rows = rows
+        span.extra.update({key: value for key, value in metrics.items() if isinstance(value, int)})
+    progress.add(rows=rows)
+    # The saved rows are current as of our commit only if no other commit landed in between
+    version_after = storage.open_table(table_path, without_files=True).version()
+    df_after.attrs['base_version'] = version_after if version_after == version_before + 1 else version_before
+    
+    # Older corrections of the saved keys would otherwise be served over the new values
+    written = pd.concat([updates[key_columns], deletes[key_columns]], ignore_index=True)
+    with trace('supersede_corrections') as span:
+        span.rows = corrections.supersede_corrections(table_path, written, key_columns, saved_at)
+    
+    # Fold the new commit into the daily summary table
+    progress.stage = 'refreshing aggregates'
     try:
-        dt = DeltaTable(DELTA_TABLE_PATH)
-        df = dt.to_pandas()
-        
-        if df.empty:
-            st.warning("Delta table is empty")
-            return df
-            
-        if date_column and date_column in df.columns:
-            start_datetime = datetime.combine(start_date, datetime.min.time())
-            end_datetime = datetime.combine(end_date, datetime.max.time())
-            
-            df[date_column] = pd.to_datetime(df[date_column], errors='coerce')
-            df = df.dropna(subset=[date_column])
-            
-            mask = (df[date_column] >= start_datetime) & (df[date_column] <= end_datetime)
-            df = df.loc[mask]
-        
-        return df
-        
+        with trace('refresh_daily_aggregates'):
+            aggregates.refresh_daily_aggregates(table_path)
     except Exception as e:
-        st.error(f"Failed to load data from Delta Lake: {e}")
-        return pd.DataFrame()
-
-def save_data_to_delta(df_to_save: pd.DataFrame):
-    """Save data to Delta table using overwrite mode"""
+        logger.warning(f"Could not refresh daily aggregates: {e}")
+    
+    # Keep the log short enough that opening the table stays fast
+    progress.stage = 'checkpointing'
     try:
-        st.info(f"Saving {len(df_to_save)} records to Delta Lake...")
-        
-        write_deltalake(
-            DELTA_TABLE_PATH,
-            df_to_save,
-            mode='overwrite'  # FIXED: Use correct mode
-        )
-        st.success("Changes successfully saved to Delta Lake!")
-        
+        with trace('maintain_log'):
+            log_maintenance.maintain_log(table_path)
     except Exception as e:
-        st.error(f"Failed to save data to Delta Lake: {e}")
+        logger.warning(f"Could not checkpoint the table log: {e}")
+    
+    progress.stage = 'done'
+    return df_after
+
+@traced()
+def save_corrections_to_delta(table_path: str, key_columns: list, updates: pd.DataFrame, df_after: pd.DataFrame,
+                              base_version: int, commit_metadata: dict = None, progress: Progress = None,
+                              cancel_event: threading.Event = None) -> pd.DataFrame:
+    """Record edited rows in the corrections overlay instead of rewriting base files; returns df_after"""
+    progress = progress or Progress()
+    check_cancelled(cancel_event)
+    progress.stage = 'writing'
+    with trace('append_corrections') as span:
+        # Refused when another session changed these rows since they were loaded
+        span.rows = corrections.append_corrections(
+            table_path,
+            updates,
+            key_columns,
+            base_version=base_version,
+            commit_properties=deltalake.CommitProperties(custom_metadata=commit_metadata) if commit_metadata else None
+        )
+    progress.add(rows=span.rows)
+    # The base table is untouched, so the loaded version stays the baseline
+    df_after.attrs['base_version'] = base_version
+    progress.stage = 'done'
+    return df_after
+
+def start_editing(df: pd.DataFrame):
+    """Make a loaded or saved frame the baseline for edits, with its typed grid encoding"""
+    codec = grid_codec.GridCodec.from_frame(df)
+    st.session_state.base_version = df.attrs.get('base_version')
+    st.session_state.grid_codec = codec
+    st.session_state.df = df
+    st.session_state.original_df = df.copy()
+    st.session_state.grid_df = codec.encode(df)
+    st.session_state.validation_errors = pd.DataFrame()
+    st.session_state.history = edit_history.EditHistory(st.session_state.grid_df.columns)
+    redraw_grid()
+
+def redraw_grid():
+    """Remount the grid so it shows grid_df instead of its own copy of the data"""
+    st.session_state.grid_generation = st.session_state.get('grid_generation', 0) + 1
+
+def show_task_progress(task: BackgroundTask, key: str):
+    """Progress bar and cancel button for a running background task"""
+    st.progress(task.progress.fraction(), text=task.progress.describe())
+    if st.button("Cancel", key=f"cancel_{key}"):
+        task.cancel()
 
 # Streamlit App
 st.set_page_config(layout="wide")
 st.title("Delta Lake Interactive Editor - Fixed Version")
 
+# Stage timings for the debug panel; tasks started from this run inherit it
+if 'tracer' not in st.session_state:
+    st.session_state.tracer = Tracer(session=uuid.uuid4().hex[:8])
+activate(st.session_state.tracer)
+
+# Table selection
+table_names = list(REGISTRY.tables)
+table_name = st.sidebar.selectbox(
+    "Table:",
+    options=table_names,
+    index=table_names.index(REGISTRY.default_table)
+)
+table_config = REGISTRY.table(table_name)
+DELTA_TABLE_PATH = table_config.path
+
 # Check if table exists
 if not check_delta_table_exists(DELTA_TABLE_PATH):
     st.error(f"Delta table not found at: {DELTA_TABLE_PATH}")
@@ -98,6 +283,52 @@ if 'df' not in st.session_state:
     st.session_state.df = pd.DataFrame()
 if 'original_df' not in st.session_state:
     st.session_state.original_df = pd.DataFrame()
+if 'load_task' not in st.session_state:
+    st.session_state.load_task = None
+if 'save_task' not in st.session_state:
+    st.session_state.save_task = None
+if 'validation_errors' not in st.session_state:
+    st.session_state.validation_errors = pd.DataFrame()
+
+# Rows loaded from another table must not be saved into this one
+if st.session_state.get('table_name') != table_name:
+    st.session_state.table_name = table_name
+    st.session_state.df = pd.DataFrame()
+    st.session_state.original_df = pd.DataFrame()
+    st.session_state.validation_errors = pd.DataFrame()
+
+# Pick up background work that finished since the last rerun
+load_task = st.session_state.load_task
+if load_task is not None and load_task.done():
+    st.session_state.load_task = None
+    if load_task.cancelled:
+        st.info("Loading cancelled.")
+    elif load_task.error:
+        st.error(f"Failed to load data from Delta Lake: {load_task.error}")
+    else:
+        df = load_task.result()
+        start_editing(df)
+        if df.empty:
+            st.warning("No records found in Delta table for this selection")
+        else:
+            st.success(f"Loaded {len(df)} records.")
+        report = df.attrs.get('memory_report')
+        if report:
+            st.caption(
+                f"Memory: ~{report['plain_bytes_estimated'] / 1024 ** 2:.1f} MB with default dtypes, "
+                f"{report['compact_bytes'] / 1024 ** 2:.1f} MB with compact dtypes"
+            )
+
+save_task = st.session_state.save_task
+if save_task is not None and save_task.done():
+    st.session_state.save_task = None
+    if save_task.cancelled:
+        st.info("Save cancelled, nothing was written.")
+    elif save_task.error:
+        st.error(f"Failed to save data to Delta Lake: {save_task.error}")
+    else:
+        start_editing(save_task.result())
+        st.success("Changes successfully saved to Delta Lake!")
 
 # Sidebar
 with st.sidebar:
@@ -108,12 +339,17 @@ with st.sidebar:
     st.write(f"Columns: {len(table_info['columns'])}")
     st.write(f"Date columns: {table_info['date_columns']}")
     
-    # Date column selection
+    # Date column selection, preselecting the one configured for the table
+    date_columns = list(table_info['date_columns'])
+    if table_config.date_column in table_info['columns'] and table_config.date_column not in date_columns:
+        date_columns.insert(0, table_config.date_column)
     date_column = None
-    if table_info['date_columns']:
+    if date_columns:
+        date_options = ['None'] + date_columns
         date_column = st.selectbox(
             "Select date column for filtering:",
-            options=['None'] + table_info['date_columns']
+            options=date_options,
+            index=date_options.index(table_config.date_column) if table_config.date_column in date_options else 0
         )
         date_column = None if date_column == 'None' else date_column
     
@@ -121,77 +357,263 @@ with st.sidebar:
     today = date.today()
     start_date = st.date_input("Start Date", today)
     end_date = st.date_input("End Date", today)
+    compact_dtypes = st.checkbox(
+        "Compact dtypes (lower memory)",
+        help="Small ints, float32, categoricals and Arrow strings; useful for long date ranges"
+    )
+    search_text = ""
+    if table_config.text_columns:
+        search_text = st.text_input(
+            "Search text",
+            help=f"Rows whose {', '.join(table_config.text_columns)} contain this text (3+ characters), "
+                 "within the dates when a date column is selected"
+        ).strip()
     
-    if st.button("Load Data", type="primary"):
-        with st.spinner("Loading data from Delta Lake..."):
-            df = load_data_from_delta(start_date, end_date, date_column)
-            st.session_state.df = df
-            st.session_state.original_df = df.copy()
-            st.success(f"Loaded {len(df)} records.")
+    if st.session_state.load_task is not None:
+        show_task_progress(st.session_state.load_task, 'load')
+    elif st.button("Load Data", type="primary"):
+        # Runs on the worker pool; the result is picked up on a later rerun
+        st.session_state.load_task = BackgroundTask(
+            load_data_from_delta, DELTA_TABLE_PATH, start_date, end_date, date_column,
+            cache=cache_for(table_config.cache), compact=compact_dtypes,
+            search=search_text or None, text_columns=table_config.text_columns,
+            string_columns=tuple(col for col in table_info['columns'] if table_config.is_editable(col))
+            + table_config.text_columns,
+            key_columns=table_config.key_columns
+        )
+        st.experimental_rerun()
 
 # Main area
 if not st.session_state.df.empty:
     st.header("Editable Data Table")
     
+    codec = st.session_state.grid_codec
+    
+    # Errors from the last validation travel in a hidden column so the grid can mark the cells
+    grid_df = st.session_state.grid_df
+    changes = st.session_state.history.changes
+    if changes.deleted:
+        grid_df = grid_df.assign(**{DELETED_COLUMN: [changes.is_deleted(row) for row in range(len(grid_df))]})
+    if not st.session_state.validation_errors.empty:
+        grid_df = grid_df.assign(**{
+            validation.GRID_ERROR_COLUMN: validation.grid_error_text(st.session_state.validation_errors, grid_df.index)
+        })
+    
     # AgGrid configuration
-    gb = GridOptionsBuilder.from_dataframe(st.session_state.df)
-    gb.configure_default_column(editable=True, groupable=True)
+    gb = st_aggrid.GridOptionsBuilder.from_dataframe(grid_df)
+    gb.configure_default_column(
+        editable=True,
+        groupable=True,
+        cellStyle=st_aggrid.JsCode(INVALID_CELL_STYLE.format(column=validation.GRID_ERROR_COLUMN)),
+        tooltipField=validation.GRID_ERROR_COLUMN
+    )
+    
+    # Dates travel as epoch ms and categoricals as codes; the grid formats them
+    codec.configure_grid(gb)
     
-    # Make ID columns non-editable (if they exist)
-    for col in ['id', 'ID', 'Id']:
-        if col in st.session_state.df.columns:
+    # Key columns and columns outside the table's editable list are read-only
+    for col in st.session_state.df.columns:
+        if not table_config.is_editable(col):
             gb.configure_column(col, editable=False)
+    if validation.GRID_ERROR_COLUMN in grid_df.columns:
+        gb.configure_column(validation.GRID_ERROR_COLUMN, hide=True, editable=False)
+    if DELETED_COLUMN in grid_df.columns:
+        gb.configure_column(DELETED_COLUMN, hide=True, editable=False)
+        gb.configure_grid_options(getRowStyle=st_aggrid.JsCode(DELETED_ROW_STYLE.format(column=DELETED_COLUMN)))
     
     gb.configure_selection(selection_mode="multiple", use_checkbox=True)
     gridOptions = gb.build()
     
     # Display grid
-    grid_response = AgGrid(
-        st.session_state.df,
-        gridOptions=gridOptions,
-        data_return_mode=DataReturnMode.AS_INPUT,
-        update_mode=GridUpdateMode.MODEL_CHANGED,
-        fit_columns_on_grid_load=True,
-        height=500,
-        width='100%'
-    )
+    with trace('aggrid') as span:
+        grid_response = st_aggrid.AgGrid(
+            grid_df,
+            gridOptions=gridOptions,
+            allow_unsafe_jscode=True,
+            data_return_mode=st_aggrid.DataReturnMode.AS_INPUT,
+            update_mode=st_aggrid.GridUpdateMode.MODEL_CHANGED,
+            fit_columns_on_grid_load=True,
+            height=500,
+            width='100%',
+            key=f"grid_{st.session_state.grid_generation}"
+        )
+        span.rows = len(st.session_state.df)
+    
+    updated_grid_df = grid_response['data'].drop(columns=[validation.GRID_ERROR_COLUMN, DELETED_COLUMN],
+                                                 errors='ignore')
     
-    updated_df = grid_response['data']
+    # Cells edited since the previous rerun become one undo step
+    with trace('history') as span:
+        step_mask = grid_codec.changed_cells(st.session_state.grid_df, updated_grid_df)
+        span.extra['cells'] = st.session_state.history.record(st.session_state.grid_df, updated_grid_df, step_mask)
+        if span.extra['cells']:
+            st.session_state.grid_df = updated_grid_df
+    
+    # Add and delete rows; positions stay stable so the undo history keeps lining up.
+    # nodeId is the row's position in the data; nodeRowIndex is where it is displayed after sorting and filtering
+    selected = [int(row['_selectedRowNodeInfo']['nodeId']) for row in grid_response['selected_rows'] or []]
+    add_col, delete_col, restore_col = st.columns(3)
+    with add_col:
+        if st.button("➕ Add Row"):
+            key = table_config.key_columns[0]
+            grid_df = st.session_state.grid_df
+            if len(table_config.key_columns) != 1 or not pd.api.types.is_integer_dtype(grid_df[key]):
+                st.error("New rows need a single integer key column.")
+            else:
+                # Next key after the table's largest, read from the log statistics; another
+                # session may take it first, in which case the save fails and names the key
+                key_stats = table_stats.table_stats(DELTA_TABLE_PATH).columns.get(key)
+                largest = max(key_stats.max if key_stats and key_stats.max is not None else -1,
+                              grid_df[key].max() if grid_df[key].notna().any() else -1)
+                new_row = pd.DataFrame({key: [largest + 1]}, index=[grid_df.index.max() + 1 if len(grid_df) else 0])
+                new_row = new_row.reindex(columns=grid_df.columns).astype(grid_df.dtypes.to_dict())
+                st.session_state.grid_df = pd.concat([grid_df, new_row])
+                changes.insert_row(len(grid_df))
+                redraw_grid()
+                st.experimental_rerun()
+    with delete_col:
+        if st.button("🗑️ Delete Selected", disabled=not selected):
+            changes.delete_rows(selected)
+            redraw_grid()
+            st.experimental_rerun()
+    with restore_col:
+        if st.button("↩️ Restore Selected", disabled=not selected):
+            changes.restore_rows(selected)
+            redraw_grid()
+            st.experimental_rerun()
+    
+    # Pending changes are the history's running change set; decode without re-parsing
+    with trace('decode') as span:
+        has_changes = bool(changes)
+        updated_df = codec.decode_frame(updated_grid_df) if has_changes else st.session_state.original_df
+        span.rows = len(updated_grid_df)
+        span.extra['changed_cells'] = changes.cells_changed
     
     # Show changes
-    if not updated_df.equals(st.session_state.original_df):
+    if has_changes:
         st.warning("⚠️ You have unsaved changes!")
         
-        # Show what changed
-        changes = []
-        for idx in updated_df.index:
-            for col in updated_df.columns:
-                if str(updated_df.loc[idx, col]) != str(st.session_state.original_df.loc[idx, col]):
-                    changes.append({
-                        'Row': idx,
-                        'Column': col,
-                        'Old Value': st.session_state.original_df.loc[idx, col],
-                        'New Value': updated_df.loc[idx, col]
-                    })
+        # Cast the changed rows to the table schema and check the table rules
+        with trace('validate') as span:
+            changed_rows = updated_df.iloc[changes.rows()]
+            # Codes in use anywhere in the table, not only in the loaded window
+            known_actividades = set(get_known_values(DELTA_TABLE_PATH, 'Actividad')) \
+                if 'Actividad' in st.session_state.original_df.columns else set()
+            _, errors = validation.validate_rows(
+                changed_rows,
+                table_info['schema'],
+                validation.work_order_rules(known_actividades, table_config.year)
+            )
+            span.rows = len(changed_rows)
+            span.extra['invalid_cells'] = len(errors)
+        
+        # Keep the edits and redraw the grid when the set of invalid cells changes
+        if validation.error_cells(errors) != validation.error_cells(st.session_state.validation_errors):
+            st.session_state.df = updated_df
+            st.session_state.grid_df = updated_grid_df
+            st.session_state.validation_errors = errors
+            st.experimental_rerun()
         
-        if changes:
-            st.subheader("Changes Preview:")
-            st.dataframe(pd.DataFrame(changes))
+        if not errors.empty:
+            st.error(f"{len(errors)} invalid cells; fix them before saving.")
+            st.dataframe(errors)
+        
+        # Show what changed
+        st.subheader("Changes Preview:")
+        st.caption(changes.describe())
+        st.dataframe(changes.preview(st.session_state.original_df, updated_df))
     
     # Save button
-    col1, col2 = st.columns(2)
+    history = st.session_state.history
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
-        if st.button("Save Changes", type="primary"):
-            if not updated_df.equals(st.session_state.original_df):
-                save_data_to_delta(updated_df)
-                st.session_state.df = updated_df
-                st.session_state.original_df = updated_df.copy()
+        if st.session_state.save_task is not None:
+            show_task_progress(st.session_state.save_task, 'save')
+        elif st.button("Save Changes", type="primary"):
+            if not st.session_state.validation_errors.empty:
+                st.error("Fix the invalid cells before saving.")
+            elif has_changes:
+                st.session_state.confirm_save = True
             else:
                 st.info("No changes to save.")
     
     with col2:
         if st.button("Discard Changes"):
-            st.session_state.df = st.session_state.original_df.copy()
+            if changes.inserted or changes.deleted:
+                # Row changes are not part of the undo history; start over from the loaded data
+                start_editing(st.session_state.original_df)
+                st.experimental_rerun()
+            # Undoing every step restores the loaded values cell by cell; redo brings them back
+            history.undo_all(st.session_state.grid_df)
+            st.session_state.df = st.session_state.original_df
+            st.session_state.validation_errors = pd.DataFrame()
+            redraw_grid()
+            st.experimental_rerun()
+    
+    with col3:
+        if st.button("↶ Undo", disabled=not history.can_undo):
+            history.undo(st.session_state.grid_df)
+            redraw_grid()
+            st.experimental_rerun()
+    
+    with col4:
+        if st.button("↷ Redo", disabled=not history.can_redo):
+            history.redo(st.session_state.grid_df)
+            redraw_grid()
+            st.experimental_rerun()
+    
+    # Confirmation reads the change set's counts; they also go into the commit metadata
+    if st.session_state.get('confirm_save') and has_changes and st.session_state.save_task is None:
+        st.info(f"Save {changes.describe()}?")
+        # Edited rows only: appended to the overlay, folded into the base table later
+        as_corrections = st.checkbox(
+            "Save as corrections",
+            disabled=bool(changes.inserted or changes.deleted) or st.session_state.get('base_version') is None,
+            help="Appends the edited rows to the corrections table instead of rewriting data files. "
+                 "Refused if another session changed the same rows since they were loaded; "
+                 "reload and edit again in that case."
+        ) and not (changes.inserted or changes.deleted)
+        confirm_col, cancel_col = st.columns(2)
+        if confirm_col.button("Confirm Save", type="primary"):
+            st.session_state.confirm_save = False
+            deleted = changes.deleted_rows()
+            key_columns = list(table_config.key_columns)
+            updates = updated_df.iloc[changes.updated_rows()]
+            inserts = updated_df.iloc[changes.inserted_rows()]
+            deletes = st.session_state.original_df.iloc[deleted][key_columns]
+            # Who saved and which keys changed travel with the commit; eerssa.audit reads them back
+            touched = pd.concat([updates[key_columns], inserts[key_columns], deletes])
+            commit_metadata = audit.commit_info(
+                audit.current_user(getattr(st.experimental_user, 'email', None)),
+                st.session_state.tracer.session,
+                touched[key_columns[0]] if len(key_columns) == 1 else touched.to_numpy(),
+                changes.commit_metadata()
+            )
+            df_after = updated_df.drop(index=updated_df.index[deleted]).reset_index(drop=True)
+            if as_corrections:
+                st.session_state.save_task = BackgroundTask(
+                    save_corrections_to_delta,
+                    DELTA_TABLE_PATH,
+                    key_columns,
+                    updates=updates,
+                    df_after=df_after,
+                    base_version=st.session_state.base_version,
+                    commit_metadata=commit_metadata
+                )
+            else:
+                st.session_state.save_task = BackgroundTask(
+                    save_data_to_delta,
+                    DELTA_TABLE_PATH,
+                    key_columns,
+                    updates=updates,
+                    inserts=inserts,
+                    deletes=deletes,
+                    df_after=df_after,
+                    commit_metadata=commit_metadata
+                )
+            st.experimental_rerun()
+        if cancel_col.button("Cancel Save"):
+            st.session_state.confirm_save = False
             st.experimental_rerun()
 
 else:
@@ -200,8 +622,62 @@ else:
     # Show sample of what the table contains
     with st.expander("Table Preview"):
         try:
-            dt = DeltaTable(DELTA_TABLE_PATH)
-            sample_df = dt.to_pandas().head(5)
+            dt = storage.open_table(DELTA_TABLE_PATH)
+            sample_df = storage.open_dataset(dt).head(5).to_pandas()
             st.dataframe(sample_df)
         except Exception as e:
             st.error(f"Could not load table preview: {e}")
+    
+    # Crew summary comes from the precomputed daily aggregates table
+    with st.expander("Daily Summary by Crew"):
+        try:
+            summary = aggregates.load_daily_aggregates(DELTA_TABLE_PATH, start_date, end_date, by=['Fecha', aggregates.CREW_COLUMN])
+            st.dataframe(summary.to_pandas())
+        except Exception as e:
+            st.info(f"Daily aggregates not available yet: {e}")
+
+# Rows saved as corrections are served over the base table until they are folded into it
+with st.expander("Pending Corrections"):
+    try:
+        overlay = corrections.open_corrections(DELTA_TABLE_PATH)
+        pending = corrections.latest_corrections(overlay).num_rows if overlay is not None else 0
+        st.write(f"{pending} corrected rows not yet in the base table.")
+        if st.button("Fold corrections", disabled=not pending or st.session_state.save_task is not None):
+            with st.spinner("Merging corrections into the base table..."):
+                folded = corrections.fold_corrections(DELTA_TABLE_PATH)
+            st.success(f"Folded {folded} rows; reload the data before saving more corrections.")
+    except Exception as e:
+        st.error(f"Could not read the corrections: {e}")
+
+# Saves recorded in the commit log: who changed what, without reading data files
+with st.expander("Audit Trail"):
+    audit_key = st.text_input("Key (leave empty for every save)", key='audit_key')
+    audit_days = st.number_input("Days back", min_value=1, value=7, key='audit_days')
+    if st.button("Search", key='audit_search'):
+        try:
+            key = int(audit_key) if audit_key.strip().isdigit() else (audit_key.strip() or None)
+            since = datetime.now(timezone.utc) - timedelta(days=audit_days)
+            st.dataframe(audit.audit_log(DELTA_TABLE_PATH, key=key, since=since), use_container_width=True)
+        except Exception as e:
+            st.error(f"Could not read the audit trail: {e}")
+
+# Stage timings recorded by the tracer in this session
+with st.expander("Debug: Stage Timings"):
+    timings = st.session_state.tracer.records()
+    if timings:
+        st.dataframe(pd.DataFrame(timings).iloc[::-1], use_container_width=True)
+        st.download_button(
+            "Download JSON lines",
+            data=st.session_state.tracer.to_jsonl(),
+            file_name=f"timings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+            mime="application/x-ndjson"
+        )
+        if st.button("Clear timings"):
+            st.session_state.tracer.clear()
+    else:
+        st.write("No stages recorded yet.")
+
+# Poll running background tasks; any widget interaction interrupts this rerun
+if st.session_state.load_task is not None or st.session_state.save_task is not None:
+    time.sleep(0.5)
+    st.experimental_rerun()
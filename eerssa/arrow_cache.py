@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from eerssa.lazy import lazy_import
+from eerssa.storage import table_id
+
+# Imported on first read or write so the registry, which needs the defaults
+# below, stays cheap to import
+pa = lazy_import("pyarrow")
+
+DEFAULT_CACHE_DIR = os.path.expanduser(os.environ.get("EERSSA_CACHE_DIR", "~/.cache/eerssa/ventanas"))
+DEFAULT_MAX_BYTES = int(os.environ.get("EERSSA_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+
+class ArrowWindowCache:
+    """
+    On-disk cache of decoded date windows stored as uncompressed Arrow IPC files.
+
+    Entries are keyed by table path and filter. Each entry remembers the table
+    version and the data files it was built from; when a newer version still
+    resolves the filter to the same files the entry stays valid, otherwise a
+    commit touched overlapping files and the entry is dropped. Reads are
+    memory-mapped, and the least recently used entries are evicted once the
+    cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, table_path: str, filter_key: str):
+        key = hashlib.sha1(f"{table_id(table_path)}|{filter_key}".encode()).hexdigest()
+        return self.cache_dir / f"{key}.arrow", self.cache_dir / f"{key}.json"
+
+    def get(self, table_path: str, filter_key: str, version: int, files: List[str]) -> Optional[pa.Table]:
+        """Return the cached table if it is still valid for this version and file set"""
+        data_path, meta_path = self._paths(table_path, filter_key)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if meta['version'] != version:
+            if meta['files'] != sorted(files):
+                self.invalidate(table_path, filter_key)
+                return None
+            meta['version'] = version
+            meta_path.write_text(json.dumps(meta))
+
+        try:
+            with pa.memory_map(str(data_path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            self.invalidate(table_path, filter_key)
+            return None
+
+        # Touching the file keeps mtime ordered by last use for LRU eviction
+        os.utime(data_path)
+        return table
+
+    def put(self, table_path: str, filter_key: str, version: int, files: List[str], table: pa.Table):
+        """Store a table for this filter, replacing any previous entry"""
+        data_path, meta_path = self._paths(table_path, filter_key)
+        tmp_path = data_path.parent / f"{data_path.stem}.{uuid.uuid4().hex}.tmp"
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, data_path)
+        meta_path.write_text(json.dumps({
+            'table_path': table_path,
+            'filter': filter_key,
+            'version': version,
+            'files': sorted(files),
+        }))
+        self.evict()
+
+    def invalidate(self, table_path: str, filter_key: str):
+        """Drop the entry for this filter"""
+        for path in self._paths(table_path, filter_key):
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        """Drop every entry"""
+        for path in self.cache_dir.glob('*.arrow'):
+            path.unlink(missing_ok=True)
+            path.with_suffix('.json').unlink(missing_ok=True)
+
+    def size_bytes(self) -> int:
+        """Total size of the cached Arrow files"""
+        return sum(path.stat().st_size for path in self.cache_dir.glob('*.arrow'))
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for path in self.cache_dir.glob('*.arrow'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix('.json').unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,103 @@
+"""
+Audit trail kept in the Delta log itself.
+
+Every save attaches who made it (user, session) and what it touched (the
+changed keys and per-column cell counts) as custom commit info. audit_log
+answers "who touched order X last week" from the commit infos alone: the table
+is opened without tracking its files, so no data file and no file list is
+read, and the walk through history stops at the first commit older than the
+requested window. Commits of the table's corrections overlay are included.
+
+    python -m eerssa.audit /path/to/deltalake_2025 --key 1234 --days 7
+"""
+import argparse
+import getpass
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from eerssa.change_set import METADATA_PREFIX
+from eerssa.corrections import corrections_path
+from eerssa.storage import is_table, open_table
+
+USER_KEY = f"{METADATA_PREFIX}user"
+SESSION_KEY = f"{METADATA_PREFIX}session"
+KEYS_KEY = f"{METADATA_PREFIX}keys"
+HISTORY_PAGE = 200
+
+
+def current_user(fallback: Optional[str] = None) -> str:
+    """EERSSA_USER, else the given fallback (e.g. the Streamlit login), else the OS user"""
+    return os.environ.get("EERSSA_USER") or fallback or getpass.getuser()
+
+
+def commit_info(user: str, session: str, keys: Iterable, details: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Custom commit info for a save; values are strings as the Delta protocol requires"""
+    info = dict(details or {})
+    info[USER_KEY] = user
+    info[SESSION_KEY] = session
+    info[KEYS_KEY] = json.dumps([key.tolist() if hasattr(key, "tolist") else key for key in keys], default=str)
+    return info
+
+
+def _commits(table_path: str, since_ms: Optional[int]) -> List[dict]:
+    """Commit infos newer than since_ms, newest first, reading history a page at a time"""
+    if not is_table(table_path):
+        return []
+    dt = open_table(table_path, without_files=True)
+    commits, limit = [], HISTORY_PAGE
+    while True:
+        page = sorted(dt.history(limit=limit), key=lambda commit: commit.get("version", -1), reverse=True)
+        commits = [commit for commit in page if since_ms is None or commit.get("timestamp", 0) >= since_ms]
+        # The page reached past the window, or covers the whole history
+        if len(commits) < len(page) or len(page) < limit:
+            return commits
+        limit *= 2
+
+
+def audit_log(table_path: str, key=None, user: Optional[str] = None, since: Optional[datetime] = None) -> pd.DataFrame:
+    """Saves to a table (and its corrections) newer than since, optionally touching key or made by user"""
+    since_ms = int(since.timestamp() * 1000) if since is not None else None
+    wanted_key = json.dumps(key, default=str) if key is not None else None
+    rows = []
+    for source, path in (("table", table_path), ("corrections", corrections_path(table_path))):
+        for commit in _commits(path, since_ms):
+            if user is not None and commit.get(USER_KEY) != user:
+                continue
+            keys = json.loads(commit[KEYS_KEY]) if KEYS_KEY in commit else []
+            if wanted_key is not None and wanted_key not in {json.dumps(k, default=str) for k in keys}:
+                continue
+            rows.append({
+                "timestamp": pd.to_datetime(commit.get("timestamp"), unit="ms", utc=True),
+                "source": source,
+                "version": commit.get("version"),
+                "operation": commit.get("operation"),
+                "user": commit.get(USER_KEY),
+                "session": commit.get(SESSION_KEY),
+                "keys": len(keys),
+                "details": {name[len(METADATA_PREFIX):]: value for name, value in commit.items()
+                            if name.startswith(METADATA_PREFIX) and name not in (USER_KEY, SESSION_KEY, KEYS_KEY)},
+            })
+    columns = ["timestamp", "source", "version", "operation", "user", "session", "keys", "details"]
+    return pd.DataFrame(rows, columns=columns).sort_values("timestamp", ascending=False, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Who changed a table, from its commit log only")
+    parser.add_argument("path")
+    parser.add_argument("--key", type=int)
+    parser.add_argument("--user")
+    parser.add_argument("--days", type=float, default=7)
+    args = parser.parse_args()
+    since = datetime.now(timezone.utc) - timedelta(days=args.days)
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(audit_log(args.path, key=args.key, user=args.user, since=since).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+# Shared by every session of the app; loads and saves mostly wait on I/O and
+# Arrow's own thread pools, so a few workers are enough.
+EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="eerssa-bg")
+
+
+class Cancelled(Exception):
+    """Raised inside a background task after cancellation was requested"""
+
+
+@dataclass
+class Progress:
+    """Counters updated by a running task and read by the UI on each rerun"""
+    stage: str = "queued"
+    files_total: int = 0
+    files_read: int = 0
+    bytes_read: int = 0
+    rows: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, files: int = 0, bytes_read: int = 0, rows: int = 0):
+        """Add to the counters from any worker thread"""
+        with self._lock:
+            self.files_read += files
+            self.bytes_read += bytes_read
+            self.rows += rows
+
+    def fraction(self) -> float:
+        """Share of files read so far, between 0 and 1"""
+        if not self.files_total:
+            return 0.0
+        return min(self.files_read / self.files_total, 1.0)
+
+    def describe(self) -> str:
+        """One-line summary for a progress bar"""
+        return (f"{self.stage}: {self.files_read}/{self.files_total} files, "
+                f"{self.bytes_read / 1024 ** 2:.1f} MB, {self.rows:,} rows")
+
+
+def check_cancelled(cancel_event: Optional[threading.Event]):
+    """Raise Cancelled if cancellation was requested"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise Cancelled()
+
+
+class BackgroundTask:
+    """
+    A function running on the shared worker pool.
+
+    The function receives progress= and cancel_event= keyword arguments. The
+    task object is kept in st.session_state so a later rerun can show its
+    progress, cancel it, or pick up its result.
+    """
+
+    def __init__(self, fn: Callable[..., Any], *args, **kwargs):
+        self.progress = Progress()
+        self.cancel_event = threading.Event()
+        # Run in a copy of the caller's context so the active tracer follows the task
+        context = contextvars.copy_context()
+        self.future: Future = EXECUTOR.submit(
+            context.run, fn, *args, progress=self.progress, cancel_event=self.cancel_event, **kwargs
+        )
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self):
+        """Request cancellation; a task that has not started yet never runs"""
+        self.cancel_event.set()
+        self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self.future.done():
+            return False
+        return self.future.cancelled() or isinstance(self.future.exception(), Cancelled)
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        """Exception raised by the task, other than cancellation"""
+        if not self.future.done() or self.future.cancelled():
+            return None
+        exception = self.future.exception()
+        return None if isinstance(exception, Cancelled) else exception
+
+    def result(self) -> Any:
+        return self.future.result()
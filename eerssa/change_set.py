@@ -0,0 +1,151 @@
+"""
+Running summary of the pending edits of a grid session.
+
+A ChangeSet is fed every cell delta as it is recorded, undone or redone, and
+keeps the original value of each edited cell plus counts of touched rows and
+changed cells per column. A cell edited back to its original value drops out.
+Rows added in the grid and loaded rows marked for deletion are tracked by
+position next to the cell changes; a row that was added and then deleted
+counts as neither.
+
+The preview, the save confirmation and the commit metadata read these counts
+directly, so nothing compares whole frames at save time.
+"""
+import json
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Prefix of the commit metadata keys written for a save
+METADATA_PREFIX = "eerssa."
+
+
+def _same(left, right) -> bool:
+    if pd.isna(left) and pd.isna(right):
+        return True
+    if pd.isna(left) or pd.isna(right):
+        return False
+    return left == right
+
+
+class ChangeSet:
+    """Net cell changes against the loaded data, with per-row and per-column counts"""
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        # (row, column position) -> value when loaded
+        self._original: Dict[Tuple[int, int], object] = {}
+        self._per_row: Counter = Counter()
+        self._per_column: Counter = Counter()
+        self._inserted: Set[int] = set()
+        self._deleted: Set[int] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self._original) or bool(self.inserted) or bool(self.deleted)
+
+    def insert_row(self, row: int):
+        self._inserted.add(row)
+
+    def delete_rows(self, rows: Iterable[int]):
+        self._deleted.update(rows)
+
+    def restore_rows(self, rows: Iterable[int]):
+        self._deleted.difference_update(rows)
+
+    def is_deleted(self, row: int) -> bool:
+        return row in self._deleted
+
+    def inserted_rows(self) -> np.ndarray:
+        """Positions of the added rows that are still wanted"""
+        return np.array(sorted(self._inserted - self._deleted), dtype=np.int64)
+
+    def deleted_rows(self) -> np.ndarray:
+        """Positions of loaded rows marked for deletion"""
+        return np.array(sorted(self._deleted - self._inserted), dtype=np.int64)
+
+    def updated_rows(self) -> np.ndarray:
+        """Positions of loaded, kept rows with at least one changed cell"""
+        return np.array(sorted(set(self._per_row) - self._inserted - self._deleted), dtype=np.int64)
+
+    @property
+    def inserted(self) -> int:
+        return len(self._inserted - self._deleted)
+
+    @property
+    def deleted(self) -> int:
+        return len(self._deleted - self._inserted)
+
+    def apply(self, row: int, column: int, old, new):
+        """Account for one cell going from old to new"""
+        cell = (row, column)
+        if cell not in self._original:
+            if _same(old, new):
+                return
+            self._original[cell] = old
+            self._per_row[row] += 1
+            self._per_column[column] += 1
+        elif _same(self._original[cell], new):
+            del self._original[cell]
+            self._per_row[row] -= 1
+            self._per_column[column] -= 1
+            if not self._per_row[row]:
+                del self._per_row[row]
+            if not self._per_column[column]:
+                del self._per_column[column]
+
+    @property
+    def rows_touched(self) -> int:
+        return len(self._per_row)
+
+    @property
+    def cells_changed(self) -> int:
+        return len(self._original)
+
+    def cells_per_column(self) -> Dict[str, int]:
+        return {self.columns[column]: count for column, count in sorted(self._per_column.items())}
+
+    def rows(self) -> np.ndarray:
+        """Positions of the rows a save writes: updated and added ones, in order"""
+        return np.array(sorted((set(self._per_row) | self._inserted) - self._deleted), dtype=np.int64)
+
+    def summary(self) -> dict:
+        return {
+            'rows_touched': self.rows_touched,
+            'cells_changed': self.cells_changed,
+            'cells_per_column': self.cells_per_column(),
+            'inserted': self.inserted,
+            'deleted': self.deleted,
+        }
+
+    def describe(self) -> str:
+        """One line for the confirmation prompt"""
+        parts = [f"{self.cells_changed} cells in {self.rows_touched} rows"]
+        if self.inserted:
+            parts.append(f"{self.inserted} new rows")
+        if self.deleted:
+            parts.append(f"{self.deleted} deleted rows")
+        columns = ", ".join(f"{name} ({count})" for name, count in self.cells_per_column().items())
+        return "; ".join(parts) + (f" — {columns}" if columns else "")
+
+    def commit_metadata(self) -> Dict[str, str]:
+        """Custom commit metadata describing the save (values must be strings)"""
+        return {f"{METADATA_PREFIX}{key}": value if isinstance(value, str) else json.dumps(value)
+                for key, value in self.summary().items()}
+
+    def preview(self, before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+        """One row per changed cell with old and new values taken from decoded frames; added rows have no old value"""
+        cells: List[Tuple[int, int]] = sorted(cell for cell in self._original if cell[0] not in self._deleted)
+
+        def old_value(row: int, column: int):
+            if row >= len(before):
+                return None
+            return before.iat[row, before.columns.get_loc(self.columns[column])]
+
+        return pd.DataFrame({
+            'Row': [after.index[row] for row, _ in cells],
+            'Column': [self.columns[column] for _, column in cells],
+            'Old Value': [old_value(row, column) for row, column in cells],
+            'New Value': [after.iat[row, after.columns.get_loc(self.columns[column])] for row, column in cells],
+        })
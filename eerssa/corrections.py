@@ -0,0 +1,240 @@
+"""
+Corrections overlay for small edits.
+
+Deletion vectors would let a save mark the old rows deleted and append only
+their new versions, but deltalake cannot write them. The overlay keeps that
+write cost without them: edited rows are appended to a small sibling Delta
+table, `<table>_corrections`, and eerssa.loader serves the latest correction of
+each key in place of the base row. fold_corrections merges the pending
+corrections into the base table in one commit and empties the overlay, which is
+the compaction step that purging deletion vectors would be.
+
+A correction is recorded against the base version its rows were read at and
+is refused when a later base commit changed any of the rows it corrects;
+commits that touch other keys (appends, saves, folds of other corrections)
+do not get in the way. A keyed save to the base table
+supersedes the corrections of the keys it wrote (supersede_corrections), so an
+older correction never comes back over a newer base edit.
+
+Readers that query the base table directly (DuckDB, the daily aggregates, the
+key index) see the old values until the corrections are folded.
+"""
+import json
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from deltalake import CommitProperties, DeltaTable, write_deltalake
+
+from eerssa.key_index import KEY_COLUMNS
+from eerssa.storage import is_table, open_dataset, open_table, storage_options
+from eerssa.write_profile import profile_for
+from eerssa.writes import (diff_frames, keys_filter, keys_predicate, merge_changes, quote, sorted_for_write,
+                           source_table, write_options)
+
+CORRECTIONS_SUFFIX = "_corrections"
+# Microseconds since the epoch; the latest correction of a key wins
+WRITTEN_AT = "_written_at"
+# The overlay's key columns are kept in its Delta metadata description, as
+# JSON; deltalake only accepts delta.* keys in the table configuration
+KEY_COLUMNS_FIELD = "keyColumns"
+
+
+def corrections_path(table_path: str) -> str:
+    return table_path.rstrip("/") + CORRECTIONS_SUFFIX
+
+
+def open_corrections(table_path: str) -> Optional[DeltaTable]:
+    """The overlay of a table, or None when it has never been corrected"""
+    path = corrections_path(table_path)
+    if not is_table(path):
+        return None
+    return open_table(path)
+
+
+def overlay_key_columns(overlay: DeltaTable) -> Sequence[str]:
+    try:
+        keys = json.loads(overlay.metadata().description or "{}").get(KEY_COLUMNS_FIELD)
+    except (ValueError, AttributeError):
+        keys = None
+    return tuple(keys) if keys else KEY_COLUMNS
+
+
+def _keys(table: pa.Table, key_columns: Sequence[str]) -> pd.Index:
+    keys = [table.column(name).to_pandas() for name in key_columns]
+    return pd.Index(keys[0]) if len(keys) == 1 else pd.MultiIndex.from_arrays(keys)
+
+
+def append_corrections(table_path: str, rows: pd.DataFrame, key_columns: Sequence[str] = KEY_COLUMNS,
+                       base_version: Optional[int] = None,
+                       commit_properties: Optional[CommitProperties] = None) -> int:
+    """
+    Record the new versions of edited rows without touching the base table.
+
+    rows must be whole rows (every base column). base_version is the base table
+    version the rows were read at; the write is refused when a commit since
+    then changed, added or removed any of the corrected keys, because the
+    corrections would then hide the newer base rows. Returns the number of rows written.
+    """
+    if not key_columns:
+        raise ValueError("At least one key column is required to record corrections")
+    overlay = open_corrections(table_path)
+    if overlay is not None and tuple(overlay_key_columns(overlay)) != tuple(key_columns):
+        raise ValueError(f"Corrections of {table_path} are keyed on {list(overlay_key_columns(overlay))}, "
+                         f"not {list(key_columns)}")
+    if rows.empty:
+        return 0
+
+    base = open_table(table_path)
+    if base_version is not None and base.version() != base_version:
+        changed = changed_keys(table_path, base, base_version, rows, key_columns)
+        if not changed.empty:
+            raise ValueError(f"{table_path} changed since the rows were read (version {base_version}, "
+                             f"now {base.version()}) for keys {changed.head(10).to_dict('records')}; "
+                             "reload them before saving corrections")
+    schema = open_dataset(base).schema
+    missing = [name for name in schema.names if name not in rows.columns]
+    if missing:
+        raise ValueError(f"Corrections must carry whole rows; missing columns: {missing}")
+    rows = rows.drop_duplicates(subset=list(key_columns), keep="last")
+    table = source_table(rows[schema.names], schema)
+    table = table.append_column(WRITTEN_AT, pa.array(np.full(table.num_rows, time.time_ns() // 1000)))
+    path = corrections_path(table_path)
+    profile = profile_for(path)
+    created = {}
+    if overlay is None:
+        created = {
+            "description": json.dumps({KEY_COLUMNS_FIELD: list(key_columns)}),
+            "configuration": profile.table_properties(table.column_names),
+        }
+    write_deltalake(
+        path,
+        sorted_for_write(table, profile),
+        mode="append",
+        schema_mode="merge",
+        commit_properties=commit_properties,
+        storage_options=storage_options(path),
+        **write_options(profile, table.schema),
+        **created,
+    )
+    return table.num_rows
+
+
+def changed_keys(table_path: str, base: DeltaTable, base_version: int, rows: pd.DataFrame,
+                 key_columns: Sequence[str]) -> pd.DataFrame:
+    """Keys of rows whose base row differs between base_version and the loaded base version"""
+    keys = rows[list(key_columns)].drop_duplicates()
+
+    def key_rows(dt: DeltaTable) -> pd.DataFrame:
+        dataset = open_dataset(dt)
+        found = dataset.to_table(filter=keys_filter(dataset.schema, keys, key_columns)).to_pandas()
+        return found.merge(keys, on=list(key_columns))
+
+    updated, inserted, deleted = diff_frames(key_rows(open_table(table_path, version=base_version)),
+                                             key_rows(base), key_columns)
+    return pd.concat([updated[list(key_columns)], inserted[list(key_columns)], deleted], ignore_index=True)
+
+
+def latest_corrections(overlay: DeltaTable) -> pa.Table:
+    """The most recent correction of every key in the overlay"""
+    table = open_dataset(overlay).to_table()
+    if not table.num_rows:
+        return table
+    key_columns = list(overlay_key_columns(overlay))
+    keys = table.select(key_columns + [WRITTEN_AT]).to_pandas()
+    latest = keys.sort_values(WRITTEN_AT, kind="stable").drop_duplicates(subset=key_columns, keep="last")
+    return table.take(pa.array(latest.index.to_numpy()))
+
+
+def apply_corrections(table: pa.Table, overlay: DeltaTable, filter: Optional[ds.Expression] = None) -> pa.Table:
+    """
+    Replace the rows of a loaded window with their latest corrections.
+
+    filter is the window's filter: a correction that moved a row into the
+    window adds it, one that moved it out drops it. The loaded table must
+    include the key columns.
+    """
+    latest = latest_corrections(overlay)
+    if not latest.num_rows:
+        return table
+    kept = drop_corrected(table, latest, overlay_key_columns(overlay))
+    return pa.concat_tables([kept, corrected_rows(latest, table.schema, filter)], promote_options="permissive")
+
+
+def drop_corrected(table: pa.Table, latest: pa.Table, key_columns: Sequence[str]) -> pa.Table:
+    """Rows of table whose key has no correction in latest"""
+    if not latest.num_rows:
+        return table
+    corrected = pa.array(_keys(table, key_columns).isin(_keys(latest, key_columns)))
+    return table.filter(pc.invert(corrected))
+
+
+def corrected_rows(latest: pa.Table, schema: pa.Schema, filter: Optional[ds.Expression] = None) -> pa.Table:
+    """Latest corrections that fall inside the filter, as columns of the given schema"""
+    if filter is not None:
+        latest = latest.filter(filter)
+    columns = {}
+    for field in schema:
+        if field.name in latest.column_names:
+            columns[field.name] = latest[field.name].cast(field.type, safe=False)
+    return pa.table(columns)
+
+
+def _written_predicate(latest: pa.Table, key_columns: Sequence[str]) -> str:
+    """Predicate on the overlay matching each key's corrections up to its latest one in latest"""
+    # Rows saved together share their timestamp, so this is one clause per save
+    latest = latest.select(list(key_columns) + [WRITTEN_AT]).to_pandas()
+    return " OR ".join(
+        f"({quote(WRITTEN_AT)} <= {written_at} AND ({keys_predicate(keys, key_columns)}))"
+        for written_at, keys in latest.groupby(WRITTEN_AT)
+    )
+
+
+def supersede_corrections(table_path: str, keys: pd.DataFrame, key_columns: Sequence[str],
+                          written_before: int) -> int:
+    """
+    Drop the corrections of keys that a base save wrote after they were recorded.
+
+    Call it after a keyed save to the base table (updates and deletes), with
+    written_before taken (in microseconds) before the save started; corrections
+    recorded later stay. Returns the number of keys whose corrections were dropped.
+    """
+    overlay = open_corrections(table_path)
+    if overlay is None or keys.empty:
+        return 0
+    if tuple(overlay_key_columns(overlay)) != tuple(key_columns):
+        raise ValueError(f"Corrections of {table_path} are keyed on {list(overlay_key_columns(overlay))}, "
+                         f"not {list(key_columns)}")
+    profile = profile_for(corrections_path(table_path))
+    overlay.delete(
+        f"({keys_predicate(keys, key_columns)}) AND {quote(WRITTEN_AT)} < {written_before}",
+        writer_properties=profile.writer_properties(open_dataset(overlay).schema.names),
+    )
+    return len(keys[list(key_columns)].drop_duplicates())
+
+
+def fold_corrections(table_path: str, commit_properties: Optional[CommitProperties] = None) -> int:
+    """
+    Merge pending corrections into the base table and clear them; returns the rows folded.
+
+    The delete that clears them runs on the overlay version the fold read and
+    only matches, key by key, the corrections that version held, so
+    corrections recorded while the merge ran stay for the next fold.
+    """
+    overlay = open_corrections(table_path)
+    if overlay is None:
+        return 0
+    latest = latest_corrections(overlay)
+    if not latest.num_rows:
+        return 0
+
+    key_columns = overlay_key_columns(overlay)
+    merge_changes(table_path, latest.drop_columns([WRITTEN_AT]).to_pandas(), key_columns,
+                  commit_properties=commit_properties)
+    overlay.delete(_written_predicate(latest, key_columns),
+                   writer_properties=profile_for(corrections_path(table_path)).writer_properties(latest.column_names))
+    return latest.num_rows
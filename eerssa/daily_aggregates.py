@@ -0,0 +1,179 @@
+"""
+Incrementally maintained table of daily work-order counts.
+
+The aggregate table lives next to the source table and records, in its commit
+metadata, the source version it reflects. A refresh only reads the data files
+added and removed since that version: counts from added files are summed in,
+counts from removed files are subtracted, and the difference is merged into
+the aggregate table in one commit.
+
+    python -m eerssa.daily_aggregates /path/to/deltalake_2025
+"""
+import sys
+from datetime import date
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from deltalake import CommitProperties, write_deltalake
+from deltalake.exceptions import DeltaError
+
+from eerssa.delta_log import changed_files, fragments_for_files, last_metadata_value
+from eerssa.normalize import normalize_work_orders
+from eerssa.parallel_reader import detect_storage_kind, read_dataset_parallel
+from eerssa.storage import open_dataset, open_table, storage_options
+from eerssa.write_profile import profile_for
+from eerssa.writes import sorted_for_write, write_options
+
+AGGREGATE_SUFFIX = "_agregados_diarios"
+CREW_COLUMN = "Grupo"
+GROUP_COLUMNS = ["Fecha", CREW_COLUMN, "Cuenta", "Actividad"]
+COUNT_COLUMN = "n_ordenes"
+SOURCE_VERSION_KEY = "source_version"
+MISSING_VALUE = "·"
+
+
+def aggregate_path(table_path: str) -> str:
+    """Location of the aggregate table for a source table"""
+    return table_path.rstrip("/") + AGGREGATE_SUFFIX
+
+
+def daily_counts(table: pa.Table) -> pa.Table:
+    """Count work orders per day, crew, account and activity"""
+    table = normalize_work_orders(table.select([name for name in GROUP_COLUMNS if name in table.column_names]))
+    columns = {}
+    for name in GROUP_COLUMNS:
+        if name == "Fecha":
+            columns[name] = table[name]
+        elif name in table.column_names:
+            columns[name] = pc.fill_null(pc.cast(table[name], pa.string()), MISSING_VALUE)
+        else:
+            columns[name] = pa.repeat(MISSING_VALUE, table.num_rows)
+    keyed = pa.table(columns).filter(pc.is_valid(columns["Fecha"]))
+    counts = keyed.group_by(GROUP_COLUMNS).aggregate([([], "count_all")])
+    return _keys_and_count(counts, GROUP_COLUMNS, "count_all")
+
+
+def _keys_and_count(grouped: pa.Table, keys: List[str], aggregate_name: str) -> pa.Table:
+    """Reorder a group_by result as key columns followed by the count column"""
+    columns = {name: grouped[name] for name in keys}
+    columns[COUNT_COLUMN] = grouped[aggregate_name]
+    return pa.table(columns)
+
+
+def sum_counts(parts: List[pa.Table]) -> pa.Table:
+    """Add up daily count tables computed over disjoint sets of rows"""
+    return _keys_and_count(
+        pa.concat_tables([part.cast(parts[0].schema) for part in parts])
+        .group_by(GROUP_COLUMNS)
+        .aggregate([(COUNT_COLUMN, "sum")]),
+        GROUP_COLUMNS,
+        f"{COUNT_COLUMN}_sum",
+    )
+
+
+def _read_counts(table_path: str, version: int, files) -> pa.Table:
+    """Daily counts for a subset of data files at a given version"""
+    dataset = open_dataset(open_table(table_path, version=version))
+    columns = [name for name in GROUP_COLUMNS if name in dataset.schema.names]
+    table = read_dataset_parallel(
+        dataset,
+        columns=columns,
+        storage_kind=detect_storage_kind(table_path),
+        fragments=fragments_for_files(dataset, files),
+    )
+    return daily_counts(table)
+
+
+def rebuild_daily_aggregates(table_path: str) -> int:
+    """Recompute the aggregate table from every file of the source table"""
+    dt = open_table(table_path)
+    version = dt.version()
+    counts = _read_counts(table_path, version, set(dt.files()))
+    path = aggregate_path(table_path)
+    profile = profile_for(path)
+    write_deltalake(
+        path,
+        sorted_for_write(counts, profile),
+        mode="overwrite",
+        schema_mode="overwrite",
+        configuration=profile.table_properties(counts.column_names),
+        commit_properties=CommitProperties(custom_metadata={SOURCE_VERSION_KEY: str(version)}),
+        storage_options=storage_options(path),
+        **write_options(profile, counts.schema),
+    )
+    return version
+
+
+def refresh_daily_aggregates(table_path: str) -> int:
+    """Bring the aggregate table up to the latest source version, returning that version"""
+    target_path = aggregate_path(table_path)
+    last_version = last_metadata_value(target_path, SOURCE_VERSION_KEY)
+    if last_version is None:
+        return rebuild_daily_aggregates(table_path)
+
+    last_version = int(last_version)
+    current_version = open_table(table_path).version()
+    if last_version == current_version:
+        return current_version
+
+    try:
+        added, removed = changed_files(table_path, last_version, current_version)
+        added_counts = _read_counts(table_path, current_version, added)
+        removed_counts = _read_counts(table_path, last_version, removed)
+    except (DeltaError, FileNotFoundError, OSError):
+        # The commits of last_version were cleaned up or its removed files
+        # vacuumed; the difference cannot be computed
+        return rebuild_daily_aggregates(table_path)
+
+    removed_counts = removed_counts.set_column(
+        removed_counts.schema.get_field_index(COUNT_COLUMN), COUNT_COLUMN, pc.negate(removed_counts[COUNT_COLUMN])
+    )
+    delta = sum_counts([added_counts, removed_counts])
+    delta = delta.filter(pc.not_equal(delta[COUNT_COLUMN], 0))
+
+    commit_properties = CommitProperties(custom_metadata={SOURCE_VERSION_KEY: str(current_version)})
+    profile = profile_for(target_path)
+    if delta.num_rows == 0:
+        # Still record the new source version so the next refresh starts here
+        write_deltalake(target_path, delta, mode="append", commit_properties=commit_properties,
+                        storage_options=storage_options(target_path), **write_options(profile, delta.schema))
+        return current_version
+
+    predicate = " AND ".join(f"t.{name} = s.{name}" for name in GROUP_COLUMNS)
+    (
+        open_table(target_path)
+        .merge(delta, predicate=predicate, source_alias="s", target_alias="t",
+               writer_properties=profile.writer_properties(delta.column_names), commit_properties=commit_properties)
+        .when_matched_delete(predicate=f"t.{COUNT_COLUMN} + s.{COUNT_COLUMN} = 0")
+        .when_matched_update(updates={COUNT_COLUMN: f"t.{COUNT_COLUMN} + s.{COUNT_COLUMN}"})
+        .when_not_matched_insert_all()
+        .execute()
+    )
+    return current_version
+
+
+def known_values(table_path: str, column: str) -> List[str]:
+    """Distinct values of a grouping column over the whole source table, read from the aggregate table"""
+    if column not in GROUP_COLUMNS:
+        raise ValueError(f"{column} is not one of the aggregated columns {GROUP_COLUMNS}")
+    refresh_daily_aggregates(table_path)
+    values = open_dataset(open_table(aggregate_path(table_path))).to_table(columns=[column])[column]
+    return sorted(value for value in pc.unique(values).to_pylist() if value not in (None, MISSING_VALUE))
+
+
+def load_daily_aggregates(table_path: str, start_date: date, end_date: date,
+                          by: Optional[List[str]] = None) -> pa.Table:
+    """Summed order counts for a date range grouped by the requested columns"""
+    by = by or ["Fecha"]
+    dataset = open_dataset(open_table(aggregate_path(table_path)))
+    date_filter = (ds.field("Fecha") >= pa.scalar(start_date)) & (ds.field("Fecha") <= pa.scalar(end_date))
+    table = dataset.to_table(columns=list(set(by) | {COUNT_COLUMN}), filter=date_filter)
+    summary = _keys_and_count(table.group_by(by).aggregate([(COUNT_COLUMN, "sum")]), by, f"{COUNT_COLUMN}_sum")
+    return summary.sort_by([(name, "ascending") for name in by])
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        print(f"{path}: aggregates at version {refresh_daily_aggregates(path)}")
@@ -0,0 +1,38 @@
+from typing import List, Optional, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from deltalake import DeltaTable
+
+from eerssa.storage import open_table
+
+
+def changed_files(table_path: str, from_version: int, to_version: Optional[int] = None) -> Tuple[Set[str], Set[str]]:
+    """Return the data files added and removed between two table versions"""
+    before = set(open_table(table_path, version=from_version).files())
+    after_table = open_table(table_path) if to_version is None else open_table(table_path, version=to_version)
+    after = set(after_table.files())
+    return after - before, before - after
+
+
+def add_actions(dt: DeltaTable) -> pa.Table:
+    """Add actions of the loaded version with flattened per-file statistics"""
+    # deltalake 1.x hands these over through the Arrow C data interface
+    return pa.table(dt.get_add_actions(flatten=True))
+
+
+def fragments_for_files(dataset: ds.Dataset, files: Set[str]) -> List[ds.Fragment]:
+    """Select the fragments of a deltalake dataset that belong to the given files"""
+    return [fragment for fragment in dataset.get_fragments() if fragment.path in files]
+
+
+def last_metadata_value(table_path: str, key: str, limit: int = 50) -> Optional[str]:
+    """Most recent value of a custom commit metadata key, or None if the table or key is missing"""
+    try:
+        history = open_table(table_path).history(limit=limit)
+    except Exception:
+        return None
+    for commit in history:
+        if key in commit:
+            return str(commit[key])
+    return None
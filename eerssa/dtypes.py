@@ -0,0 +1,121 @@
+"""
+Compact pandas dtypes for large loads.
+
+Column types come from the Delta schema and are narrowed using the values
+actually present: integers to the smallest signed type that holds their range,
+float64 to float32 when the round trip is lossless, strings with few distinct
+values to categoricals, and the remaining strings to Arrow-backed strings.
+Columns the grid edits or free text stay strings: a categorical only accepts
+the categories it was loaded with. Key columns keep their integer type, since
+new rows take keys past the largest one loaded.
+"""
+from typing import Collection, Dict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# A string column becomes categorical when distinct values are at most this
+# share of its rows
+CATEGORY_MAX_RATIO = 0.5
+
+# Bytes CPython spends on a str object beyond its characters, used to
+# estimate what a plain object column would have cost
+PY_STR_OVERHEAD = 49
+
+INT_TYPES = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+
+
+def _smallest_int(column: pa.ChunkedArray) -> pa.DataType:
+    bounds = pc.min_max(column).as_py()
+    if bounds["min"] is None:
+        return pa.int8()
+    for int_type in INT_TYPES:
+        if bounds["min"] >= _int_min(int_type) and bounds["max"] <= _int_max(int_type):
+            return int_type
+    return pa.int64()
+
+
+def _int_min(int_type: pa.DataType) -> int:
+    return -(2 ** (int_type.bit_width - 1))
+
+
+def _int_max(int_type: pa.DataType) -> int:
+    return 2 ** (int_type.bit_width - 1) - 1
+
+
+def _float32_is_lossless(column: pa.ChunkedArray) -> bool:
+    round_trip = pc.cast(pc.cast(column, pa.float32(), safe=False), pa.float64())
+    same = pc.or_kleene(pc.equal(round_trip, column), pc.is_nan(column))
+    return pc.all(same).as_py() is not False
+
+
+def compact_schema(table: pa.Table, category_max_ratio: float = CATEGORY_MAX_RATIO,
+                   string_columns: Collection[str] = (), key_columns: Collection[str] = ()) -> pa.Table:
+    """
+    Narrow the column types of a table based on the values it holds.
+
+    string_columns are never categorical and key_columns are never narrowed.
+    """
+    for index, field in enumerate(table.schema):
+        column = table.column(index)
+        if field.name in key_columns:
+            continue
+        if pa.types.is_integer(field.type) and pa.types.is_signed_integer(field.type):
+            target = _smallest_int(column)
+            if target.bit_width < field.type.bit_width:
+                column = pc.cast(column, target)
+        elif pa.types.is_float64(field.type):
+            if _float32_is_lossless(column):
+                column = pc.cast(column, pa.float32(), safe=False)
+        elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            if field.name in string_columns:
+                continue
+            if table.num_rows and pc.count_distinct(column).as_py() <= table.num_rows * category_max_ratio:
+                column = pc.dictionary_encode(column)
+        else:
+            continue
+        table = table.set_column(index, field.name, column)
+    return table
+
+
+def to_compact_pandas(table: pa.Table, string_columns: Collection[str] = (),
+                      key_columns: Collection[str] = ()) -> pd.DataFrame:
+    """Convert to pandas keeping Arrow strings and narrowed nullable integers"""
+    string_dtype = pd.StringDtype("pyarrow")
+    types_mapper = {
+        pa.string(): string_dtype,
+        pa.large_string(): string_dtype,
+        # Plain numpy ints would turn into float64 as soon as a null appears
+        pa.int8(): pd.Int8Dtype(),
+        pa.int16(): pd.Int16Dtype(),
+        pa.int32(): pd.Int32Dtype(),
+    }.get
+    compact = compact_schema(table, string_columns=string_columns, key_columns=key_columns)
+    return compact.to_pandas(types_mapper=types_mapper)
+
+
+def estimated_plain_bytes(table: pa.Table) -> int:
+    """Estimate what table.to_pandas() would use, without materializing it"""
+    total = 0
+    for column in table.columns:
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            lengths = pc.sum(pc.binary_length(column)).as_py() or 0
+            total += lengths + (PY_STR_OVERHEAD + 8) * (len(column) - column.null_count) + 8 * column.null_count
+        elif pa.types.is_boolean(column.type):
+            total += len(column)
+        elif pa.types.is_integer(column.type) or pa.types.is_floating(column.type) or pa.types.is_temporal(column.type):
+            # pandas widens to 64-bit numbers or datetime64[ns]
+            total += 8 * len(column)
+        else:
+            total += column.nbytes + 8 * len(column)
+    return total
+
+
+def memory_report(table: pa.Table, df: pd.DataFrame) -> Dict[str, int]:
+    """Estimated plain-load memory next to the measured memory of the compact frame"""
+    return {
+        "rows": len(df),
+        "plain_bytes_estimated": estimated_plain_bytes(table),
+        "compact_bytes": int(df.memory_usage(deep=True).sum()),
+    }
@@ -0,0 +1,121 @@
+"""
+Undo/redo history for grid edits.
+
+Every edit is stored as a cell delta: row position, column position, old value
+and new value, in four growable numpy columns. The cells changed between two
+reruns form one step. Undo writes a step's old values back into the grid frame
+and redo writes its new values; both touch only the cells of that step, so
+they cost the same on a 100-row window as on a year. Memory grows with the
+number of edited cells, never with copies of the frame. Every delta that is
+recorded, undone or redone is also passed to the history's ChangeSet, which
+keeps the running summary of pending changes.
+"""
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from eerssa.change_set import ChangeSet
+
+INITIAL_CAPACITY = 256
+
+
+class EditHistory:
+    """Cell deltas of the edits made to one grid frame, grouped into undoable steps"""
+
+    def __init__(self, columns: Sequence[str], capacity: int = INITIAL_CAPACITY):
+        self.columns = list(columns)
+        self._rows = np.empty(capacity, dtype=np.int64)
+        self._cols = np.empty(capacity, dtype=np.int32)
+        self._old = np.empty(capacity, dtype=object)
+        self._new = np.empty(capacity, dtype=object)
+        # End offset of each step; steps before the cursor are applied, the rest can be redone
+        self._step_ends: List[int] = []
+        self._cursor = 0
+        self.changes = ChangeSet(self.columns)
+
+    @property
+    def can_undo(self) -> bool:
+        return self._cursor > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._cursor < len(self._step_ends)
+
+    def __len__(self) -> int:
+        """Cells changed by the applied steps"""
+        return self._end(self._cursor)
+
+    def _end(self, steps: int) -> int:
+        return self._step_ends[steps - 1] if steps else 0
+
+    def _reserve(self, size: int):
+        if size <= len(self._rows):
+            return
+        capacity = max(size, 2 * len(self._rows))
+        for name in ('_rows', '_cols', '_old', '_new'):
+            buffer = getattr(self, name)
+            grown = np.empty(capacity, dtype=buffer.dtype)
+            grown[:len(buffer)] = buffer
+            setattr(self, name, grown)
+
+    def record(self, before: pd.DataFrame, after: pd.DataFrame, mask: pd.DataFrame) -> int:
+        """Store the cells flagged in mask as one step, dropping anything that could be redone"""
+        rows, cols = np.nonzero(mask.to_numpy())
+        if not len(rows):
+            return 0
+        cols = before.columns.get_indexer(mask.columns)[cols]
+        del self._step_ends[self._cursor:]
+        start = self._end(self._cursor)
+        end = start + len(rows)
+        self._reserve(end)
+
+        self._rows[start:end] = rows
+        self._cols[start:end] = cols
+        self._old[start:end] = [before.iat[r, c] for r, c in zip(rows, cols)]
+        self._new[start:end] = [after.iat[r, c] for r, c in zip(rows, cols)]
+        self._step_ends.append(end)
+        self._cursor += 1
+        for row, col, old, new in zip(rows, cols, self._old[start:end], self._new[start:end]):
+            self.changes.apply(row, col, old, new)
+        return len(rows)
+
+    def _write(self, grid_df: pd.DataFrame, start: int, end: int, current: np.ndarray, values: np.ndarray):
+        for position in range(start, end):
+            row, col = self._rows[position], self._cols[position]
+            grid_df.iat[row, col] = values[position]
+            self.changes.apply(row, col, current[position], values[position])
+
+    def undo(self, grid_df: pd.DataFrame) -> bool:
+        """Restore the old values of the last applied step in place"""
+        if not self.can_undo:
+            return False
+        self._cursor -= 1
+        self._write(grid_df, self._end(self._cursor), self._end(self._cursor + 1), self._new, self._old)
+        return True
+
+    def redo(self, grid_df: pd.DataFrame) -> bool:
+        """Reapply the new values of the next undone step in place"""
+        if not self.can_redo:
+            return False
+        start, end = self._end(self._cursor), self._end(self._cursor + 1)
+        self._write(grid_df, start, end, self._old, self._new)
+        self._cursor += 1
+        return True
+
+    def undo_all(self, grid_df: pd.DataFrame) -> int:
+        """Undo every applied step, keeping them all available to redo; returns the steps undone"""
+        steps = 0
+        while self.undo(grid_df):
+            steps += 1
+        return steps
+
+    def applied(self) -> pd.DataFrame:
+        """The applied cell deltas, oldest first, with column names"""
+        end = len(self)
+        return pd.DataFrame({
+            'row': self._rows[:end],
+            'column': np.array(self.columns, dtype=object)[self._cols[:end]],
+            'old': self._old[:end],
+            'new': self._new[:end],
+        })
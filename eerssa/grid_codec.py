@@ -0,0 +1,164 @@
+"""
+Typed round trip between Arrow/pandas and AgGrid.
+
+The grid receives numbers only where the data is numeric or temporal:
+timestamps and dates travel as epoch milliseconds, categoricals as their
+dictionary codes, and the grid formats them for display and parses edits back
+on the client. Decoding is plain integer arithmetic and dictionary lookups
+against the schema captured at encode time, so nothing is re-parsed from text
+on each rerun, and two encoded frames can be diffed column by column.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+MS_PER_DAY = 86_400_000
+
+# Display and edit timestamps as UTC wall time, which is what naive values hold
+TIMESTAMP_FORMATTER = """
+function(params) {
+    return params.value == null ? '' : new Date(params.value).toISOString().replace('T', ' ').slice(0, 19);
+}
+"""
+TIMESTAMP_PARSER = """
+function(params) {
+    var ms = Date.parse(String(params.newValue).trim().replace(' ', 'T') + 'Z');
+    return isNaN(ms) ? params.oldValue : ms;
+}
+"""
+DATE_FORMATTER = """
+function(params) {
+    return params.value == null ? '' : new Date(params.value).toISOString().slice(0, 10);
+}
+"""
+DATE_PARSER = """
+function(params) {
+    var ms = Date.parse(String(params.newValue).trim().slice(0, 10) + 'T00:00:00Z');
+    return isNaN(ms) ? params.oldValue : ms;
+}
+"""
+
+
+def _is_temporal(data_type: pa.DataType) -> bool:
+    return pa.types.is_timestamp(data_type) or pa.types.is_date(data_type)
+
+
+class GridCodec:
+    """Encodes frames for AgGrid and decodes grid data back into the captured schema"""
+
+    def __init__(self, schema: pa.Schema, dictionaries: Optional[Dict[str, pa.Array]] = None):
+        self.schema = schema
+        self.dictionaries = dictionaries or {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "GridCodec":
+        """Capture the schema and categorical dictionaries of a loaded frame"""
+        table = pa.Table.from_pandas(df, preserve_index=False).unify_dictionaries()
+        dictionaries = {}
+        for field in table.schema:
+            if pa.types.is_dictionary(field.type):
+                column = table[field.name]
+                dictionaries[field.name] = column.chunk(0).dictionary if column.num_chunks \
+                    else pa.array([], field.type.value_type)
+        return cls(table.schema, dictionaries)
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Frame for the grid: epoch ms for dates and timestamps, codes for categoricals"""
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        columns = {}
+        for field in self.schema:
+            column = table[field.name]
+            if pa.types.is_timestamp(field.type):
+                column = pc.cast(pc.cast(column, pa.timestamp('ms', field.type.tz), safe=False), pa.int64())
+            elif pa.types.is_date(field.type):
+                # date32 only casts to its int32 day count; widen before scaling to ms
+                days = pc.cast(pc.cast(column, pa.date32()), pa.int32())
+                column = pc.multiply(pc.cast(days, pa.int64()), MS_PER_DAY)
+            elif pa.types.is_dictionary(field.type):
+                column = pc.index_in(pc.cast(column, field.type.value_type), value_set=self.dictionaries[field.name])
+            columns[field.name] = column
+        encoded = pa.table(columns).to_pandas(types_mapper={
+            pa.int64(): pd.Int64Dtype(),
+            pa.int32(): pd.Int32Dtype(),
+        }.get)
+        encoded.index = df.index
+        return encoded
+
+    def decode(self, grid_df: pd.DataFrame) -> pa.Table:
+        """Grid data back to an Arrow table in the captured schema"""
+        columns = {}
+        for field in self.schema:
+            values = pa.array(grid_df[field.name], from_pandas=True)
+            if _is_temporal(field.type) or pa.types.is_dictionary(field.type):
+                # JSON numbers may come back as floats once a null is present
+                values = pc.cast(values, pa.int64(), safe=False) if not pa.types.is_null(values.type) \
+                    else pa.nulls(len(values), pa.int64())
+            if pa.types.is_timestamp(field.type):
+                values = pc.cast(pc.cast(values, pa.timestamp('ms', field.type.tz)), field.type)
+            elif pa.types.is_date(field.type):
+                values = pc.cast(pc.cast(pc.divide(values, MS_PER_DAY), pa.int32()), field.type)
+            elif pa.types.is_dictionary(field.type):
+                values = pa.DictionaryArray.from_arrays(pc.cast(values, field.type.index_type),
+                                                        self.dictionaries[field.name])
+            else:
+                values = pc.cast(values, field.type, safe=False)
+            columns[field.name] = values
+        return pa.table(columns, schema=self.schema)
+
+    def decode_frame(self, grid_df: pd.DataFrame) -> pd.DataFrame:
+        """Grid data back to a frame with the dtypes it was loaded with"""
+        decoded = self.decode(grid_df).to_pandas()
+        decoded.index = grid_df.index
+        return decoded
+
+    def column_defs(self) -> Dict[str, dict]:
+        """Per-column grid settings; JavaScript functions are returned as source strings"""
+        defs = {}
+        for field in self.schema:
+            if pa.types.is_timestamp(field.type):
+                defs[field.name] = {'valueFormatter': TIMESTAMP_FORMATTER, 'valueParser': TIMESTAMP_PARSER,
+                                    'type': []}
+            elif pa.types.is_date(field.type):
+                defs[field.name] = {'valueFormatter': DATE_FORMATTER, 'valueParser': DATE_PARSER, 'type': []}
+            elif pa.types.is_dictionary(field.type):
+                labels = self.dictionaries[field.name].to_pylist()
+                defs[field.name] = {
+                    'refData': {str(code): str(label) for code, label in enumerate(labels)},
+                    'cellEditor': 'agSelectCellEditor',
+                    'cellEditorParams': {'values': list(range(len(labels)))},
+                    'type': [],
+                }
+        return defs
+
+    def configure_grid(self, gb):
+        """Apply column_defs to a GridOptionsBuilder"""
+        from st_aggrid import JsCode
+
+        for name, settings in self.column_defs().items():
+            gb.configure_column(name, **{
+                key: JsCode(value) if key in ('valueFormatter', 'valueParser') else value
+                for key, value in settings.items()
+            })
+
+
+def changed_cells(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Mask of cells that differ between two encoded frames; missing on both sides counts as equal"""
+    columns = [col for col in after.columns if col in before.columns]
+    left, right = before[columns], after[columns].reindex(before.index)
+    differs = left.ne(right).fillna(True) & ~(left.isna() & right.isna())
+    return differs.astype(bool)
+
+
+def changes_table(before: pd.DataFrame, after: pd.DataFrame, mask: pd.DataFrame) -> pd.DataFrame:
+    """One row per changed cell with old and new values taken from decoded frames"""
+    rows, cols = np.nonzero(mask.to_numpy())
+    columns = mask.columns[cols]
+    return pd.DataFrame({
+        'Row': mask.index[rows],
+        'Column': columns,
+        'Old Value': [before.at[mask.index[r], c] for r, c in zip(rows, columns)],
+        'New Value': [after.at[mask.index[r], c] for r, c in zip(rows, columns)],
+    })
@@ -0,0 +1,281 @@
+"""
+Primary-key index over a Delta table.
+
+Maps every key to the data file holding it, so a save of edited or deleted
+rows can be narrowed to the key ranges the index found in each file and skip
+every other file. The index is built once from the key columns alone and then
+kept in step with the Delta log: a newer version only reads the keys of the
+files it added and drops the entries of the files it removed.
+"""
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from deltalake import CommitProperties
+
+from eerssa.delta_log import fragments_for_files
+from eerssa.parallel_reader import DEFAULT_WORKERS
+from eerssa.storage import open_dataset, open_table, table_id
+from eerssa.writes import apply_changes, merge_changes, quote, sql_literal
+
+DEFAULT_INDEX_DIR = os.path.expanduser(os.environ.get("EERSSA_INDEX_DIR", "~/.cache/eerssa/indices"))
+KEY_COLUMNS = ("id",)
+FILE_COLUMN = "_file"
+
+# Above this many keys the merge predicate uses key ranges instead of an IN list
+MAX_IN_LIST = 1000
+
+
+class KeyIndex:
+    """Hash index from primary key to data file for one table"""
+
+    def __init__(self, table_path: str, key_columns: Sequence[str] = KEY_COLUMNS,
+                 entries: Optional[pa.Table] = None, version: int = -1, files: Iterable[str] = ()):
+        self.table_path = table_path
+        self.key_columns = tuple(key_columns)
+        self.entries = entries
+        self.version = version
+        self.files = set(files)
+        self._lookup = None
+        # One index may be shared by several sessions (st.cache_resource)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, table_path: str, key_columns: Sequence[str] = KEY_COLUMNS,
+              max_workers: Optional[int] = None) -> "KeyIndex":
+        """Index the latest version of a table"""
+        index = cls(table_path, key_columns)
+        index.refresh(max_workers)
+        return index
+
+    def _read_keys(self, dataset, files: Set[str], max_workers: Optional[int]) -> List[pa.Table]:
+        def read(fragment):
+            keys = fragment.to_table(columns=list(self.key_columns))
+            file_ids = pa.DictionaryArray.from_arrays(
+                pa.array(np.zeros(keys.num_rows, dtype=np.int32)), pa.array([fragment.path])
+            )
+            return keys.append_column(FILE_COLUMN, file_ids)
+
+        with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_WORKERS) as executor:
+            return list(executor.map(read, fragments_for_files(dataset, files)))
+
+    def refresh(self, max_workers: Optional[int] = None) -> bool:
+        """Bring the index up to the latest table version; returns whether it changed"""
+        with self._lock:
+            return self._refresh(max_workers)
+
+    def _refresh(self, max_workers: Optional[int]) -> bool:
+        dt = open_table(self.table_path)
+        version = dt.version()
+        if version == self.version:
+            return False
+
+        files = set(dt.files())
+        added, removed = files - self.files, self.files - files
+        parts = []
+        if self.entries is not None:
+            kept = self.entries
+            if removed:
+                in_removed = pc.is_in(pc.cast(kept[FILE_COLUMN], pa.string()), value_set=pa.array(sorted(removed)))
+                kept = kept.filter(pc.invert(in_removed))
+            parts.append(kept)
+        if added:
+            parts.extend(self._read_keys(open_dataset(dt), added, max_workers))
+
+        if parts:
+            self.entries = pa.concat_tables(parts, promote_options="permissive").unify_dictionaries()
+        self.version = version
+        self.files = files
+        self._lookup = None
+        return True
+
+    def __len__(self) -> int:
+        return 0 if self.entries is None else self.entries.num_rows
+
+    def _key_lookup(self) -> pd.Index:
+        if self._lookup is None:
+            keys = [self.entries.column(name).to_pandas() for name in self.key_columns]
+            self._lookup = pd.Index(keys[0]) if len(keys) == 1 else pd.MultiIndex.from_arrays(keys)
+        return self._lookup
+
+    def locate(self, keys: pd.DataFrame) -> pa.Table:
+        """Key and file of each requested key; keys not in the table are left out"""
+        with self._lock:
+            return self._locate(keys)
+
+    def _locate(self, keys: pd.DataFrame) -> pa.Table:
+        if not len(self) or keys.empty:
+            return self.entries.slice(0, 0) if self.entries is not None else pa.table({})
+        lookup = self._key_lookup()
+        if len(self.key_columns) == 1:
+            probe = pd.Index(keys[self.key_columns[0]])
+        else:
+            probe = pd.MultiIndex.from_frame(keys[list(self.key_columns)])
+        if lookup.is_unique:
+            positions = lookup.get_indexer(probe)
+        else:
+            positions = lookup.get_indexer_non_unique(probe)[0]
+        return self.entries.take(pa.array(positions[positions >= 0]))
+
+    def files_for(self, keys: pd.DataFrame) -> Set[str]:
+        """Data files holding any of the keys"""
+        located = self.locate(keys)
+        if not located.num_rows:
+            return set()
+        return set(pc.unique(pc.cast(located[FILE_COLUMN], pa.string())).to_pylist())
+
+    def files_predicate(self, keys: pd.DataFrame, alias: str = "target") -> Optional[str]:
+        """
+        Filter on the target keys built from where the index found them, or None
+        when none of the keys is in the table.
+
+        Up to MAX_IN_LIST keys it lists the keys that exist; beyond that it is one
+        key range per data file holding them (overlapping ranges joined), so file
+        statistics skip every file in between instead of a single min..max span.
+        """
+        located = self.locate(keys)
+        if not located.num_rows:
+            return None
+        if len(self.key_columns) != 1:
+            return self.key_predicate(located.select(list(self.key_columns)).to_pandas(), alias)
+        name = self.key_columns[0]
+        column = f"{alias}.{quote(name)}"
+        values = pc.unique(located[name])
+        if len(values) <= MAX_IN_LIST:
+            return f"{column} IN ({', '.join(sql_literal(value) for value in values.to_pylist())})"
+        per_file = (located.select([name]).append_column(FILE_COLUMN, pc.cast(located[FILE_COLUMN], pa.string()))
+                    .group_by(FILE_COLUMN).aggregate([(name, "min"), (name, "max")]))
+        ranges = sorted(zip(per_file[f"{name}_min"].to_pylist(), per_file[f"{name}_max"].to_pylist()))
+        merged = [list(ranges[0])]
+        for low, high in ranges[1:]:
+            if low <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], high)
+            else:
+                merged.append([low, high])
+        return " OR ".join(f"({column} >= {sql_literal(low)} AND {column} <= {sql_literal(high)})"
+                           for low, high in merged)
+
+    def key_predicate(self, keys: pd.DataFrame, alias: str = "target") -> str:
+        """SQL filter on the target keys that lets file statistics skip untouched files"""
+        clauses = []
+        for name in self.key_columns:
+            values = keys[name].dropna().unique()
+            column = f"{alias}.{quote(name)}"
+            if len(values) <= MAX_IN_LIST:
+                clauses.append(f"{column} IN ({', '.join(sql_literal(value) for value in values)})")
+            else:
+                clauses.append(f"{column} >= {sql_literal(values.min())} AND "
+                               f"{column} <= {sql_literal(values.max())}")
+        return " AND ".join(clauses)
+
+    def save(self, index_dir: str = DEFAULT_INDEX_DIR) -> Path:
+        """Persist the index as an Arrow file next to the other local caches"""
+        path = index_path(self.table_path, self.key_columns, index_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entries = self.entries if self.entries is not None else pa.table({})
+        entries = entries.replace_schema_metadata({
+            "version": str(self.version),
+            "files": json.dumps(sorted(self.files)),
+        })
+        tmp_path = path.parent / f"{path.stem}.{uuid.uuid4().hex}.tmp"
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, entries.schema) as writer:
+                writer.write_table(entries)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, table_path: str, key_columns: Sequence[str] = KEY_COLUMNS,
+             index_dir: str = DEFAULT_INDEX_DIR) -> Optional["KeyIndex"]:
+        """Read a persisted index, or None when there is none"""
+        path = index_path(table_path, key_columns, index_dir)
+        try:
+            with pa.memory_map(str(path)) as source:
+                entries = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return None
+        metadata = entries.schema.metadata or {}
+        return cls(
+            table_path,
+            key_columns,
+            entries=entries.replace_schema_metadata(None) if entries.num_columns else None,
+            version=int(metadata.get(b"version", b"-1")),
+            files=json.loads(metadata.get(b"files", b"[]")),
+        )
+
+
+def index_path(table_path: str, key_columns: Sequence[str], index_dir: str = DEFAULT_INDEX_DIR) -> Path:
+    """Location of the persisted index for a table and key"""
+    name = table_id(table_path).replace("://", "_").strip("/").replace("/", "_")
+    return Path(index_dir) / f"{name}__{'_'.join(key_columns)}.arrow"
+
+
+def open_key_index(table_path: str, key_columns: Sequence[str] = KEY_COLUMNS,
+                   index_dir: str = DEFAULT_INDEX_DIR, max_workers: Optional[int] = None) -> KeyIndex:
+    """Load the persisted index for a table, catch it up with the log and save it again"""
+    index = KeyIndex.load(table_path, key_columns, index_dir) or KeyIndex(table_path, key_columns)
+    if index.refresh(max_workers):
+        index.save(index_dir)
+    return index
+
+
+def merge_rows(index: KeyIndex, rows: pd.DataFrame, commit_properties: Optional[CommitProperties] = None) -> dict:
+    """
+    Update the rows with the same keys, rewriting only the files that hold them.
+
+    The index is caught up with the log first and the join predicate is
+    narrowed with files_predicate, so the merge only considers files the index
+    located the keys in. Rows whose key is not in the table are not written.
+    The refresh, the merge and the refresh after it run under the index lock.
+    """
+    with index._lock:
+        index.refresh()
+        target_filter = index.files_predicate(rows)
+        if target_filter is None:
+            return {"num_target_rows_updated": 0}
+        metrics = merge_changes(
+            index.table_path,
+            rows,
+            index.key_columns,
+            target_filter=f"({target_filter})",
+            commit_properties=commit_properties,
+        )
+        index.refresh()
+    return metrics
+
+
+def save_rows(index: KeyIndex, updates: Optional[pd.DataFrame] = None, inserts: Optional[pd.DataFrame] = None,
+              deletes: Optional[pd.DataFrame] = None,
+              commit_properties: Optional[CommitProperties] = None) -> dict:
+    """
+    writes.apply_changes with its merge narrowed to the files holding the updated and deleted keys.
+
+    Like merge_rows, the index is caught up with the log first and again after
+    the save, under the index lock. Returns deltalake's metrics.
+    """
+    frames = [frame[list(index.key_columns)] for frame in (updates, deletes) if frame is not None and not frame.empty]
+    with index._lock:
+        index.refresh()
+        target_filter = None
+        if frames:
+            # No located key means the updates and deletes match nothing, so no file needs reading
+            target_filter = index.files_predicate(pd.concat(frames, ignore_index=True)) or "false"
+        metrics = apply_changes(
+            index.table_path,
+            index.key_columns,
+            updates=updates,
+            inserts=inserts,
+            deletes=deletes,
+            commit_properties=commit_properties,
+            target_filter=target_filter,
+        )
+        index.refresh()
+    return metrics
@@ -0,0 +1,38 @@
+"""
+Deferred imports for the app entry points.
+
+`pd = lazy_import("pandas")` binds a placeholder; the real import runs on the
+first attribute access, so heavy libraries and engines load when the code that
+needs them first runs instead of before the page renders. Importing goes
+through importlib.import_module, which holds the per-module import lock, so a
+first use from a background thread is safe.
+"""
+import importlib
+import sys
+import types
+
+# Modules the apps must not import before the first render
+HEAVY_MODULES = ["pandas", "pyarrow", "deltalake", "duckdb", "st_aggrid", "pyspark", "delta", "ibis"]
+
+
+class LazyModule(types.ModuleType):
+    """Placeholder that imports the named module on first attribute access"""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if is_loaded(self.__name__) else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """The module itself when already imported, otherwise a LazyModule for it"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def is_loaded(name: str) -> bool:
+    return name in sys.modules
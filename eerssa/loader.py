@@ -0,0 +1,152 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import List, Optional, Sequence
+
+import pyarrow as pa
+
+from eerssa.arrow_cache import ArrowWindowCache
+from eerssa.background import Progress
+from eerssa.corrections import CORRECTIONS_SUFFIX, apply_corrections, open_corrections, overlay_key_columns
+from eerssa.normalize import normalize_work_orders
+from eerssa.parallel_reader import date_range_filter, detect_storage_kind, fragment_size, read_dataset_parallel
+from eerssa.registry import TableConfig, cache_for
+from eerssa.storage import open_dataset, open_table
+from eerssa.text_index import open_text_index
+from eerssa.tracing import trace
+
+
+def window_key(date_column: Optional[str], start_date: Optional[date], end_date: Optional[date],
+               columns: Optional[List[str]], normalize: bool) -> str:
+    """Cache key describing a filtered load"""
+    return repr((date_column, str(start_date), str(end_date), sorted(columns) if columns else None, normalize))
+
+
+def load_date_range(
+    table_path: str,
+    date_column: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+    normalize: bool = True,
+    cache: Optional[ArrowWindowCache] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[Progress] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> pa.Table:
+    """Load a date window of a Delta table, served from the local cache when it is still valid"""
+    with trace("log_replay") as span:
+        dt = open_table(table_path)
+        dataset = open_dataset(dt)
+
+        filter_expr = None
+        if date_column and start_date and end_date and date_column in dataset.schema.names:
+            filter_expr = date_range_filter(dataset.schema, date_column, start_date, end_date)
+
+        fragments = list(dataset.get_fragments(filter=filter_expr))
+        files = [fragment.path for fragment in fragments]
+        span.files = len(files)
+        span.extra["version"] = dt.version()
+
+        # Pending corrections replace base rows, so they are part of what a cached window depends on
+        overlay = open_corrections(table_path)
+        if overlay is not None:
+            files += [f"{CORRECTIONS_SUFFIX}/{path}" for path in overlay.files()]
+    key = window_key(date_column, start_date, end_date, columns, normalize)
+
+    if cache is not None:
+        with trace("cache_lookup") as span:
+            table = cache.get(table_path, key, dt.version(), files)
+            span.extra["hit"] = table is not None
+            span.rows = table.num_rows if table is not None else None
+        if table is not None:
+            if progress is not None:
+                progress.stage = 'cached'
+                progress.rows = table.num_rows
+            return table
+
+    read_columns = columns
+    if overlay is not None and columns:
+        read_columns = columns + [name for name in overlay_key_columns(overlay) if name not in columns]
+    with trace("parquet_decode") as span:
+        table = read_dataset_parallel(
+            dataset,
+            filter=filter_expr,
+            columns=read_columns,
+            max_workers=max_workers,
+            storage_kind=detect_storage_kind(table_path),
+            fragments=fragments,
+            progress=progress,
+            cancel_event=cancel_event,
+        )
+        span.files = len(fragments)
+        span.rows = table.num_rows
+        span.bytes_read = sum(fragment_size(fragment) for fragment in fragments)
+    if overlay is not None:
+        with trace("apply_corrections") as span:
+            table = apply_corrections(table, overlay, filter_expr)
+            if columns:
+                table = table.select(columns)
+            span.rows = table.num_rows
+    if normalize:
+        if progress is not None:
+            progress.stage = 'normalizing'
+        with trace("normalize") as span:
+            table = normalize_work_orders(table)
+            span.rows = table.num_rows
+
+    if cache is not None:
+        with trace("cache_store"):
+            cache.put(table_path, key, dt.version(), files, table)
+    return table
+
+
+def load_search(
+    table_path: str,
+    query: str,
+    text_columns: Sequence[str],
+    date_column: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+    normalize: bool = True,
+) -> pa.Table:
+    """Rows whose text columns contain query, read through the text index instead of scanning a window"""
+    with trace("text_search") as span:
+        index = open_text_index(table_path, text_columns)
+        table = index.search(query, columns)
+        if date_column and start_date and end_date and date_column in table.column_names:
+            table = table.filter(date_range_filter(table.schema, date_column, start_date, end_date))
+        span.rows = table.num_rows
+        span.extra["version"] = index.version
+    if normalize:
+        with trace("normalize"):
+            table = normalize_work_orders(table)
+    return table
+
+
+def load_dataset_range(
+    tables: List[TableConfig],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+    normalize: bool = True,
+    max_workers: Optional[int] = None,
+) -> pa.Table:
+    """Load a date window across several tables (e.g. one per year) as a single table"""
+    selected = [table for table in tables if table.covers(start_date, end_date)]
+    if not selected:
+        raise ValueError(f"No table covers {start_date} to {end_date}")
+
+    def load_one(table: TableConfig) -> pa.Table:
+        return load_date_range(
+            table.path, table.date_column, start_date, end_date,
+            columns=columns, normalize=normalize, cache=cache_for(table.cache), max_workers=max_workers,
+        )
+
+    # Each table is scanned on its own thread; fragments inside a table are
+    # spread over the parallel reader's pool as usual
+    with ThreadPoolExecutor(max_workers=len(selected)) as pool:
+        parts = list(pool.map(load_one, selected))
+    # Yearly tables may have drifted apart slightly (new nullable columns)
+    return pa.concat_tables(parts, promote_options="permissive")
@@ -0,0 +1,101 @@
+"""
+Checkpoints and log cleanup for tables that get many small commits.
+
+Opening a table replays every JSON commit after the latest checkpoint, so a
+table saved thousands of times without one opens slower with every edit.
+maintain_log writes a checkpoint once `checkpoint_interval` commits have piled
+up since the last one (tables written by Spark or with a large
+delta.checkpointInterval do not get them from deltalake's commit hook).
+
+It also brings the table properties in line with the table's write profile
+(eerssa.write_profile): tables created before the profile, or by other
+writers, lack delta.targetFileSize and delta.dataSkippingStatsColumns, which
+merges, deletes and compaction read from the table. The properties are set in
+one metadata commit the first time and left alone afterwards.
+
+Removing commit files older than the table's log retention
+(delta.logRetentionDuration, 30 days by default) is opt-in: it shortens the
+audit history (eerssa.audit) and the versions incremental consumers such as
+eerssa.daily_aggregates diff against, which then have to rebuild.
+
+    python -m eerssa.log_maintenance /path/to/deltalake_2025 [--cleanup]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Optional
+
+from deltalake import DeltaTable
+
+from eerssa.storage import filesystem, open_table
+from eerssa.write_profile import profile_for
+
+CHECKPOINT_INTERVAL = int(os.environ.get("EERSSA_CHECKPOINT_INTERVAL", 100))
+LAST_CHECKPOINT_FILE = "_delta_log/_last_checkpoint"
+
+
+def last_checkpoint_version(table_path: str) -> Optional[int]:
+    """Version of the latest checkpoint according to _last_checkpoint, or None without one"""
+    table_fs, root = filesystem(table_path)
+    try:
+        with table_fs.open_input_stream(f"{root.rstrip('/')}/{LAST_CHECKPOINT_FILE}") as stream:
+            return int(json.loads(stream.read())["version"])
+    except (FileNotFoundError, OSError, ValueError, KeyError):
+        return None
+
+
+def commits_since_checkpoint(dt: DeltaTable, table_path: str) -> int:
+    """JSON commits a reader replays on top of the latest checkpoint"""
+    checkpoint = last_checkpoint_version(table_path)
+    return dt.version() + 1 if checkpoint is None else dt.version() - checkpoint
+
+
+def apply_table_properties(dt: DeltaTable, table_path: str) -> Dict[str, str]:
+    """Set the profile's table properties that the table lacks or holds at other values; returns those set"""
+    columns = [field.name for field in dt.schema().fields]
+    configuration = dt.metadata().configuration
+    changed = {key: value for key, value in profile_for(table_path).table_properties(columns).items()
+               if configuration.get(key) != value}
+    if changed:
+        dt.alter.set_table_properties(changed)
+    return changed
+
+
+def maintain_log(table_path: str, checkpoint_interval: int = CHECKPOINT_INTERVAL, cleanup: bool = False) -> dict:
+    """Apply profile properties, checkpoint when enough commits piled up, and with cleanup drop expired commits"""
+    # The version is all the decision needs; deltalake reads the add actions
+    # itself only when it writes a checkpoint
+    dt = open_table(table_path, without_files=True)
+    properties = apply_table_properties(dt, table_path)
+    pending = commits_since_checkpoint(dt, table_path)
+    checkpointed = pending >= checkpoint_interval
+    if checkpointed:
+        dt.create_checkpoint()
+    if cleanup:
+        # Only removes files older than delta.logRetentionDuration and never
+        # the ones the latest checkpoint still needs
+        dt.cleanup_metadata()
+    return {
+        "version": dt.version(),
+        "commits_since_checkpoint": 0 if checkpointed else pending,
+        "checkpointed": checkpointed,
+        "properties": properties,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint Delta tables that got many small commits "
+                                                 "and apply their write profile's table properties")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--checkpoint-interval", type=int, default=CHECKPOINT_INTERVAL)
+    parser.add_argument("--cleanup", action="store_true",
+                        help="also remove commit files older than delta.logRetentionDuration")
+    args = parser.parse_args()
+    for path in args.paths:
+        print(f"{path}: {maintain_log(path, args.checkpoint_interval, args.cleanup)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
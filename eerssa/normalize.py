@@ -0,0 +1,61 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Columns cleaned the same way marimo_first.py does it with pandas .apply()
+DATE_COLUMNS = ['Fecha']
+TIMESTAMP_COLUMNS = ['InicioEvento', 'FinEvento']
+CATEGORY_COLUMNS = ['Cuenta', 'Actividad']
+MISSING_ACTIVIDAD = '·'
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def borra_time_zone(values: pa.ChunkedArray) -> pa.ChunkedArray:
+    """
+    Versión vectorizada de borra_time_zone: reemplaza la 'T', se queda con el
+    primer y el último token (fecha y hora) y elimina el desfase horario.
+    Cadenas de menos de 4 caracteres se convierten en nulos.
+    """
+    too_short = pc.less(pc.utf8_length(values), 4)
+    cleaned = pc.replace_substring(values, 'T', ' ')
+    cleaned = pc.replace_substring_regex(cleaned, pattern=r'^\s*(\S+)(?:.*\s(\S+))?\s*$', replacement=r'\1 \2')
+    cleaned = pc.replace_substring_regex(cleaned, pattern=r'(Z|[+-]\d{2}:?\d{2})\s*$', replacement='')
+    cleaned = pc.utf8_trim_whitespace(cleaned)
+    return pc.if_else(too_short, pa.scalar(None, pa.string()), cleaned)
+
+
+def parse_timestamps(values: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Parse cleaned date strings, falling back to pandas only when Arrow's strptime cannot"""
+    parsed = pc.strptime(values, format=TIMESTAMP_FORMAT, unit='ns', error_is_null=True)
+    failed = pc.and_(pc.is_null(parsed), pc.is_valid(values))
+    if pc.any(failed).as_py():
+        # Fractional seconds or date-only values; pandas handles the mix
+        fallback = pd.to_datetime(values.to_pandas(), errors='coerce', format='mixed')
+        return pa.chunked_array([pa.array(fallback, type=pa.timestamp('ns'))])
+    return parsed
+
+
+def normalize_work_orders(table: pa.Table) -> pa.Table:
+    """Apply the marimo timestamp cleaning and categorical encoding to a work-order table"""
+    for name in DATE_COLUMNS + TIMESTAMP_COLUMNS:
+        if name not in table.column_names:
+            continue
+        column = table[name]
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            column = parse_timestamps(borra_time_zone(column))
+        if name in DATE_COLUMNS and not pa.types.is_date(column.type):
+            column = pc.cast(column, pa.date32(), safe=False)
+        table = table.set_column(table.schema.get_field_index(name), name, column)
+
+    for name in CATEGORY_COLUMNS:
+        if name not in table.column_names:
+            continue
+        column = table[name]
+        if pa.types.is_dictionary(column.type):
+            continue
+        if name == 'Actividad':
+            column = pc.fill_null(column, MISSING_ACTIVIDAD)
+        table = table.set_column(table.schema.get_field_index(name), name, pc.dictionary_encode(column))
+
+    return table
@@ -0,0 +1,123 @@
+import logging
+import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow as pa
+
+from eerssa.loader import load_dataset_range
+from eerssa.registry import TableConfig
+from eerssa.storage import open_table
+
+logger = logging.getLogger(__name__)
+
+# Preset tables kept in memory; the others are served from the Arrow window cache
+DEFAULT_MAX_BYTES = int(os.environ.get("EERSSA_PREFETCH_MAX_BYTES", 512 * 1024 ** 2))
+
+# Same labels and values as the "Quick Select" dropdown in marimo_date_picker.py
+PRESETS = {
+    "Last 7 Days": "last_7",
+    "Last 30 Days": "last_30",
+    "This Month": "this_month",
+    "Year to Date": "year_to_date",
+    "Custom": "custom",
+}
+
+
+def preset_range(preset: str, today: Optional[date] = None) -> Optional[Tuple[date, date]]:
+    """Inclusive date range for a preset value, or None for 'custom'"""
+    today = today or date.today()
+    if preset == "last_7":
+        return today - timedelta(days=6), today
+    if preset == "last_30":
+        return today - timedelta(days=29), today
+    if preset == "this_month":
+        return today.replace(day=1), today
+    if preset == "year_to_date":
+        return date(today.year, 1, 1), today
+    return None
+
+
+class PresetPrefetcher:
+    """
+    Keeps the preset windows loaded in the background.
+
+    A daemon thread loads every preset when started and then polls the table
+    versions; whenever a commit lands (or the day rolls over) the presets are
+    reloaded through the Arrow window cache, so only windows whose files were
+    touched get decoded again. Presets that span a new year read from every
+    yearly table they overlap. load() answers from memory, lagging new commits
+    by at most one poll interval.
+
+    Presets are kept in memory in PRESETS order until max_bytes is used up; the
+    ones past the budget are still loaded, which keeps their cache entries
+    warm, but load() reads them back from the cache. A failed refresh is
+    logged and kept in last_error until the next one succeeds.
+    """
+
+    def __init__(self, tables: List[TableConfig], normalize: bool = True, poll_seconds: float = 60.0,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.tables = tables
+        self.normalize = normalize
+        self.poll_seconds = poll_seconds
+        self.max_bytes = max_bytes
+        self.last_error: Optional[BaseException] = None
+        self._warm: Dict[str, pa.Table] = {}
+        self._warm_key = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread, if it is not already running"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="preset-prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Ask the background thread to finish"""
+        self._stop.set()
+
+    def _load(self, preset: str, today: date) -> pa.Table:
+        start_date, end_date = preset_range(preset, today)
+        return load_dataset_range(self.tables, start_date, end_date, normalize=self.normalize)
+
+    def refresh(self):
+        """Reload every preset if the table version or the day changed"""
+        today = date.today()
+        warm_key = (tuple(open_table(table.path).version() for table in self.tables), today)
+        if warm_key == self._warm_key:
+            return
+        warm, used = {}, 0
+        for preset in PRESETS.values():
+            if preset == "custom":
+                continue
+            table = self._load(preset, today)
+            if used + table.nbytes <= self.max_bytes:
+                warm[preset] = table
+                used += table.nbytes
+        with self._lock:
+            self._warm = warm
+            self._warm_key = warm_key
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                # The table may be mid-commit or unreachable; try again next poll
+                logger.warning("Preset prefetch failed", exc_info=True)
+                self.last_error = e
+            self._stop.wait(self.poll_seconds)
+
+    def load(self, preset: str) -> pa.Table:
+        """Table for a preset, from memory when warm and through the cache otherwise"""
+        with self._lock:
+            table = self._warm.get(preset)
+            warm_day = self._warm_key[1] if self._warm_key else None
+        if table is not None and warm_day == date.today():
+            return table
+        return self._load(preset, date.today())
@@ -0,0 +1,130 @@
+"""
+Registry of the Delta tables the apps work with.
+
+Tables are described in tables.json at the repository root (or the file named
+by EERSSA_TABLES_CONFIG). Each entry gets the "defaults" block merged in, so a
+yearly table usually only needs its path and year. Datasets group several
+tables (e.g. one per year) that are queried as one logical table. Tables on
+an object store take their "storage_options" from the same file (see
+eerssa.storage), and every table can set how its files are written in a
+"write" block (see eerssa.write_profile).
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from eerssa.arrow_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ArrowWindowCache
+from eerssa.storage import register
+from eerssa.write_profile import DEFAULT_PROFILE, WriteProfile, parse_profile, register as register_profile
+
+CONFIG_PATH = os.environ.get("EERSSA_TABLES_CONFIG", str(Path(__file__).resolve().parents[1] / "tables.json"))
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    enabled: bool = True
+    max_bytes: int = DEFAULT_MAX_BYTES
+    cache_dir: str = DEFAULT_CACHE_DIR
+
+
+@dataclass(frozen=True)
+class TableConfig:
+    name: str
+    path: str
+    year: Optional[int] = None
+    region: Optional[str] = None
+    key_columns: Tuple[str, ...] = ("id",)
+    date_column: Optional[str] = "Fecha"
+    editable_columns: Tuple[str, ...] = ()
+    partition_by: Tuple[str, ...] = ()
+    # Columns covered by the text search index
+    text_columns: Tuple[str, ...] = ()
+    cache: CachePolicy = field(default_factory=CachePolicy)
+    # deltalake storage_options for object-store paths; values may use ${ENV_VARS}
+    storage_options: Dict[str, str] = field(default_factory=dict, hash=False, compare=False)
+    # File size, row groups, compression, encodings, statistics and sort order of every write
+    write: WriteProfile = DEFAULT_PROFILE
+
+    def covers(self, start_date: Optional[date], end_date: Optional[date]) -> bool:
+        """Whether the table can hold rows in the date range (tables without a year always can)"""
+        if self.year is None or start_date is None or end_date is None:
+            return True
+        return start_date.year <= self.year <= end_date.year
+
+    def is_editable(self, column: str) -> bool:
+        """Key columns are never editable; an empty editable list means every other column is"""
+        if column in self.key_columns:
+            return False
+        return not self.editable_columns or column in self.editable_columns
+
+
+@dataclass(frozen=True)
+class Registry:
+    tables: Dict[str, TableConfig]
+    datasets: Dict[str, Tuple[str, ...]]
+    default_table: str
+
+    def table(self, name: Optional[str] = None) -> TableConfig:
+        """Configuration of a table, the default one when no name is given"""
+        name = name or self.default_table
+        if name not in self.tables:
+            raise KeyError(f"Table '{name}' is not in the registry ({', '.join(self.tables)})")
+        return self.tables[name]
+
+    def dataset(self, name: str) -> List[TableConfig]:
+        """Tables making up a logical dataset"""
+        if name not in self.datasets:
+            raise KeyError(f"Dataset '{name}' is not in the registry ({', '.join(self.datasets)})")
+        return [self.tables[table_name] for table_name in self.datasets[name]]
+
+
+def _table_config(name: str, entry: dict, defaults: dict) -> TableConfig:
+    merged = {**defaults, **entry}
+    return TableConfig(
+        name=name,
+        path=os.path.expanduser(merged["path"]),
+        year=merged.get("year"),
+        region=merged.get("region"),
+        key_columns=tuple(merged.get("key_columns", ("id",))),
+        date_column=merged.get("date_column", "Fecha"),
+        editable_columns=tuple(merged.get("editable_columns", ())),
+        partition_by=tuple(merged.get("partition_by", ())),
+        text_columns=tuple(merged.get("text_columns", ())),
+        cache=CachePolicy(**{
+            key: os.path.expanduser(value) if key == "cache_dir" else value
+            for key, value in merged.get("cache", {}).items()
+        }),
+        storage_options=dict(merged.get("storage_options", {})),
+        write=parse_profile(merged.get("write", {})),
+    )
+
+
+@lru_cache(maxsize=None)
+def load_registry(path: str = CONFIG_PATH) -> Registry:
+    """Read and validate the tables config"""
+    with open(path) as config_file:
+        config = json.load(config_file)
+    defaults = config.get("defaults", {})
+    tables = {name: _table_config(name, entry, defaults) for name, entry in config["tables"].items()}
+    for table in tables.values():
+        register(table.path, table.storage_options)
+        register_profile(table.path, table.write)
+    datasets = {name: tuple(members) for name, members in config.get("datasets", {}).items()}
+    for name, members in datasets.items():
+        missing = [member for member in members if member not in tables]
+        if missing:
+            raise ValueError(f"Dataset '{name}' refers to unknown tables: {missing}")
+    default_table = config.get("default_table") or next(iter(tables))
+    return Registry(tables=tables, datasets=datasets, default_table=default_table)
+
+
+@lru_cache(maxsize=None)
+def cache_for(policy: CachePolicy) -> Optional[ArrowWindowCache]:
+    """Shared window cache for a cache policy, or None when caching is disabled"""
+    if not policy.enabled:
+        return None
+    return ArrowWindowCache(policy.cache_dir, policy.max_bytes)
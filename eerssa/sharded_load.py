@@ -0,0 +1,220 @@
+"""
+Year-scale loads on a process pool.
+
+The data files of one or more tables are split into shards of similar size.
+Each worker process reads its shard, applies the marimo timestamp cleaning
+(normalize_work_orders) and, optionally, an aggregation, all on Arrow, and
+writes the result as an Arrow IPC file in shared memory (/dev/shm where
+available). The parent memory-maps those files and merges them, so no
+DataFrame is pickled between processes and the normalized columns are not
+copied on the way back.
+
+Workers are started with "spawn": forking a process that already runs Arrow's
+thread pools can deadlock. Each worker gets an even share of the CPU pool so
+the processes do not oversubscribe the machine.
+
+    python -m eerssa.sharded_load /path/to/deltalake_2025 --aggregate daily_counts
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from eerssa.corrections import (
+    corrected_rows, drop_corrected, latest_corrections, open_corrections, overlay_key_columns,
+)
+from eerssa.daily_aggregates import GROUP_COLUMNS, daily_counts, sum_counts
+from eerssa.delta_log import add_actions, fragments_for_files
+from eerssa.normalize import normalize_work_orders
+from eerssa.parallel_reader import date_range_filter, detect_storage_kind, read_dataset_parallel
+from eerssa.registry import TableConfig
+from eerssa.storage import open_dataset, open_table, register, registered
+
+DEFAULT_PROCESSES = os.cpu_count() or 1
+SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+@dataclass(frozen=True)
+class Aggregation:
+    # Columns the aggregation reads; None reads every column
+    columns: Optional[Tuple[str, ...]]
+    # Applied to each normalized shard in its worker
+    partial: Callable[[pa.Table], pa.Table]
+    # Merges the partial results in the parent
+    combine: Callable[[List[pa.Table]], pa.Table]
+
+
+AGGREGATIONS: Dict[str, Aggregation] = {
+    "daily_counts": Aggregation(tuple(GROUP_COLUMNS), daily_counts, sum_counts),
+}
+
+
+@dataclass(frozen=True)
+class Shard:
+    table_path: str
+    version: int
+    files: Tuple[str, ...]
+    size_bytes: int
+
+
+def plan_shards(table_path: str, filter: Optional[ds.Expression], shards: int) -> List[Shard]:
+    """Files of the latest version the filter may match, dealt largest first into shards of similar size"""
+    dt = open_table(table_path)
+    dataset = open_dataset(dt)
+    files = {fragment.path for fragment in dataset.get_fragments(filter=filter)}
+    actions = add_actions(dt)
+    sizes = dict(zip(actions["path"].to_pylist(), actions["size_bytes"].to_pylist())) if actions.num_rows else {}
+
+    bins: List[Tuple[int, List[str]]] = [(0, []) for _ in range(max(1, min(shards, len(files))))]
+    for path in sorted(files, key=lambda path: sizes.get(path, 0), reverse=True):
+        smallest = min(range(len(bins)), key=lambda i: bins[i][0])
+        total, members = bins[smallest]
+        bins[smallest] = (total + sizes.get(path, 0), members + [path])
+    return [Shard(table_path, dt.version(), tuple(members), total) for total, members in bins if members]
+
+
+def _init_worker(cpu_count: int, storage_config: dict):
+    pa.set_cpu_count(cpu_count)
+    # Spawned workers start without the parent's registry
+    for path, options in storage_config.items():
+        register(path, options)
+
+
+def _finish(table: pa.Table, columns: Optional[List[str]], aggregate: Optional[str]) -> pa.Table:
+    table = normalize_work_orders(table)
+    if aggregate is not None:
+        return AGGREGATIONS[aggregate].partial(table)
+    return table.select(columns) if columns else table
+
+
+def _process_shard(shard: Shard, filter: Optional[ds.Expression], read_columns: Optional[List[str]],
+                   columns: Optional[List[str]], aggregate: Optional[str], corrections: Optional[pa.Table],
+                   key_columns: Sequence[str], out_dir: str) -> str:
+    """Worker: read, normalize and aggregate one shard, returning the path of its Arrow IPC result"""
+    dataset = open_dataset(open_table(shard.table_path, version=shard.version))
+    table = read_dataset_parallel(
+        dataset,
+        filter=filter,
+        columns=read_columns,
+        max_workers=1,
+        storage_kind=detect_storage_kind(shard.table_path),
+        fragments=fragments_for_files(dataset, set(shard.files)),
+    )
+    if corrections is not None:
+        table = drop_corrected(table, corrections, key_columns)
+    table = _finish(table, columns, aggregate)
+
+    path = os.path.join(out_dir, f"{uuid.uuid4().hex}.arrow")
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def _read_result(path: str) -> pa.Table:
+    # The mapping outlives the unlinked file, so the table stays readable
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    os.unlink(path)
+    return table
+
+
+def _merge(parts: List[pa.Table], aggregate: Optional[str]) -> pa.Table:
+    if aggregate is not None:
+        return AGGREGATIONS[aggregate].combine(parts)
+    # Each shard encoded its categoricals with its own dictionary
+    return pa.concat_tables(parts, promote_options="permissive").unify_dictionaries()
+
+
+def load_sharded(
+    tables: Sequence[TableConfig],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+    aggregate: Optional[str] = None,
+    processes: Optional[int] = None,
+) -> pa.Table:
+    """
+    Normalized rows, or the named aggregation of them, for a date range across tables.
+
+    Pending corrections are applied the same way eerssa.loader applies them:
+    corrected keys are dropped in the workers and their latest versions are
+    processed in the parent.
+    """
+    processes = processes or DEFAULT_PROCESSES
+    selected = [table for table in tables if table.covers(start_date, end_date)]
+    if not selected:
+        raise ValueError(f"No table covers {start_date} to {end_date}")
+    if aggregate is not None and aggregate not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation {aggregate!r}; expected one of {sorted(AGGREGATIONS)}")
+    wanted = list(AGGREGATIONS[aggregate].columns) if aggregate is not None else columns
+
+    jobs, local_parts, empty = [], [], None
+    for table in selected:
+        schema = open_dataset(open_table(table.path)).schema
+        filter = None
+        if table.date_column and start_date and end_date and table.date_column in schema.names:
+            filter = date_range_filter(schema, table.date_column, start_date, end_date)
+        read_columns = [name for name in wanted if name in schema.names] if wanted else None
+        if empty is None:
+            empty = schema.empty_table().select(read_columns) if read_columns else schema.empty_table()
+
+        overlay = open_corrections(table.path)
+        latest, key_columns = None, table.key_columns
+        if overlay is not None:
+            latest, key_columns = latest_corrections(overlay), overlay_key_columns(overlay)
+            if read_columns:
+                read_columns += [name for name in key_columns if name not in read_columns]
+            read_schema = pa.schema([schema.field(name) for name in read_columns]) if read_columns else schema
+            local_parts.append(corrected_rows(latest, read_schema, filter))
+        for shard in plan_shards(table.path, filter, processes):
+            jobs.append((shard, filter, read_columns, latest, key_columns))
+
+    out_dir = tempfile.mkdtemp(prefix="eerssa_shards_", dir=SHARED_MEMORY_DIR)
+    context = multiprocessing.get_context("spawn")
+    workers = max(1, min(processes, len(jobs)))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(max(1, (os.cpu_count() or 1) // workers), registered())) as pool:
+            futures = [
+                pool.submit(_process_shard, shard, filter, read_columns, columns, aggregate, latest, key_columns,
+                            out_dir)
+                for shard, filter, read_columns, latest, key_columns in jobs
+            ]
+            parts = [_read_result(future.result()) for future in futures]
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    parts += [_finish(part, columns, aggregate) for part in local_parts if part.num_rows]
+    if not parts:
+        parts = [_finish(empty, columns, aggregate)]
+    return _merge(parts, aggregate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and normalize whole tables on a process pool")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--aggregate", choices=sorted(AGGREGATIONS))
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES)
+    args = parser.parse_args()
+
+    tables = [TableConfig(name=os.path.basename(path.rstrip("/")), path=path) for path in args.paths]
+    started = time.perf_counter()
+    result = load_sharded(tables, aggregate=args.aggregate, processes=args.processes)
+    print(f"{result.num_rows:,} rows in {time.perf_counter() - started:.2f}s with {args.processes} processes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Where tables live and how to reach them.
+
+Tables can be local paths or object-store URIs (s3://, s3a://, gs://, az://,
+abfss://). storage_options come from EERSSA_STORAGE_OPTIONS (a JSON object
+applied to every remote table) and from the "storage_options" of the table in
+tables.json, matched by path prefix so a table's corrections overlay and
+aggregate table get the same ones. Values may reference environment variables
+("${MINIO_SECRET}") to keep secrets out of the config.
+
+Every module opens tables and datasets through this one: open_table passes the
+options to deltalake, and open_dataset reads S3 tables through one shared
+pyarrow S3FileSystem per endpoint and credentials, so all reads reuse the same
+pooled HTTP connections. Data files are never modified in place, so their
+fragments are cached per process together with their Parquet footers: a file's
+footer is fetched once, and sizes from the Delta log spare a HEAD request per
+file.
+
+For a local MinIO stand-in:
+
+    export EERSSA_STORAGE_OPTIONS='{"AWS_ENDPOINT_URL": "http://localhost:9000",
+        "AWS_ACCESS_KEY_ID": "minioadmin", "AWS_SECRET_ACCESS_KEY": "minioadmin",
+        "AWS_REGION": "us-east-1", "AWS_ALLOW_HTTP": "true", "conditional_put": "etag"}'
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from eerssa.lazy import lazy_import
+
+# Imported on first use so the registry, which registers storage options,
+# stays cheap to import
+pa = lazy_import("pyarrow")
+ds = lazy_import("pyarrow.dataset")
+pafs = lazy_import("pyarrow.fs")
+deltalake = lazy_import("deltalake")
+
+REMOTE_SCHEMES = {"s3", "s3a", "gs", "gcs", "az", "abfs", "abfss"}
+S3_SCHEMES = {"s3", "s3a"}
+# Fragments (and the footers they hold once read) kept per process
+MAX_CACHED_FRAGMENTS = int(os.environ.get("EERSSA_FOOTER_CACHE_FILES", 20_000))
+# Seconds; remote calls fail instead of hanging a background task
+CONNECT_TIMEOUT = 10
+REQUEST_TIMEOUT = 60
+
+_registered: Dict[str, Dict[str, str]] = {}
+
+
+def is_remote(path: str) -> bool:
+    return urlparse(path).scheme.lower() in REMOTE_SCHEMES
+
+
+def table_id(path: str) -> str:
+    """Stable identity of a table location, used to name local caches"""
+    return path.rstrip("/") if is_remote(path) else os.path.abspath(path)
+
+
+def register(path: str, options: Dict[str, str]):
+    """Storage options for a table and every path below or next to it (overlay, aggregates)"""
+    if options:
+        _registered[path.rstrip("/")] = {key: os.path.expandvars(str(value)) for key, value in options.items()}
+
+
+def registered() -> Dict[str, Dict[str, str]]:
+    """Registered options, to hand over to worker processes"""
+    return dict(_registered)
+
+
+@lru_cache(maxsize=1)
+def _environment_options() -> Dict[str, str]:
+    options = json.loads(os.environ.get("EERSSA_STORAGE_OPTIONS") or "{}")
+    return {key: os.path.expandvars(str(value)) for key, value in options.items()}
+
+
+def storage_options(path: str) -> Optional[Dict[str, str]]:
+    """Options deltalake needs to reach path, or None for local tables"""
+    if not is_remote(path):
+        return None
+    options = dict(_environment_options())
+    matches = [prefix for prefix in _registered if path.startswith(prefix)]
+    if matches:
+        options.update(_registered[max(matches, key=len)])
+    return options
+
+
+def open_table(path: str, version: Optional[int] = None, without_files: bool = False) -> deltalake.DeltaTable:
+    return deltalake.DeltaTable(path, version=version, storage_options=storage_options(path), without_files=without_files)
+
+
+def is_table(path: str) -> bool:
+    return deltalake.DeltaTable.is_deltatable(path, storage_options=storage_options(path))
+
+
+def _option(options: Dict[str, str], *names: str) -> Optional[str]:
+    lowered = {key.lower(): value for key, value in options.items()}
+    for name in names:
+        if name in lowered:
+            return lowered[name]
+    return None
+
+
+@lru_cache(maxsize=None)
+def _s3_filesystem(options: Tuple[Tuple[str, str], ...]) -> pafs.S3FileSystem:
+    """One S3 client (and connection pool) per endpoint and credentials"""
+    options = dict(options)
+    kwargs = {
+        "access_key": _option(options, "aws_access_key_id", "access_key_id"),
+        "secret_key": _option(options, "aws_secret_access_key", "secret_access_key"),
+        "session_token": _option(options, "aws_session_token", "session_token"),
+        "region": _option(options, "aws_region", "region"),
+        "connect_timeout": CONNECT_TIMEOUT,
+        "request_timeout": REQUEST_TIMEOUT,
+    }
+    endpoint = _option(options, "aws_endpoint_url", "aws_endpoint", "endpoint_url", "endpoint")
+    if endpoint:
+        parsed = urlparse(endpoint if "://" in endpoint else f"https://{endpoint}")
+        kwargs["endpoint_override"] = parsed.netloc
+        kwargs["scheme"] = parsed.scheme
+        # MinIO and most S3 stand-ins only serve path-style URLs
+        kwargs["force_virtual_addressing"] = False
+    return pafs.S3FileSystem(**{key: value for key, value in kwargs.items() if value is not None})
+
+
+def filesystem(path: str) -> Tuple[pafs.FileSystem, str]:
+    """Filesystem and root path for a table location; S3 goes through the shared client"""
+    if urlparse(path).scheme.lower() in S3_SCHEMES:
+        parsed = urlparse(path)
+        options = storage_options(path) or {}
+        return _s3_filesystem(tuple(sorted(options.items()))), f"{parsed.netloc}{parsed.path}".rstrip("/")
+    return pafs.FileSystem.from_uri(path if "://" in path else os.path.abspath(path))
+
+
+class FragmentCache:
+    """Parquet fragments of immutable data files; each keeps its footer once it has been read"""
+
+    def __init__(self, max_files: int = MAX_CACHED_FRAGMENTS):
+        self.max_files = max_files
+        self._fragments: OrderedDict[Tuple[str, str], ds.ParquetFileFragment] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fragment(self, table_uri: str, fragment: ds.ParquetFileFragment, file_format: ds.ParquetFileFormat,
+                 file_size: Optional[int]) -> ds.ParquetFileFragment:
+        key = (table_uri, fragment.path)
+        with self._lock:
+            cached = self._fragments.get(key)
+            if cached is not None:
+                self._fragments.move_to_end(key)
+                return cached
+        cached = file_format.make_fragment(
+            fragment.path, fragment.filesystem, partition_expression=fragment.partition_expression, file_size=file_size
+        )
+        with self._lock:
+            self._fragments[key] = cached
+            while len(self._fragments) > self.max_files:
+                self._fragments.popitem(last=False)
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+
+FRAGMENTS = FragmentCache()
+
+
+def open_dataset(dt: deltalake.DeltaTable) -> ds.Dataset:
+    """Arrow dataset of the loaded table version, read through the shared client when it is on S3"""
+    uri = dt.table_uri
+    if urlparse(uri).scheme.lower() not in S3_SCHEMES:
+        return dt.to_pyarrow_dataset()
+    shared, root = filesystem(uri)
+    dataset = dt.to_pyarrow_dataset(filesystem=pafs.SubTreeFileSystem(root, shared))
+    actions = pa.table(dt.get_add_actions(flatten=True))
+    sizes = dict(zip(actions["path"].to_pylist(), actions["size_bytes"].to_pylist()))
+    fragments = [FRAGMENTS.fragment(uri, fragment, dataset.format, sizes.get(fragment.path))
+                 for fragment in dataset.get_fragments()]
+    return ds.FileSystemDataset(fragments, dataset.schema, dataset.format, dataset.filesystem)
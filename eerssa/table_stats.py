@@ -0,0 +1,121 @@
+"""
+Table statistics read from the Delta log only.
+
+Every add action carries the file size and, when the writer collected them,
+numRecords plus per-column minValues/maxValues/nullCount. Summing and folding
+those over the live files gives row counts, column ranges and null counts
+without opening a data file; deltalake's log replay starts from the latest
+checkpoint, so the cost grows with the log, not the data. Results are cached
+per (table, version): a version never changes once committed.
+
+Files written without statistics make the affected numbers lower bounds, which
+is reported through `complete`. Columns the table does not collect statistics
+for (outside delta.dataSkippingStatsColumns, or past
+delta.dataSkippingNumIndexedCols) are reported as not collected instead.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Set
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from eerssa.delta_log import add_actions
+from eerssa.storage import open_dataset, open_table
+
+# Delta's default for delta.dataSkippingNumIndexedCols
+DEFAULT_INDEXED_COLUMNS = 32
+
+
+@dataclass(frozen=True)
+class ColumnStats:
+    name: str
+    data_type: str
+    min: Any = None
+    max: Any = None
+    null_count: Optional[int] = None
+    # False when some file has no statistics for this column
+    complete: bool = True
+    # False when the table does not collect statistics for this column at all
+    collected: bool = True
+
+
+@dataclass(frozen=True)
+class TableStats:
+    version: int
+    files: int
+    size_bytes: int
+    row_count: int
+    # False when some file has no numRecords, so row_count is a lower bound
+    complete: bool
+    columns: Dict[str, ColumnStats]
+
+    def as_rows(self) -> list:
+        """One dict per column for display; bounds are shown as text since their types differ"""
+        return [
+            {'Column': stats.name, 'Type': stats.data_type, 'Min': _text(stats.min), 'Max': _text(stats.max),
+             'Nulls': stats.null_count, 'Complete': stats.complete, 'Collected': stats.collected}
+            for stats in self.columns.values()
+        ]
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _sum(column: pa.ChunkedArray) -> int:
+    total = pc.sum(column).as_py()
+    return int(total) if total is not None else 0
+
+
+def collected_columns(configuration: Dict[str, str], schema: pa.Schema) -> Set[str]:
+    """Columns whose statistics writers record in the log, per the table configuration"""
+    names = configuration.get("delta.dataSkippingStatsColumns")
+    if names:
+        return {name.strip().strip("`") for name in names.split(",")}
+    indexed = int(configuration.get("delta.dataSkippingNumIndexedCols", DEFAULT_INDEXED_COLUMNS))
+    return set(schema.names if indexed < 0 else schema.names[:indexed])
+
+
+def _column_stats(actions: pa.Table, field: pa.Field, collected: bool = True) -> ColumnStats:
+    if not collected:
+        return ColumnStats(field.name, str(field.type), collected=False)
+    names = actions.column_names
+    min_name, max_name, nulls_name = f"min.{field.name}", f"max.{field.name}", f"null_count.{field.name}"
+    if not actions.num_rows:
+        return ColumnStats(field.name, str(field.type), null_count=0)
+
+    complete = all(name in names and actions[name].null_count == 0 for name in (min_name, max_name, nulls_name))
+    return ColumnStats(
+        field.name,
+        str(field.type),
+        min=pc.min(actions[min_name]).as_py() if min_name in names else None,
+        max=pc.max(actions[max_name]).as_py() if max_name in names else None,
+        null_count=_sum(actions[nulls_name]) if nulls_name in names else None,
+        complete=complete,
+    )
+
+
+@lru_cache(maxsize=64)
+def _stats_at_version(table_path: str, version: int) -> TableStats:
+    dt = open_table(table_path, version=version)
+    actions = add_actions(dt)
+    schema = open_dataset(dt).schema
+    collected = collected_columns(dt.metadata().configuration, schema)
+    num_records = actions['num_records'] if actions.num_rows else pa.chunked_array([], pa.int64())
+    return TableStats(
+        version=version,
+        files=actions.num_rows,
+        size_bytes=_sum(actions['size_bytes']) if actions.num_rows else 0,
+        row_count=_sum(num_records),
+        complete=num_records.null_count == 0,
+        columns={field.name: _column_stats(actions, field, field.name in collected) for field in schema},
+    )
+
+
+def table_stats(table_path: str, version: Optional[int] = None) -> TableStats:
+    """Statistics of a table version (the latest by default) from the add actions in its log"""
+    if version is None:
+        # Only the log is replayed here; the file list is built once per version below
+        version = open_table(table_path, without_files=True).version()
+    return _stats_at_version(table_path, version)
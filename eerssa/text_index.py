@@ -0,0 +1,253 @@
+"""
+Trigram index for substring search over the text columns of a Delta table.
+
+Each row's text columns are lower-cased, stripped of Spanish accents, joined
+and cut to MAX_TEXT_CHARS; every 3-character gram of that text becomes a
+posting (gram, data file, row number). Grams are packed into int64 code point
+triples and the postings are kept sorted by gram, so a query looks up each of
+its grams with a binary search, intersects the posting lists starting with the
+rarest, and reads only the candidate rows, which are then checked for the full
+substring. Like the key index, it follows the Delta log: a refresh indexes the
+files a commit added and drops the postings of the files it removed.
+"""
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from eerssa.corrections import (
+    corrected_rows, drop_corrected, latest_corrections, open_corrections, overlay_key_columns,
+)
+from eerssa.delta_log import fragments_for_files
+from eerssa.parallel_reader import DEFAULT_WORKERS
+from eerssa.storage import open_dataset, open_table, table_id
+
+DEFAULT_INDEX_DIR = os.path.expanduser(os.environ.get("EERSSA_TEXT_INDEX_DIR", "~/.cache/eerssa/text_indices"))
+TEXT_COLUMNS = ("Descripcion", "Direccion")
+GRAM_COLUMN = "gram"
+FILE_COLUMN = "_file"
+ROW_COLUMN = "_row"
+
+GRAM = 3
+# Only the start of long texts is indexed and searched
+MAX_TEXT_CHARS = 200
+# Bounds the UTF-32 buffer of a batch (rows x MAX_TEXT_CHARS x 4 bytes, twice)
+BATCH_ROWS = 16_384
+# Joins the text columns; never part of a query, so no match spans two columns
+SEPARATOR = "\x1f"
+ACCENTS = [("[áàâä]", "a"), ("[éèêë]", "e"), ("[íìîï]", "i"), ("[óòôö]", "o"), ("[úùûü]", "u"), ("ñ", "n")]
+
+
+def normalize_text(values: pa.Array) -> pa.Array:
+    """Lower case without accents, the form both the index and queries use"""
+    values = pc.utf8_lower(values)
+    for pattern, replacement in ACCENTS:
+        values = pc.replace_substring_regex(values, pattern=pattern, replacement=replacement)
+    return values
+
+
+def document_text(table: pa.Table, text_columns: Sequence[str]) -> pa.ChunkedArray:
+    """Normalized, joined and truncated text of each row"""
+    parts = [pc.fill_null(pc.cast(table[name], pa.string()), "") for name in text_columns if name in table.column_names]
+    if not parts:
+        return pa.chunked_array([pa.array([""] * table.num_rows)])
+    joined = pc.binary_join_element_wise(*parts, SEPARATOR) if len(parts) > 1 else parts[0]
+    return normalize_text(pc.utf8_slice_codeunits(joined, 0, MAX_TEXT_CHARS))
+
+
+def gram_codes(texts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(row, gram) pairs of an array of strings, one per distinct gram of each row"""
+    width = max((len(text) for text in texts), default=0)
+    if width < GRAM:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # Fixed-width UTF-32 view: one code point per cell, zero padded on the right
+    chars = np.array(texts, dtype=f"U{width}").view(np.uint32).reshape(len(texts), width).astype(np.int64)
+    grams = (chars[:, :-2] << 42) | (chars[:, 1:-1] << 21) | chars[:, 2:]
+    valid = chars[:, 2:] != 0
+    rows = np.broadcast_to(np.arange(len(texts), dtype=np.int64)[:, None], grams.shape)[valid]
+    pairs = pd.DataFrame({"row": rows, "gram": grams[valid]}).drop_duplicates()
+    return pairs["row"].to_numpy(), pairs["gram"].to_numpy()
+
+
+def query_grams(query: str) -> np.ndarray:
+    text = normalize_text(pa.array([query]))[0].as_py()
+    return np.unique(gram_codes(np.array([text], dtype=object))[1])
+
+
+class TextIndex:
+    """Sorted trigram postings pointing at (data file, row number) for one table"""
+
+    def __init__(self, table_path: str, text_columns: Sequence[str] = TEXT_COLUMNS,
+                 entries: Optional[pa.Table] = None, version: int = -1, files=()):
+        self.table_path = table_path
+        self.text_columns = tuple(text_columns)
+        self.entries = entries
+        self.version = version
+        self.files = set(files)
+        self._postings = None
+
+    def _read_postings(self, dataset, files: Set[str], max_workers: Optional[int]) -> List[pa.Table]:
+        columns = [name for name in self.text_columns if name in dataset.schema.names]
+
+        def read(fragment):
+            rows, grams, offset = [], [], 0
+            for batch in fragment.to_batches(columns=columns, batch_size=BATCH_ROWS):
+                texts = document_text(pa.Table.from_batches([batch]), columns).to_numpy(zero_copy_only=False)
+                batch_rows, batch_grams = gram_codes(texts)
+                rows.append(batch_rows + offset)
+                grams.append(batch_grams)
+                offset += batch.num_rows
+            rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+            file_ids = pa.DictionaryArray.from_arrays(pa.array(np.zeros(len(rows), dtype=np.int32)),
+                                                      pa.array([fragment.path]))
+            return pa.table({
+                GRAM_COLUMN: np.concatenate(grams) if grams else np.empty(0, dtype=np.int64),
+                FILE_COLUMN: file_ids,
+                ROW_COLUMN: rows,
+            })
+
+        with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_WORKERS) as executor:
+            return list(executor.map(read, fragments_for_files(dataset, files)))
+
+    def refresh(self, max_workers: Optional[int] = None) -> bool:
+        """Bring the index up to the latest table version; returns whether it changed"""
+        dt = open_table(self.table_path)
+        version = dt.version()
+        if version == self.version:
+            return False
+
+        files = set(dt.files())
+        added, removed = files - self.files, self.files - files
+        parts = []
+        if self.entries is not None:
+            kept = self.entries
+            if removed:
+                in_removed = pc.is_in(pc.cast(kept[FILE_COLUMN], pa.string()), value_set=pa.array(sorted(removed)))
+                kept = kept.filter(pc.invert(in_removed))
+            parts.append(kept)
+        if added:
+            parts.extend(self._read_postings(open_dataset(dt), added, max_workers))
+
+        if parts:
+            entries = pa.concat_tables(parts, promote_options="permissive").unify_dictionaries()
+            self.entries = entries.sort_by(GRAM_COLUMN).combine_chunks()
+        self.version = version
+        self.files = files
+        self._postings = None
+        return True
+
+    def __len__(self) -> int:
+        return 0 if self.entries is None else self.entries.num_rows
+
+    def _posting_arrays(self):
+        """Sorted grams, document ids (file code << 32 | row) and the file of each code"""
+        if self._postings is None:
+            files = self.entries[FILE_COLUMN].combine_chunks()
+            codes = files.indices.to_numpy(zero_copy_only=False).astype(np.int64)
+            self._postings = (
+                self.entries[GRAM_COLUMN].to_numpy(),
+                (codes << 32) | self.entries[ROW_COLUMN].to_numpy(),
+                files.dictionary.to_pylist(),
+            )
+        return self._postings
+
+    def candidates(self, query: str) -> List[Tuple[str, np.ndarray]]:
+        """(data file, row numbers) holding every gram of the query"""
+        grams = query_grams(query)
+        if not len(grams):
+            raise ValueError(f"Search text needs at least {GRAM} characters")
+        if not len(self):
+            return []
+        sorted_grams, documents, files = self._posting_arrays()
+        starts = np.searchsorted(sorted_grams, grams, side="left")
+        ends = np.searchsorted(sorted_grams, grams, side="right")
+        matches = None
+        # Rarest gram first keeps the intersections small
+        for position in np.argsort(ends - starts):
+            ids = np.sort(documents[starts[position]:ends[position]])
+            matches = ids if matches is None else np.intersect1d(matches, ids, assume_unique=True)
+            if not len(matches):
+                return []
+        codes, rows = matches >> 32, matches & 0xFFFFFFFF
+        return [(files[code], rows[codes == code]) for code in np.unique(codes)]
+
+    def search(self, query: str, columns: Optional[List[str]] = None) -> pa.Table:
+        """Rows whose text columns contain the query, reading only candidate rows; pending corrections apply"""
+        needle = normalize_text(pa.array([query]))[0].as_py()
+        dataset = open_dataset(open_table(self.table_path, version=self.version))
+        read_columns = None
+        overlay = open_corrections(self.table_path)
+        if columns:
+            extra = list(self.text_columns) + (list(overlay_key_columns(overlay)) if overlay is not None else [])
+            read_columns = columns + [name for name in extra if name not in columns and name in dataset.schema.names]
+
+        parts = []
+        candidates = dict(self.candidates(query))
+        for fragment in fragments_for_files(dataset, set(candidates)):
+            parts.append(fragment.take(pa.array(candidates[fragment.path]), columns=read_columns))
+        empty = dataset.schema.empty_table()
+        table = pa.concat_tables(parts) if parts else (empty.select(read_columns) if read_columns else empty)
+
+        if overlay is not None:
+            latest = latest_corrections(overlay)
+            table = drop_corrected(table, latest, overlay_key_columns(overlay))
+            table = pa.concat_tables([table, corrected_rows(latest, table.schema)], promote_options="permissive")
+        table = table.filter(pc.match_substring(document_text(table, self.text_columns), needle))
+        return table.select(columns) if columns else table
+
+    def save(self, index_dir: str = DEFAULT_INDEX_DIR) -> Path:
+        """Persist the index as an Arrow file next to the other local caches"""
+        path = index_path(self.table_path, self.text_columns, index_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entries = self.entries if self.entries is not None else pa.table({})
+        entries = entries.replace_schema_metadata({
+            "version": str(self.version),
+            "files": json.dumps(sorted(self.files)),
+        })
+        tmp_path = path.parent / f"{path.stem}.{uuid.uuid4().hex}.tmp"
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, entries.schema) as writer:
+                writer.write_table(entries)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, table_path: str, text_columns: Sequence[str] = TEXT_COLUMNS,
+             index_dir: str = DEFAULT_INDEX_DIR) -> Optional["TextIndex"]:
+        """Read a persisted index, or None when there is none"""
+        path = index_path(table_path, text_columns, index_dir)
+        try:
+            with pa.memory_map(str(path)) as source:
+                entries = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return None
+        metadata = entries.schema.metadata or {}
+        return cls(
+            table_path,
+            text_columns,
+            entries=entries.replace_schema_metadata(None) if entries.num_columns else None,
+            version=int(metadata.get(b"version", b"-1")),
+            files=json.loads(metadata.get(b"files", b"[]")),
+        )
+
+
+def index_path(table_path: str, text_columns: Sequence[str], index_dir: str = DEFAULT_INDEX_DIR) -> Path:
+    """Location of the persisted index for a table and its text columns"""
+    name = table_id(table_path).replace("://", "_").strip("/").replace("/", "_")
+    return Path(index_dir) / f"{name}__{'_'.join(text_columns)}.arrow"
+
+
+def open_text_index(table_path: str, text_columns: Sequence[str] = TEXT_COLUMNS,
+                    index_dir: str = DEFAULT_INDEX_DIR, max_workers: Optional[int] = None) -> TextIndex:
+    """Load the persisted index for a table, catch it up with the log and save it again"""
+    index = TextIndex.load(table_path, text_columns, index_dir) or TextIndex(table_path, text_columns)
+    if index.refresh(max_workers):
+        index.save(index_dir)
+    return index
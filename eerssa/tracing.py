@@ -0,0 +1,174 @@
+"""
+Lightweight stage timing for the load/diff/save hot path.
+
+Code marks stages with `with trace("name") as span:`; when no tracer is active
+in the current context the call costs next to nothing. A Tracer keeps the last
+spans in memory for the debug panel and can append them as JSON lines to the
+file named by EERSSA_TRACE_LOG for the log pipeline.
+"""
+import contextvars
+import functools
+import json
+import os
+import resource
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+TRACE_LOG_PATH = os.environ.get("EERSSA_TRACE_LOG")
+
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar("eerssa_tracer", default=None)
+
+
+@dataclass
+class Span:
+    """Measurements for one stage"""
+    name: str
+    started_at: str = ""
+    wall_ms: float = 0.0
+    rows: Optional[int] = None
+    files: Optional[int] = None
+    bytes_read: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+    session: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+# Seconds between RSS samples while a stage is open
+SAMPLE_INTERVAL = 0.01
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size right now (Linux), or None where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _PeakSampler:
+    """
+    Samples RSS on one thread while any stage is open and keeps a running
+    maximum per open stage. Nothing process wide is reset, so an enclosing
+    stage's peak is at least that of every stage nested in it, and stages on
+    other threads or sessions do not disturb each other.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self._peaks: Dict[int, int] = {}
+        self._next_token = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _sample(self):
+        rss = _current_rss()
+        if rss is not None:
+            for token, peak in self._peaks.items():
+                if rss > peak:
+                    self._peaks[token] = rss
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._peaks:
+                    self._thread = None
+                    return
+                self._sample()
+            time.sleep(self.interval)
+
+    def start(self) -> int:
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._peaks[token] = _current_rss() or 0
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="eerssa-rss-sampler", daemon=True)
+                self._thread.start()
+            return token
+
+    def stop(self, token: int) -> int:
+        """Peak RSS seen since start; the lifetime peak where RSS cannot be sampled"""
+        with self._lock:
+            self._sample()
+            peak = self._peaks.pop(token, 0)
+        return peak or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+_sampler = _PeakSampler()
+
+
+class Tracer:
+    """Collects spans for one app session"""
+
+    def __init__(self, session: Optional[str] = None, max_spans: int = 500, log_path: Optional[str] = TRACE_LOG_PATH):
+        self.session = session
+        self.log_path = log_path
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, **extra):
+        """Time a stage and record it when the block exits"""
+        span = Span(name=name, session=self.session, extra=extra,
+                    started_at=datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+        token = _sampler.start()
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.wall_ms = round((time.perf_counter() - started) * 1000, 3)
+            span.peak_rss_bytes = _sampler.stop(token)
+            self.record(span)
+
+    def record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+            if self.log_path:
+                with open(self.log_path, "a") as log:
+                    log.write(json.dumps(asdict(span), default=str) + "\n")
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Spans as plain dicts, oldest first"""
+        with self._lock:
+            return [asdict(span) for span in self.spans]
+
+    def to_jsonl(self) -> str:
+        return "".join(json.dumps(record, default=str) + "\n" for record in self.records())
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+def activate(tracer: Optional[Tracer]):
+    """Make a tracer current for this thread's context (and tasks started from it)"""
+    _current_tracer.set(tracer)
+
+
+@contextmanager
+def trace(name: str, **extra):
+    """Record a stage on the current tracer, or just run the block if there is none"""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield Span(name=name)
+        return
+    with tracer.stage(name, **extra) as span:
+        yield span
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of trace()"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with trace(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
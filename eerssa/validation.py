@@ -0,0 +1,235 @@
+"""
+Columnar validation of edited rows before they are committed.
+
+AgGrid hands edits back as strings. validate_rows casts the changed rows to the
+types of the Delta schema with Arrow compute kernels, evaluates the per-column
+rules on the whole batch at once, and reports one error per failing cell so the
+grid can highlight it. Date and timestamp columns stored as strings are parsed
+the same way eerssa.normalize does when loading.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from eerssa.normalize import DATE_COLUMNS, MISSING_ACTIVIDAD, TIMESTAMP_COLUMNS, borra_time_zone, parse_timestamps
+
+ERROR_COLUMNS = ['row', 'column', 'value', 'message']
+# Hidden grid column carrying the errors of each row
+GRID_ERROR_COLUMN = '_errors'
+
+INT_PATTERN = r'^\s*[+-]?\d+\s*$'
+FLOAT_PATTERN = r'^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*$|^\s*(?i:nan)\s*$'
+TRUE_VALUES = ['true', '1', 'yes', 'si', 'sí']
+FALSE_VALUES = ['false', '0', 'no']
+NULL_STRING = pa.scalar(None, pa.string())
+
+
+@dataclass(frozen=True)
+class Range:
+    """Values must fall between minimum and maximum (both inclusive, either optional)"""
+    column: str
+    minimum: Any = None
+    maximum: Any = None
+
+    def failing(self, table: pa.Table) -> pa.ChunkedArray:
+        values = table[self.column]
+        failed = pa.chunked_array([pa.array(np.zeros(len(values), dtype=bool))])
+        if self.minimum is not None:
+            failed = pc.or_(failed, pc.less(values, pa.scalar(self.minimum, values.type)))
+        if self.maximum is not None:
+            failed = pc.or_(failed, pc.greater(values, pa.scalar(self.maximum, values.type)))
+        return failed
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return (self.column,)
+
+    def message(self) -> str:
+        return f"must be between {self.minimum} and {self.maximum}"
+
+
+@dataclass(frozen=True)
+class Ordered:
+    """The `after` column must not be earlier than the `column` one on the same row"""
+    column: str
+    after: str
+
+    def failing(self, table: pa.Table) -> pa.ChunkedArray:
+        return pc.less(table[self.after], table[self.column])
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return (self.column, self.after)
+
+    def message(self) -> str:
+        return f"must not be earlier than {self.column}"
+
+
+@dataclass(frozen=True)
+class AllowedValues:
+    """Values must be one of a known set"""
+    column: str
+    values: Tuple[str, ...]
+
+    def failing(self, table: pa.Table) -> pa.ChunkedArray:
+        values = table[self.column]
+        allowed = pc.is_in(values, value_set=pa.array(self.values, values.type))
+        return pc.and_(pc.is_valid(values), pc.invert(allowed))
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return (self.column,)
+
+    def message(self) -> str:
+        shown = ', '.join(sorted(self.values)[:10])
+        return f"must be one of: {shown}" + (", ..." if len(self.values) > 10 else "")
+
+
+@dataclass(frozen=True)
+class NotNull:
+    """Values are required"""
+    column: str
+
+    def failing(self, table: pa.Table) -> pa.ChunkedArray:
+        return pc.is_null(table[self.column])
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return (self.column,)
+
+    def message(self) -> str:
+        return "is required"
+
+
+def work_order_rules(actividades: Iterable[str], year: Optional[int] = None) -> list:
+    """Rules for the work-order tables; Actividad codes are the ones already in use"""
+    rules = [
+        NotNull('Fecha'),
+        Ordered('InicioEvento', 'FinEvento'),
+        AllowedValues('Actividad', tuple(sorted(set(actividades) | {MISSING_ACTIVIDAD}))),
+    ]
+    if year is not None:
+        rules.append(Range('Fecha', date(year, 1, 1), date(year, 12, 31)))
+    return rules
+
+
+def _as_strings(values: pd.Series) -> pa.Array:
+    """Grid values as an Arrow string array, blanks as nulls"""
+    strings = values.astype('string').str.strip()
+    return pa.array(strings.mask(strings == ''), type=pa.string())
+
+
+def cast_column(values: pd.Series, target: pa.DataType, name: str) -> Tuple[pa.Array, pa.Array]:
+    """
+    Cast grid values to a schema type; returns the typed values (nulls where the
+    cast failed) and a mask of the cells that could not be cast.
+    """
+    temporal = name in DATE_COLUMNS + TIMESTAMP_COLUMNS or pa.types.is_temporal(target)
+    if pd.api.types.is_datetime64_any_dtype(values.dtype) and temporal:
+        # Already decoded by the grid codec; nothing to parse
+        typed = pa.array(values, from_pandas=True)
+        if name in DATE_COLUMNS or pa.types.is_date(target):
+            typed = pc.cast(typed, pa.date32(), safe=False)
+        return typed, pa.array(np.zeros(len(values), dtype=bool))
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype) \
+            and (pa.types.is_integer(target) or pa.types.is_floating(target)):
+        typed = pa.array(values, from_pandas=True)
+        try:
+            return pc.cast(typed, target), pa.array(np.zeros(len(values), dtype=bool))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+    if isinstance(values.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_any_dtype(values.dtype):
+        values = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+    strings = _as_strings(values)
+    present = pc.is_valid(strings)
+
+    if temporal:
+        typed = parse_timestamps(borra_time_zone(pa.chunked_array([strings])))
+        if name in DATE_COLUMNS or pa.types.is_date(target):
+            typed = pc.cast(typed, pa.date32(), safe=False)
+        elif pa.types.is_timestamp(target):
+            typed = pc.cast(typed, target, safe=False)
+        typed = typed.combine_chunks()
+    elif pa.types.is_integer(target):
+        valid = pc.match_substring_regex(strings, INT_PATTERN)
+        typed = pc.cast(pc.utf8_trim_whitespace(pc.if_else(valid, strings, NULL_STRING)), pa.int64())
+        bounds = np.iinfo(target.to_pandas_dtype())
+        in_range = pc.and_(pc.greater_equal(typed, bounds.min), pc.less_equal(typed, bounds.max))
+        typed = pc.cast(pc.if_else(in_range, typed, pa.scalar(None, pa.int64())), target)
+    elif pa.types.is_floating(target):
+        valid = pc.match_substring_regex(strings, FLOAT_PATTERN)
+        typed = pc.cast(pc.utf8_trim_whitespace(pc.if_else(valid, strings, NULL_STRING)), target)
+    elif pa.types.is_boolean(target):
+        lowered = pc.utf8_lower(strings)
+        typed = pc.if_else(pc.is_in(lowered, value_set=pa.array(TRUE_VALUES)), True,
+                           pc.if_else(pc.is_in(lowered, value_set=pa.array(FALSE_VALUES)), False, pa.scalar(None, pa.bool_())))
+    else:
+        typed = strings
+
+    return typed, pc.and_(present, pc.is_null(typed))
+
+
+def _cast_message(field: pa.Field) -> str:
+    """Error for a cell that could not be cast, naming the format expected for dates"""
+    if field.name in DATE_COLUMNS or pa.types.is_date(field.type):
+        return "is not a valid date; expected YYYY-MM-DD"
+    if field.name in TIMESTAMP_COLUMNS or pa.types.is_timestamp(field.type):
+        return "is not a valid date and time; expected YYYY-MM-DD HH:MM:SS"
+    return f"is not a valid {field.type}"
+
+
+def validate_rows(rows: pd.DataFrame, schema: pa.Schema, rules: Iterable = ()) -> Tuple[pa.Table, pd.DataFrame]:
+    """
+    Validate changed rows against the schema and rules.
+
+    Returns the rows cast to the schema (timestamps parsed) and a frame with one
+    error per failing cell: row label, column, submitted value and message.
+    """
+    labels = np.asarray(rows.index)
+    columns, failures = {}, []
+    for field in schema:
+        if field.name not in rows.columns:
+            continue
+        typed, failed = cast_column(rows[field.name], field.type, field.name)
+        columns[field.name] = typed
+        failures.append((field.name, failed, _cast_message(field)))
+    typed_table = pa.table(columns)
+
+    for rule in rules:
+        if not all(name in typed_table.column_names for name in rule.columns):
+            continue
+        # The error is shown on the last column the rule looks at
+        failures.append((rule.columns[-1], rule.failing(typed_table), rule.message()))
+
+    errors = []
+    for name, failed, message in failures:
+        positions = np.flatnonzero(pc.fill_null(failed, False).to_numpy(zero_copy_only=False))
+        if len(positions):
+            errors.append(pd.DataFrame({
+                'row': labels[positions],
+                'column': name,
+                'value': rows[name].iloc[positions].to_numpy(),
+                'message': f"{name} {message}",
+            }))
+
+    errors_df = pd.concat(errors, ignore_index=True) if errors else pd.DataFrame(columns=ERROR_COLUMNS)
+    return typed_table, errors_df
+
+
+def error_cells(errors: pd.DataFrame) -> set:
+    """(row, column) pairs with an error"""
+    return set(zip(errors['row'], errors['column'])) if not errors.empty else set()
+
+
+def grid_error_text(errors: pd.DataFrame, index: pd.Index) -> pd.Series:
+    """Per-row 'Column: message' lines for the hidden grid column, empty for valid rows"""
+    text = pd.Series('', index=index, dtype=object)
+    if not errors.empty:
+        lines = (errors['column'] + ': ' + errors['message']).groupby(errors['row']).agg('\n'.join)
+        text.loc[lines.index.intersection(index)] = lines
+    return text
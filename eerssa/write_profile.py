@@ -0,0 +1,96 @@
+"""
+How the Parquet files of a table are written.
+
+A WriteProfile fixes what deltalake otherwise leaves to its defaults: target
+file size, row-group size, zstd level, which columns get dictionary encoding
+and min/max statistics, and the sort order of appended data. Profiles come
+from the "write" block of a table in tables.json and are matched by path
+prefix, like storage options, so a table's corrections overlay and aggregate
+table are written the same way. Every write in eerssa.writes, eerssa.corrections
+and eerssa.daily_aggregates takes its settings from profile_for(path).
+
+Statistics columns become delta.dataSkippingStatsColumns, so the Delta log
+keeps min/max only where file skipping uses them (dates and keys); the Parquet
+files keep statistics on every column. Table properties are set in the commit
+that creates a table (table_properties as write_deltalake's configuration);
+tables that already exist get them from eerssa.log_maintenance, since merges
+and deletes take their file size from the table, not from the call.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+from eerssa.lazy import lazy_import
+
+# Imported on first write so the registry stays cheap to import
+deltalake = lazy_import("deltalake")
+
+DEFAULT_TARGET_FILE_SIZE = 128 * 1024 ** 2
+DEFAULT_ROW_GROUP_ROWS = 128 * 1024
+DEFAULT_ZSTD_LEVEL = 3
+
+
+@dataclass(frozen=True)
+class WriteProfile:
+    target_file_size: int = DEFAULT_TARGET_FILE_SIZE
+    row_group_rows: int = DEFAULT_ROW_GROUP_ROWS
+    zstd_level: int = DEFAULT_ZSTD_LEVEL
+    # None keeps dictionary encoding on every column (the Parquet default)
+    dictionary_columns: Optional[Tuple[str, ...]] = None
+    # Columns with min/max statistics in the Delta log; empty keeps them on every column
+    stats_columns: Tuple[str, ...] = ()
+    sort_by: Tuple[str, ...] = ("Fecha",)
+
+    def writer_properties(self, columns: Sequence[str]) -> deltalake.WriterProperties:
+        """deltalake writer properties for a table with the given columns"""
+        column_properties = {}
+        for name in columns:
+            properties = {}
+            if self.dictionary_columns is not None:
+                properties["dictionary_enabled"] = name in self.dictionary_columns
+            if properties:
+                column_properties[name] = deltalake.ColumnProperties(**properties)
+        return deltalake.WriterProperties(
+            max_row_group_size=self.row_group_rows,
+            compression="ZSTD",
+            compression_level=self.zstd_level,
+            column_properties=column_properties or None,
+        )
+
+    def table_properties(self, columns: Sequence[str]) -> Dict[str, str]:
+        """Table configuration the profile asks for, so merges, deletes and compaction follow it too"""
+        properties = {"delta.targetFileSize": str(self.target_file_size)}
+        stats_columns = [name for name in self.stats_columns if name in columns]
+        if stats_columns:
+            properties["delta.dataSkippingStatsColumns"] = ",".join(stats_columns)
+        return properties
+
+    def sort_keys(self, columns: Sequence[str]):
+        return [(name, "ascending") for name in self.sort_by if name in columns]
+
+
+DEFAULT_PROFILE = WriteProfile()
+
+_registered: Dict[str, WriteProfile] = {}
+
+
+def register(path: str, profile: WriteProfile):
+    _registered[path.rstrip("/")] = profile
+
+
+def profile_for(path: str) -> WriteProfile:
+    """Profile of the table at path (or of the table it belongs to), the default one otherwise"""
+    matches = [prefix for prefix in _registered if path.startswith(prefix)]
+    return _registered[max(matches, key=len)] if matches else DEFAULT_PROFILE
+
+
+def parse_profile(config: dict) -> WriteProfile:
+    """Profile from a "write" block of tables.json"""
+    config = dict(config)
+    for name in ("stats_columns", "sort_by"):
+        if name in config:
+            config[name] = tuple(config[name])
+    if config.get("dictionary_columns") is not None:
+        config["dictionary_columns"] = tuple(config["dictionary_columns"])
+    return WriteProfile(**config)
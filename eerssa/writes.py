@@ -0,0 +1,240 @@
+"""
+Keyed writes to Delta tables with deltalake's embedded (Rust) engine.
+
+merge_changes mirrors the Spark statement the apps used to run,
+
+    MERGE INTO delta.`path` AS target USING changes AS source
+    ON target.k = source.k ... WHEN MATCHED THEN UPDATE SET c = source.c, ...
+
+without a JVM: rows are matched on the key columns and only the listed
+columns are updated. apply_changes saves updated, inserted and deleted rows
+together in a single commit and refuses inserts whose key already exists.
+Every write, including compact, follows the table's write profile
+(eerssa.write_profile).
+"""
+from typing import List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from deltalake import CommitProperties, DeltaTable, write_deltalake
+
+from eerssa.storage import open_dataset, open_table
+from eerssa.write_profile import WriteProfile, profile_for
+
+# Source column telling apply_changes' merge what to do with each row
+ACTION_COLUMN = "_action"
+
+
+def quote(name: str) -> str:
+    """Backtick-quote a column name for deltalake predicates"""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def sql_literal(value) -> str:
+    """SQL literal for a key value"""
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value.item() if hasattr(value, "item") else value)
+
+
+def keys_predicate(keys: pd.DataFrame, key_columns: Sequence[str]) -> str:
+    """Predicate matching exactly the given keys"""
+    if len(key_columns) == 1:
+        name = key_columns[0]
+        return f"{quote(name)} IN ({', '.join(sql_literal(value) for value in keys[name].unique())})"
+    rows = keys[list(key_columns)].drop_duplicates().itertuples(index=False)
+    return " OR ".join(
+        "(" + " AND ".join(f"{quote(name)} = {sql_literal(value)}" for name, value in zip(key_columns, row)) + ")"
+        for row in rows
+    )
+
+
+def existing_keys(dt: DeltaTable, keys: pd.DataFrame, key_columns: Sequence[str]) -> pd.DataFrame:
+    """Those of the given keys that are already in the table, read from the key columns only"""
+    dataset = open_dataset(dt)
+    found = dataset.to_table(columns=list(key_columns), filter=keys_filter(dataset.schema, keys, key_columns))
+    return found.to_pandas().merge(keys[list(key_columns)].drop_duplicates(), on=list(key_columns))
+
+
+def keys_filter(schema: pa.Schema, keys: pd.DataFrame, key_columns: Sequence[str]) -> ds.Expression:
+    """Scan filter keeping the rows whose key columns take the given values (a superset for compound keys)"""
+    filter = None
+    for name in key_columns:
+        values = pa.array(keys[name].dropna().unique()).cast(schema.field(name).type, safe=False)
+        filter = ds.field(name).isin(values) if filter is None else filter & ds.field(name).isin(values)
+    return filter
+
+
+def diff_frames(original: pd.DataFrame, edited: pd.DataFrame, key_columns: Sequence[str]):
+    """
+    Updated, inserted and deleted rows of an edited copy of a frame, matched on key_columns.
+
+    Returns (updates, inserts, deletes) ready for apply_changes; deletes only
+    has the key columns. Missing values on both sides count as equal.
+    """
+    keys = list(key_columns)
+    before, after = original.set_index(keys), edited.set_index(keys)
+    kept = after.index.intersection(before.index)
+    columns = [name for name in after.columns if name in before.columns]
+    old, new = before.loc[kept, columns].astype(object), after.loc[kept, columns].astype(object)
+    changed = ~((old == new) | (old.isna() & new.isna())).all(axis=1)
+    updates = after.loc[kept][changed.to_numpy()].reset_index()
+    inserts = after.loc[after.index.difference(before.index)].reset_index()
+    deletes = before.index.difference(after.index).to_frame(index=False)
+    return updates, inserts, deletes
+
+
+def source_table(rows: pd.DataFrame, target_schema: pa.Schema) -> pa.Table:
+    """Rows as Arrow, cast to the target column types where the table has them"""
+    table = pa.Table.from_pandas(rows, preserve_index=False)
+    for index, field in enumerate(table.schema):
+        if field.name in target_schema.names:
+            target_type = target_schema.field(field.name).type
+            if field.type != target_type:
+                table = table.set_column(index, field.name, table.column(index).cast(target_type, safe=False))
+    return table
+
+
+def sorted_for_write(table: pa.Table, profile: WriteProfile) -> pa.Table:
+    """Rows in the profile's sort order, so appended files have tight date statistics"""
+    keys = profile.sort_keys(table.column_names)
+    return table.sort_by(keys) if keys else table
+
+
+def write_options(profile: WriteProfile, schema: pa.Schema) -> dict:
+    """Keyword arguments of write_deltalake for the profile"""
+    return {
+        "writer_properties": profile.writer_properties(schema.names),
+        "target_file_size": profile.target_file_size,
+    }
+
+
+def merge_changes(table_path: str, changes: pd.DataFrame, key_columns: Sequence[str],
+                  update_columns: Optional[List[str]] = None, target_filter: Optional[str] = None,
+                  commit_properties: Optional[CommitProperties] = None) -> dict:
+    """
+    Update matching rows with the values in changes, keyed on key_columns.
+
+    update_columns defaults to every non-key column of changes. target_filter is
+    ANDed into the join predicate to let file statistics skip untouched files.
+    Returns deltalake's merge metrics.
+    """
+    if not key_columns:
+        raise ValueError("At least one key column is required to merge changes")
+    if update_columns is None:
+        update_columns = [col for col in changes.columns if col not in key_columns]
+
+    dt = open_table(table_path)
+    schema = open_dataset(dt).schema
+    profile = profile_for(table_path)
+    predicate = " AND ".join(f"target.{quote(col)} = source.{quote(col)}" for col in key_columns)
+    if target_filter:
+        predicate = f"{predicate} AND {target_filter}"
+    return (
+        dt.merge(
+            source_table(changes, schema),
+            predicate=predicate,
+            source_alias="source",
+            target_alias="target",
+            writer_properties=profile.writer_properties(schema.names),
+            commit_properties=commit_properties,
+        )
+        .when_matched_update(updates={col: f"source.{quote(col)}" for col in update_columns})
+        .execute()
+    )
+
+
+def apply_changes(table_path: str, key_columns: Sequence[str], updates: Optional[pd.DataFrame] = None,
+                  inserts: Optional[pd.DataFrame] = None, deletes: Optional[pd.DataFrame] = None,
+                  commit_properties: Optional[CommitProperties] = None, target_filter: Optional[str] = None) -> dict:
+    """
+    Save updated, inserted and deleted rows of a table in one commit.
+
+    deletes only needs the key columns. When there are only inserts they are
+    appended without rewriting any file; only deletes become a predicate
+    delete on the keys. Anything else is a single merge whose source rows carry
+    their action. Inserts whose key already exists raise ValueError before
+    anything is written (and after the merge, if another save took the key
+    meanwhile). target_filter is ANDed into the merge's join predicate, as in
+    merge_changes (eerssa.key_index.save_rows builds it from the key index); a
+    predicate delete already skips files by its key literals. Returns
+    deltalake's metrics.
+    """
+    if not key_columns:
+        raise ValueError("At least one key column is required to save changes")
+    frames = {"update": updates, "insert": inserts, "delete": deletes}
+    frames = {action: frame for action, frame in frames.items() if frame is not None and not frame.empty}
+    if not frames:
+        return {}
+
+    dt = open_table(table_path)
+    schema = open_dataset(dt).schema
+    profile = profile_for(table_path)
+    if "insert" in frames:
+        taken = existing_keys(dt, inserts, key_columns)
+        if not taken.empty:
+            raise ValueError(f"{len(taken)} new rows use keys that already exist: "
+                             f"{taken.head(10).to_dict('records')}")
+    if set(frames) == {"insert"}:
+        write_deltalake(dt, sorted_for_write(source_table(inserts, schema), profile), mode="append",
+                        commit_properties=commit_properties, **write_options(profile, schema))
+        return {"num_target_rows_inserted": len(inserts)}
+    if set(frames) == {"delete"}:
+        return dt.delete(keys_predicate(deletes, key_columns), writer_properties=profile.writer_properties(schema.names),
+                         commit_properties=commit_properties)
+
+    source = pd.concat(
+        [frame.assign(**{ACTION_COLUMN: action}) for action, frame in frames.items()], ignore_index=True
+    )
+    columns = [name for name in schema.names if name in source.columns]
+    action = f"source.{quote(ACTION_COLUMN)}"
+    predicate = " AND ".join(f"target.{quote(col)} = source.{quote(col)}" for col in key_columns)
+    if target_filter:
+        predicate = f"{predicate} AND ({target_filter})"
+    metrics = (
+        dt.merge(
+            source_table(source, schema),
+            predicate=predicate,
+            source_alias="source",
+            target_alias="target",
+            writer_properties=profile.writer_properties(schema.names),
+            commit_properties=commit_properties,
+        )
+        .when_matched_delete(predicate=f"{action} = 'delete'")
+        .when_matched_update(
+            updates={col: f"source.{quote(col)}" for col in columns if col not in key_columns},
+            predicate=f"{action} = 'update'",
+        )
+        .when_not_matched_insert(
+            updates={col: f"source.{quote(col)}" for col in columns},
+            predicate=f"{action} = 'insert'",
+        )
+        .execute()
+    )
+    if "insert" in frames and metrics.get("num_target_rows_inserted", len(inserts)) < len(inserts):
+        raise ValueError(f"Saved, but only {metrics['num_target_rows_inserted']} of {len(inserts)} new rows "
+                         "were inserted; the others' keys were taken by another save")
+    return metrics
+
+
+def compact(table_path: str, sort: bool = False, commit_properties: Optional[CommitProperties] = None) -> dict:
+    """
+    Rewrite small files into files of the profile's target size.
+
+    With sort, the whole table is rewritten clustered on the profile's sort
+    columns (a Z-order on one column is a plain sort) instead of only the small
+    files being bin-packed. Returns deltalake's optimize metrics.
+    """
+    dt = open_table(table_path)
+    columns = open_dataset(dt).schema.names
+    profile = profile_for(table_path)
+    options = {
+        "target_size": profile.target_file_size,
+        "writer_properties": profile.writer_properties(columns),
+        "commit_properties": commit_properties,
+    }
+    sort_columns = [name for name, _ in profile.sort_keys(columns)]
+    if sort and sort_columns:
+        return dt.optimize.z_order(sort_columns, **options)
+    return dt.optimize.compact(**options)
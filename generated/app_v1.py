@@ -1,14 +1,26 @@
 import streamlit as st
-import pandas as pd
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode, JsCode
-from st_aggrid.shared import GridUpdateMode, DataReturnMode
-import delta
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, to_date, lit
-from pyspark.sql.types import *
 from datetime import datetime, date, timedelta
 import json
 import logging
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from eerssa.lazy import lazy_import
+
+# pandas, AgGrid, the codec and deltalake load on first use
+pd = lazy_import("pandas")
+audit = lazy_import("eerssa.audit")
+st_aggrid = lazy_import("st_aggrid")
+deltalake = lazy_import("deltalake")
+grid_codec = lazy_import("eerssa.grid_codec")
+corrections = lazy_import("eerssa.corrections")
+loader = lazy_import("eerssa.loader")
+log_maintenance = lazy_import("eerssa.log_maintenance")
+storage = lazy_import("eerssa.storage")
+table_stats = lazy_import("eerssa.table_stats")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,94 +34,60 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_resource
-def get_spark_session():
-    """Create and return a Spark session configured for Delta Lake"""
-    try:
-        spark = (SparkSession.builder
-                .appName("DeltaLakeEditor")
-                .config("spark.sql.extensions", "io.delta.sql.DeltaSparkSessionExtension")
-                .config("spark.sql.catalog.spark_catalog", "org.apache.spark.sql.delta.catalog.DeltaCatalog")
-                .config("spark.serializer", "org.apache.spark.serializer.KryoSerializer")
-                .config("spark.sql.adaptive.enabled", "true")
-                .config("spark.sql.adaptive.coalescePartitions.enabled", "true")
-                .getOrCreate())
-        
-        spark.sparkContext.setLogLevel("WARN")
-        return spark
-    except Exception as e:
-        st.error(f"Failed to create Spark session: {str(e)}")
-        return None
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_delta_table_info(_spark, table_path):
+def load_delta_table_info(table_path):
     """Load basic information about the Delta table"""
     try:
-        # Read the Delta table
-        df = _spark.read.format("delta").load(table_path)
-        
-        # Get schema information
-        schema = df.schema
-        columns = [field.name for field in schema.fields]
-        
-        # Get row count (approximate for large tables)
-        row_count = df.count()
+        # Everything here comes from the Delta log and is cached per table version;
+        # no data file is read
+        stats = table_stats.table_stats(table_path)
+        columns = list(stats.columns)
         
         # Detect date columns
-        date_columns = [field.name for field in schema.fields 
-                       if field.dataType in [DateType(), TimestampType()] 
-                       or 'date' in field.name.lower() 
-                       or 'time' in field.name.lower()]
+        date_columns = [name for name, column in stats.columns.items()
+                       if column.data_type.startswith(('date', 'timestamp'))
+                       or 'date' in name.lower() 
+                       or 'time' in name.lower()]
         
         return {
             'columns': columns,
-            'row_count': row_count,
+            'row_count': stats.row_count,
+            'row_count_complete': stats.complete,
+            'files': stats.files,
+            'size_bytes': stats.size_bytes,
+            'column_stats': stats.as_rows(),
             'date_columns': date_columns,
-            'schema': schema
+            'version': stats.version
         }
     except Exception as e:
         st.error(f"Error loading table info: {str(e)}")
         return None
 
-def load_data_with_date_filter(spark, table_path, date_column, start_date, end_date, limit=1000):
+def load_data_with_date_filter(table_path, date_column, start_date, end_date, limit=1000):
     """Load data from Delta table with date filtering"""
     try:
-        df = spark.read.format("delta").load(table_path)
-        
-        # Apply date filter if specified
-        if date_column and start_date and end_date:
-            df = df.filter(
-                (col(date_column) >= lit(start_date.strftime('%Y-%m-%d'))) &
-                (col(date_column) <= lit(end_date.strftime('%Y-%m-%d')))
-            )
+        # The date range prunes files by their statistics before anything is decoded
+        table = loader.load_date_range(
+            table_path,
+            date_column,
+            start_date if date_column else None,
+            end_date if date_column else None,
+            normalize=False
+        )
         
         # Limit results for performance
-        df = df.limit(limit)
-        
-        # Convert to Pandas
-        pandas_df = df.toPandas()
+        table = table.slice(0, limit)
         
-        # Convert date columns to string for AgGrid compatibility
-        for col_name in pandas_df.columns:
-            if pandas_df[col_name].dtype == 'datetime64[ns]':
-                pandas_df[col_name] = pandas_df[col_name].dt.strftime('%Y-%m-%d %H:%M:%S')
-            elif pandas_df[col_name].dtype == 'object':
-                # Try to convert date strings to consistent format
-                try:
-                    pandas_df[col_name] = pd.to_datetime(pandas_df[col_name], errors='ignore')
-                    if pandas_df[col_name].dtype == 'datetime64[ns]':
-                        pandas_df[col_name] = pandas_df[col_name].dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    pass
-        
-        return pandas_df
+        # Convert to Pandas; dates stay typed and GridCodec encodes them for AgGrid
+        return table.to_pandas()
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return pd.DataFrame()
 
-def create_aggrid_options(df, editable_columns=None):
+def create_aggrid_options(df, editable_columns=None, codec=None):
     """Create AgGrid options for data editing"""
-    gb = GridOptionsBuilder.from_dataframe(df)
+    gb = st_aggrid.GridOptionsBuilder.from_dataframe(df)
+    if codec is not None:
+        codec.configure_grid(gb)
     
     # Configure grid options
     gb.configure_pagination(paginationAutoPageSize=True)
@@ -135,39 +113,33 @@ def create_aggrid_options(df, editable_columns=None):
     
     return gb.build()
 
-def save_changes_to_delta(spark, table_path, original_df, modified_df, key_columns):
-    """Save changes back to Delta Lake using merge operation"""
+def save_changes_to_delta(table_path, original_grid_df, modified_grid_df, modified_df, key_columns, base_version=None):
+    """Save changes back to Delta Lake as corrections appended next to the table"""
     try:
         # Identify changed rows
-        changes_df = identify_changes(original_df, modified_df, key_columns)
+        changes_df = identify_changes(original_grid_df, modified_grid_df, modified_df, key_columns)
         
         if changes_df.empty:
             st.info("No changes detected to save.")
             return True
         
-        # Convert pandas DataFrame to Spark DataFrame
-        spark_changes_df = spark.createDataFrame(changes_df)
-        
-        # Create temporary view for merge operation
-        spark_changes_df.createOrReplaceTempView("changes_temp")
-        
-        # Build merge condition
-        merge_conditions = " AND ".join([f"target.{col} = source.{col}" for col in key_columns])
-        
-        # Build update set clause
-        update_columns = [col for col in changes_df.columns if col not in key_columns]
-        update_set = ", ".join([f"{col} = source.{col}" for col in update_columns])
-        
-        # Execute merge operation
-        merge_sql = f"""
-        MERGE INTO delta.`{table_path}` AS target
-        USING changes_temp AS source
-        ON {merge_conditions}
-        WHEN MATCHED THEN
-          UPDATE SET {update_set}
-        """
-        
-        spark.sql(merge_sql)
+        # Only the edited rows are written, to one small file in the corrections
+        # overlay; loads serve them over the base rows until they are folded in
+        # Who saved and which keys changed travel with the commit; eerssa.audit reads them back
+        commit_info = audit.commit_info(
+            audit.current_user(getattr(st.experimental_user, 'email', None)),
+            st.session_state.session_id,
+            changes_df[key_columns[0]] if len(key_columns) == 1 else changes_df[key_columns].to_numpy(),
+            {'eerssa.rows_touched': str(len(changes_df))}
+        )
+        # Refused when the table moved since the rows were loaded; the user reloads first
+        written = corrections.append_corrections(
+            table_path, changes_df, key_columns, base_version=base_version,
+            commit_properties=deltalake.CommitProperties(custom_metadata=commit_info)
+        )
+        logger.info(f"Appended {written} corrections")
+        # Every save is a commit on the overlay; checkpoint it on the usual policy
+        logger.info(f"Corrections log: {log_maintenance.maintain_log(corrections.corrections_path(table_path))}")
         
         st.success(f"Successfully saved {len(changes_df)} changes to Delta Lake!")
         return True
@@ -177,41 +149,13 @@ def save_changes_to_delta(spark, table_path, original_df, modified_df, key_colum
         logger.error(f"Save error: {str(e)}")
         return False
 
-def identify_changes(original_df, modified_df, key_columns):
+def identify_changes(original_grid_df, modified_grid_df, modified_df, key_columns):
     """Identify rows that have been modified"""
     try:
-        # Ensure both DataFrames have the same columns and order
-        original_df = original_df.copy()
-        modified_df = modified_df.copy()
-        
-        # Create comparison DataFrames
-        original_df['_row_id'] = range(len(original_df))
-        modified_df['_row_id'] = range(len(modified_df))
-        
-        # Find differences
-        changes = []
-        for idx in range(len(original_df)):
-            if idx < len(modified_df):
-                original_row = original_df.iloc[idx]
-                modified_row = modified_df.iloc[idx]
-                
-                # Check if any non-key columns have changed
-                has_changes = False
-                for col in original_df.columns:
-                    if col not in key_columns and col != '_row_id':
-                        if str(original_row[col]) != str(modified_row[col]):
-                            has_changes = True
-                            break
-                
-                if has_changes:
-                    # Include the key columns and changed data
-                    change_row = {}
-                    for col in modified_df.columns:
-                        if col != '_row_id':
-                            change_row[col] = modified_row[col]
-                    changes.append(change_row)
-        
-        return pd.DataFrame(changes)
+        # Compare the typed grid encodings column by column; key columns do not count
+        mask = grid_codec.changed_cells(original_grid_df, modified_grid_df)
+        mask = mask[[col for col in mask.columns if col not in key_columns]]
+        return modified_df[mask.any(axis=1).to_numpy()].reset_index(drop=True)
         
     except Exception as e:
         st.error(f"Error identifying changes: {str(e)}")
@@ -227,6 +171,8 @@ def main():
         st.session_state.original_data = pd.DataFrame()
     if 'table_info' not in st.session_state:
         st.session_state.table_info = None
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex[:8]
     
     # Sidebar configuration
     st.sidebar.header("🔧 Configuration")
@@ -239,16 +185,20 @@ def main():
         help="Enter the path to your Delta Lake table"
     )
     
-    # Initialize Spark session
-    spark = get_spark_session()
-    if not spark:
-        st.error("Cannot proceed without Spark session")
-        return
-    
     # Load table information
-    if st.sidebar.button("🔍 Load Table Info") or st.session_state.table_info is None:
+    if st.sidebar.button("🔍 Load Table Info"):
         with st.spinner("Loading table information..."):
-            st.session_state.table_info = load_delta_table_info(spark, table_path)
+            st.session_state.table_info = load_delta_table_info(table_path)
+    
+    # Merge pending corrections into the table, rewriting each touched file once
+    if st.sidebar.button("🧹 Fold Corrections", help="Merge saved corrections into the table files"):
+        with st.spinner("Folding corrections into the table..."):
+            try:
+                folded = corrections.fold_corrections(table_path)
+                log_maintenance.maintain_log(table_path)
+                st.sidebar.success(f"Folded {folded} corrected rows")
+            except Exception as e:
+                st.sidebar.error(f"Error folding corrections: {str(e)}")
     
     if not st.session_state.table_info:
         st.warning("Please enter a valid Delta table path and click 'Load Table Info'")
@@ -259,9 +209,16 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             st.write(f"**Columns:** {len(st.session_state.table_info['columns'])}")
-            st.write(f"**Row Count:** {st.session_state.table_info['row_count']:,}")
+            row_count = f"{st.session_state.table_info['row_count']:,}"
+            if not st.session_state.table_info['row_count_complete']:
+                row_count = f"at least {row_count} (some files have no statistics)"
+            st.write(f"**Row Count:** {row_count}")
+            st.write(f"**Version:** {st.session_state.table_info['version']}")
         with col2:
             st.write(f"**Date Columns:** {', '.join(st.session_state.table_info['date_columns'])}")
+            st.write(f"**Files:** {st.session_state.table_info['files']:,} "
+                     f"({st.session_state.table_info['size_bytes'] / 1024 ** 2:,.1f} MiB)")
+        st.dataframe(st.session_state.table_info['column_stats'], use_container_width=True, hide_index=True)
     
     # Date filtering configuration
     st.sidebar.subheader("📅 Date Filtering")
@@ -304,11 +261,15 @@ def main():
     # Load data button
     if st.sidebar.button("📥 Load Data", type="primary"):
         with st.spinner("Loading data from Delta Lake..."):
+            # Corrections are saved against the version the rows were read at
+            st.session_state.base_version = storage.open_table(table_path).version()
             data = load_data_with_date_filter(
-                spark, table_path, date_column, start_date, end_date, row_limit
+                table_path, date_column, start_date, end_date, row_limit
             )
             st.session_state.original_data = data.copy()
             st.session_state.current_data = data.copy()
+            st.session_state.grid_codec = grid_codec.GridCodec.from_frame(data)
+            st.session_state.original_grid_data = st.session_state.grid_codec.encode(data)
     
     # Main content area
     if not st.session_state.original_data.empty:
@@ -331,13 +292,16 @@ def main():
         )
         
         # Create and display AgGrid
-        grid_options = create_aggrid_options(st.session_state.original_data, editable_columns)
+        codec = st.session_state.grid_codec
+        grid_options = create_aggrid_options(st.session_state.original_grid_data, editable_columns, codec)
         
-        grid_response = AgGrid(
-            st.session_state.original_data,
+        # Rows come back in input order so they line up with the original encoding
+        grid_response = st_aggrid.AgGrid(
+            st.session_state.original_grid_data,
             gridOptions=grid_options,
-            data_return_mode=DataReturnMode.FILTERED_AND_SORTED,
-            update_mode=GridUpdateMode.MODEL_CHANGED,
+            allow_unsafe_jscode=True,
+            data_return_mode=st_aggrid.DataReturnMode.AS_INPUT,
+            update_mode=st_aggrid.GridUpdateMode.MODEL_CHANGED,
             fit_columns_on_grid_load=True,
             enable_enterprise_modules=False,
             height=600,
@@ -345,12 +309,15 @@ def main():
             reload_data=False
         )
         
-        # Get modified data
-        modified_data = grid_response['data']
+        # Get modified data, decoded back to the loaded dtypes
+        modified_grid_data = grid_response['data']
+        modified_data = codec.decode_frame(modified_grid_data)
         
         # Display change summary
-        if not modified_data.equals(st.session_state.original_data):
-            changes_df = identify_changes(st.session_state.original_data, modified_data, key_columns)
+        if grid_codec.changed_cells(st.session_state.original_grid_data, modified_grid_data).to_numpy().any():
+            changes_df = identify_changes(
+                st.session_state.original_grid_data, modified_grid_data, modified_data, key_columns
+            )
             if not changes_df.empty:
                 st.subheader("📝 Pending Changes")
                 st.write(f"**{len(changes_df)} rows** have been modified:")
@@ -364,11 +331,13 @@ def main():
                             st.error("Please select at least one key column for updates")
                         else:
                             success = save_changes_to_delta(
-                                spark, table_path, st.session_state.original_data, 
-                                modified_data, key_columns
+                                table_path, st.session_state.original_grid_data,
+                                modified_grid_data, modified_data, key_columns,
+                                st.session_state.get('base_version')
                             )
                             if success:
                                 st.session_state.original_data = modified_data.copy()
+                                st.session_state.original_grid_data = codec.encode(modified_data)
                                 st.experimental_rerun()
                 
                 with col2:
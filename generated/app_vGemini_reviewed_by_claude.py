@@ -38,9 +38,20 @@ def save_data_to_delta_overwrite(df_to_save: pd.DataFrame):
     except Exception as e:
         st.error(f"Failed to save data to Delta Lake: {e}")
 
-# CORRECT APPROACH 2: Manual merge logic
+# CORRECT APPROACH 2: Keyed merge
+# Looking each changed row up with `current_df['id'] == row['id']` inside
+# iterrows is O(changes x table) and still rewrites the whole table. The key
+# index (eerssa/key_index.py) maps every id to its data file, so the merge only
+# rewrites the files that hold edited rows.
+from eerssa.key_index import merge_rows, open_key_index
+
+@st.cache_resource
+def get_key_index(table_path: str):
+    """Key index for the table, shared by all sessions; refreshes and merges take its lock"""
+    return open_key_index(table_path)
+
 def save_data_to_delta_merge(df_to_save: pd.DataFrame, original_df: pd.DataFrame):
-    """Identify changes and perform manual merge"""
+    """Merge only the changed rows into the files that hold them"""
     try:
         # Identify changed rows
         changed_rows = identify_changed_rows(original_df, df_to_save)
@@ -51,23 +62,14 @@ def save_data_to_delta_merge(df_to_save: pd.DataFrame, original_df: pd.DataFrame
             
         st.info(f"Saving {len(changed_rows)} changed records to Delta Lake...")
         
-        # Load current table
-        dt = DeltaTable(DELTA_TABLE_PATH)
-        current_df = dt.to_pandas()
-        
-        # Update the changed rows in current_df
-        for idx, row in changed_rows.iterrows():
-            # Assuming 'id' is the primary key
-            mask = current_df['id'] == row['id']
-            for col in changed_rows.columns:
-                current_df.loc[mask, col] = row[col]
-        
-        # Write back the entire updated dataframe
-        write_deltalake(
-            DELTA_TABLE_PATH,
-            current_df,
-            mode='overwrite'
-        )
+        # Assuming 'id' is the primary key
+        index = get_key_index(DELTA_TABLE_PATH)
+        index.refresh()
+        st.caption(f"Rewriting at most {len(index.files_for(changed_rows))} of {len(index.files)} data files")
+        # Narrowed to the key ranges the index found in each file
+        metrics = merge_rows(index, changed_rows)
+        st.caption(f"{metrics.get('num_target_rows_updated', 0)} rows updated, "
+                   f"{metrics.get('num_target_files_added', 0)} files rewritten")
         
         st.success("Changes successfully saved to Delta Lake!")
     except Exception as e:
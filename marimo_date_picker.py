@@ -45,15 +45,25 @@ def _(end_date, mo, start_date):
 
 
 @app.cell
-def _(mo):
+def _():
+    from eerssa.loader import load_dataset_range
+    from eerssa.presets import PRESETS, PresetPrefetcher, preset_range
+    from eerssa.registry import load_registry
+
+    # Todas las tablas anuales se consultan como un solo conjunto (tables.json)
+    tablas = load_registry().dataset("ordenes_de_trabajo")
+
+    # Los presets se cargan en segundo plano al iniciar y se mantienen al dia
+    # cuando llegan commits nuevos a las tablas
+    prefetcher = PresetPrefetcher(tablas)
+    prefetcher.start()
+    return PRESETS, load_dataset_range, prefetcher, preset_range, tablas
+
+
+@app.cell
+def _(PRESETS, mo):
     drop = mo.ui.dropdown(
-            options={
-                "Last 7 Days": "last_7",
-                "Last 30 Days": "last_30",
-                "This Month": "this_month",
-                "Year to Date": "year_to_date",
-                "Custom": "custom",
-            },
+            options=PRESETS,
             value="Custom",
             label="Quick Select"
         )
@@ -62,13 +72,27 @@ def _(mo):
 
 
 @app.cell
-def _(drop, mo):
-    mo.md(f"""Valor seleccionado: {drop.value}""")
+def _(drop, end_date, mo, preset_range, start_date):
+    # El preset manda sobre las fechas; "Custom" usa los selectores de fecha
+    rango = preset_range(drop.value) or (start_date.value, end_date.value)
+    mo.md(f"""Valor seleccionado: {drop.value} ({rango[0]} a {rango[1]})""")
+    return (rango,)
+
+
+@app.cell
+def _(drop, load_dataset_range, mo, prefetcher, rango, tablas):
+    if drop.value != "custom":
+        ordenes = prefetcher.load(drop.value).to_pandas()
+    else:
+        ordenes = load_dataset_range(tablas, rango[0], rango[1]).to_pandas()
+
+    aviso = [mo.md(f"⚠️ La precarga de presets falló: {prefetcher.last_error}")] if prefetcher.last_error else []
+    mo.vstack(aviso + [mo.md(f"**{len(ordenes)}** ordenes de trabajo"), mo.ui.table(ordenes)])
     return
 
 
 @app.cell
-def _(mo):
+def _(PRESETS, mo):
     # Create a form with multiple elements
     form = (
         mo.md('''
@@ -81,13 +105,7 @@ def _(mo):
         .batch(
             date=mo.ui.date(label="date"),
             name=mo.ui.dropdown(
-                options={
-                    "Last 7 Days": "last_7",
-                    "Last 30 Days": "last_30",
-                    "This Month": "this_month",
-                    "Year to Date": "year_to_date",
-                    "Custom": "custom",
-                },
+                options=PRESETS,
                 value="Custom",
                 label="Quick Select"
                 ),
@@ -25,55 +25,48 @@ def _(mo):
 def _():
     import marimo as mo
     import pandas as pd
-    from deltalake import DeltaTable, write_deltalake
+    import time
+    from deltalake import DeltaTable
     from datetime import date, timedelta, datetime
+    from eerssa.corrections import supersede_corrections
+    from eerssa.loader import load_date_range
+    from eerssa.registry import cache_for, load_registry
+    from eerssa.storage import storage_options
+    from eerssa.writes import apply_changes, diff_frames
 
-    DELTA_TABLE_PATH = "/home/vlad/GIT/eerssa_gh/ordenes_de_trabajo/test/deltalake_2025"
+    # Rutas y columnas de las tablas en tables.json
+    registro = load_registry()
+    DELTA_TABLE_PATH = registro.table().path
+    KEY_COLUMNS = list(registro.table().key_columns)
+    tablas = registro.dataset("ordenes_de_trabajo")
+    # Tabla anual de la que viene cada fila; los cambios se guardan en esa tabla
+    TABLA = "_tabla"
 
 
     def load_delta_data():
         try:
-            dt = DeltaTable(DELTA_TABLE_PATH)
+            dt = DeltaTable(DELTA_TABLE_PATH, storage_options=storage_options(DELTA_TABLE_PATH))
             return dt.to_pandas()
         except Exception as e:
             mo.md(f"Error loading Delta table: {e}")
             return pd.DataFrame()
 
-    def borra_time_zone( fecha ):
-      """
-      Esta función elimina el componenete de Time Zone y deja solamente la fecha y hora. 
-      En caso de que no contenga este componente deja el String intacto. 
-      """
-      if not isinstance( fecha, str ):
-        return pd.NaT
-  
-      if len(fecha) < 4:
-        return pd.NaT
-
-      fecha_inicio = fecha.replace('T', ' ').split()
-      fecha_inicio = fecha_inicio[0]+' '+fecha_inicio[-1]
-      return fecha_inicio
-
     cuadrilla_sel = {"Seleccionar Cuadrilla":"sin_seleccion"}
 
-    # Carga y transformacion del DataFrame completo:
-
-    df = DeltaTable(DELTA_TABLE_PATH).to_pandas()
-
-    df['Fecha'] = df['Fecha'].apply( lambda x: borra_time_zone(x))
-    df['InicioEvento'] = df['InicioEvento'].apply( lambda x: borra_time_zone(x))
-    df['FinEvento'] = df['FinEvento'].apply( lambda x: borra_time_zone(x))
-
-    df["Fecha"] = pd.to_datetime(df["Fecha"]).apply(lambda x: x.date())
-    df["InicioEvento"] = pd.to_datetime(df["InicioEvento"])  #, format='mixed'
-    df["FinEvento"] = pd.to_datetime(df["FinEvento"])
-
-    df['Cuenta']    = df['Cuenta'].astype('category')
-    df['Actividad'] = df['Actividad'].fillna('·').astype('category')
-
-
-
-    return DELTA_TABLE_PATH, df, load_delta_data, mo, write_deltalake
+    return (
+        KEY_COLUMNS,
+        TABLA,
+        apply_changes,
+        cache_for,
+        diff_frames,
+        load_date_range,
+        load_delta_data,
+        mo,
+        pd,
+        supersede_corrections,
+        tablas,
+        time,
+    )
 
 
 @app.cell
@@ -156,10 +149,22 @@ def _(mo):
 
 
 @app.cell
-def _(df, formDates):
-    desdeFecha = formDates.value["inicio"]
-    hastaFecha = formDates.value["fin"]
-    filtered_df = df.query("@desdeFecha <= Fecha <= @hastaFecha")
+def _(TABLA, cache_for, formDates, load_date_range, pd, tablas):
+    desdeFecha = formDates.value["inicio"] if formDates.value else None
+    hastaFecha = formDates.value["fin"] if formDates.value else None
+
+    # Solo se leen las tablas anuales y archivos que cubren el rango; el rango se
+    # aplica al escanear, y el resultado queda en la cache local de Arrow hasta
+    # que haya commits nuevos. Las filas se editan tal como estan guardadas (sin
+    # eerssa.normalize), para que al guardar no cambie su formato
+    if desdeFecha and hastaFecha:
+        filtered_df = pd.concat([
+            load_date_range(tabla.path, tabla.date_column, desdeFecha, hastaFecha,
+                            normalize=False, cache=cache_for(tabla.cache)).to_pandas().assign(**{TABLA: tabla.name})
+            for tabla in tablas if tabla.covers(desdeFecha, hastaFecha)
+        ], ignore_index=True)
+    else:
+        filtered_df = pd.DataFrame()
     return (filtered_df,)
 
 
@@ -180,14 +185,40 @@ def _(mo):
 
 
 @app.cell
-def _(DELTA_TABLE_PATH, data_editor, save_button, write_deltalake):
+def _(
+    KEY_COLUMNS,
+    TABLA,
+    apply_changes,
+    data_editor,
+    diff_frames,
+    filtered_df,
+    pd,
+    save_button,
+    supersede_corrections,
+    tablas,
+    time,
+):
     if save_button.value:
         try:
-            edited_data = data_editor.value
-
-            # Save back to Delta Lake
-            write_deltalake(DELTA_TABLE_PATH, edited_data, mode='overwrite')
-            print("✅ **Successfully saved changes to Delta Lake!**")
+            # Only the rows that changed are saved, by key, each to the yearly
+            # table it was loaded from; rows outside the loaded window are left as they are
+            edited = data_editor.value
+            updates, inserts, deletes = diff_frames(filtered_df, edited, [TABLA] + KEY_COLUMNS)
+            unknown = set(inserts[TABLA].dropna()) - {tabla.name for tabla in tablas}
+            if inserts[TABLA].isna().any() or unknown:
+                raise ValueError(f"New rows need {TABLA} set to one of {[tabla.name for tabla in tablas]}")
+
+            saved = []
+            for tabla in tablas:
+                rows = [frame[frame[TABLA] == tabla.name].drop(columns=[TABLA]) for frame in (updates, inserts, deletes)]
+                if not any(len(frame) for frame in rows):
+                    continue
+                saved_at = time.time_ns() // 1000
+                apply_changes(tabla.path, KEY_COLUMNS, updates=rows[0], inserts=rows[1], deletes=rows[2])
+                # Older corrections of the saved keys would otherwise hide the new values
+                supersede_corrections(tabla.path, pd.concat([rows[0][KEY_COLUMNS], rows[2]]), KEY_COLUMNS, saved_at)
+                saved.append(f"{tabla.name}: {len(rows[0])} updated, {len(rows[1])} new, {len(rows[2])} deleted")
+            print(f"✅ **Saved to Delta Lake!** {'; '.join(saved) or 'no changes'}")
         except Exception as e:
             print(f"❌ **Error saving to Delta Lake:** {e}")
 
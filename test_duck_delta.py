@@ -1,19 +1,23 @@
 import ibis
 import duckdb
 
+from eerssa.daily_aggregates import aggregate_path
+from eerssa.registry import load_registry
+
 # Connect to DuckDB with delta extension
 con = ibis.duckdb.connect()
 con.sql("INSTALL delta")
 con.sql("LOAD delta")
 
-# Read Delta table directly with DuckDB/Ibis
-delta_table = con.sql("SELECT * FROM delta_scan('/home/vlad/GIT/eerssa_gh/ordenes_de_trabajo/test/deltalake_2025')")
+# Summaries read the precomputed daily aggregates (see eerssa/daily_aggregates.py)
+# instead of scanning every work order
+daily = con.sql(f"SELECT * FROM delta_scan('{aggregate_path(load_registry().table().path)}')")
 
-# Now use Ibis operations on the Delta table
-result = (delta_table
-    .filter(delta_table.column_name > 100)
-    .group_by("category")
-    .aggregate(total=delta_table.amount.sum())
+# Orders per crew and activity for the last month
+result = (daily
+    .filter(daily.Fecha >= ibis.today() - ibis.interval(days=30))
+    .group_by(["Grupo", "Actividad"])
+    .aggregate(total=daily.n_ordenes.sum())
 )
 
 result.execute()
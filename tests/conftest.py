@@ -0,0 +1,16 @@
+"""Shared fixtures: small synthetic work-order tables in a temporary directory"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def work_table(tmp_path):
+    """A 2,000-row table of 2025 work orders in 8 files, each covering a later stretch of the year"""
+    pytest.importorskip("deltalake")
+    from benchmarks.synthetic import build_table
+
+    return build_table(str(tmp_path / "ordenes_2025"), rows=2000, files=8, year=2025)
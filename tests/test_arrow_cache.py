@@ -0,0 +1,52 @@
+"""Hits and invalidation of the on-disk window cache"""
+from datetime import date
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from eerssa.arrow_cache import ArrowWindowCache
+from eerssa.loader import load_date_range
+from eerssa.writes import apply_changes
+
+MARCH = ("Fecha", date(2025, 3, 1), date(2025, 3, 31))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArrowWindowCache(str(tmp_path / "cache"))
+
+
+def test_hit_for_same_files_at_a_newer_version(cache):
+    table = pa.table({"id": [1, 2, 3]})
+    cache.put("/t", "marzo", 3, ["b.parquet", "a.parquet"], table)
+    assert cache.get("/t", "marzo", 3, ["a.parquet", "b.parquet"]).equals(table)
+    # A commit elsewhere in the table leaves the window's files, and the entry, as they were
+    assert cache.get("/t", "marzo", 4, ["a.parquet", "b.parquet"]).equals(table)
+    assert cache.get("/t", "abril", 4, ["a.parquet", "b.parquet"]) is None
+
+
+def test_changed_files_invalidate(cache):
+    cache.put("/t", "marzo", 3, ["a.parquet"], pa.table({"id": [1]}))
+    assert cache.get("/t", "marzo", 4, ["a.parquet", "c.parquet"]) is None
+    # The stale entry is gone, even for the version it was built at
+    assert cache.get("/t", "marzo", 3, ["a.parquet"]) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    table = pa.table({"id": list(range(1000))})
+    cache = ArrowWindowCache(str(tmp_path / "cache"), max_bytes=1)
+    cache.put("/t", "marzo", 1, ["a.parquet"], table)
+    assert cache.size_bytes() == 0
+
+
+def test_load_is_served_from_cache_until_a_save_touches_the_window(work_table, cache):
+    first = load_date_range(work_table, *MARCH, normalize=False, cache=cache)
+    assert first.num_rows
+    assert load_date_range(work_table, *MARCH, normalize=False, cache=cache).equals(first)
+
+    edited = first.slice(0, 1).to_pandas()
+    edited["Descripcion"] = "EDITADO"
+    apply_changes(work_table, ["id"], updates=edited)
+    reloaded = load_date_range(work_table, *MARCH, normalize=False, cache=cache).to_pandas().set_index("id")
+    assert reloaded.loc[edited["id"].iloc[0], "Descripcion"] == "EDITADO"
@@ -0,0 +1,61 @@
+"""Running change summary kept by the edit history"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from eerssa.edit_history import EditHistory
+from eerssa.grid_codec import changed_cells
+
+
+@pytest.fixture
+def grid():
+    return pd.DataFrame({"id": [1, 2, 3], "Descripcion": ["uno", "dos", None], "Cuadrilla": ["A", "B", "C"]})
+
+
+def edit(history: EditHistory, grid: pd.DataFrame, row: int, column: str, value) -> pd.DataFrame:
+    after = grid.copy()
+    after.loc[row, column] = value
+    history.record(grid, after, changed_cells(grid, after))
+    return after
+
+
+def test_edit_back_to_original_value_drops_out(grid):
+    history = EditHistory(grid.columns)
+    changes = history.changes
+    edited = edit(history, grid, 0, "Descripcion", "UNO")
+    edited = edit(history, edited, 2, "Descripcion", "tres")
+    assert (changes.cells_changed, changes.rows_touched) == (2, 2)
+    assert changes.cells_per_column() == {"Descripcion": 2}
+
+    # Typing the loaded value back, or undoing to it, leaves nothing pending
+    edited = edit(history, edited, 0, "Descripcion", "uno")
+    assert changes.updated_rows().tolist() == [2]
+    history.undo(edited)
+    assert changes.updated_rows().tolist() == [0, 2]
+    assert history.undo_all(edited) == 2
+    assert not changes
+    assert edited.equals(grid)
+
+    history.redo(edited)
+    assert changes.updated_rows().tolist() == [0]
+    assert changes.preview(grid, edited).to_dict("records") == [
+        {"Row": 0, "Column": "Descripcion", "Old Value": "uno", "New Value": "UNO"}]
+
+
+def test_row_added_then_deleted_counts_as_neither(grid):
+    history = EditHistory(grid.columns)
+    changes = history.changes
+    grown = pd.concat([grid, pd.DataFrame({"id": [4]}, index=[3]).reindex(columns=grid.columns)])
+    changes.insert_row(3)
+    edit(history, grown, 3, "Descripcion", "cuatro")
+    changes.delete_rows([1, 3])
+
+    assert changes.inserted == 0 and changes.deleted == 1
+    assert changes.inserted_rows().tolist() == []
+    assert changes.deleted_rows().tolist() == [1]
+    assert changes.rows().tolist() == []
+    assert changes.describe().startswith("1 cells in 1 rows; 1 deleted rows")
+
+    changes.restore_rows([1, 3])
+    assert changes.inserted_rows().tolist() == [3] and changes.rows().tolist() == [3]
+    assert changes.commit_metadata()["eerssa.inserted"] == "1"
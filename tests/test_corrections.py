@@ -0,0 +1,94 @@
+"""Round trips through the corrections overlay on a small local table"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("deltalake")
+
+import pandas as pd
+from deltalake import write_deltalake
+
+from eerssa import corrections
+from eerssa.corrections import (append_corrections, fold_corrections, latest_corrections, open_corrections,
+                                overlay_key_columns, supersede_corrections)
+from eerssa.loader import load_date_range
+from eerssa.storage import open_dataset, open_table
+from eerssa.writes import apply_changes
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    path = str(tmp_path / "ordenes")
+    write_deltalake(path, pd.DataFrame({"id": [1, 2, 3], "Descripcion": ["uno", "dos", "tres"]}))
+    return path
+
+
+def descriptions(table) -> dict:
+    frame = table.to_pandas()
+    return dict(zip(frame["id"], frame["Descripcion"]))
+
+
+def corrected(path: str, ids, text: str) -> pd.DataFrame:
+    rows = load_date_range(path, normalize=False).to_pandas()
+    rows = rows[rows["id"].isin(ids)].copy()
+    rows["Descripcion"] = text
+    return rows
+
+
+def test_write_correct_fold_read(table_path):
+    version = open_table(table_path).version()
+    assert append_corrections(table_path, corrected(table_path, [2], "DOS"), ["id"], base_version=version) == 1
+    assert overlay_key_columns(open_corrections(table_path)) == ("id",)
+    # The base is untouched; loads serve the correction
+    assert open_table(table_path).version() == version
+    assert descriptions(load_date_range(table_path, normalize=False)) == {1: "uno", 2: "DOS", 3: "tres"}
+
+    assert fold_corrections(table_path) == 1
+    assert latest_corrections(open_corrections(table_path)).num_rows == 0
+    assert descriptions(open_dataset(open_table(table_path)).to_table()) == {1: "uno", 2: "DOS", 3: "tres"}
+    assert descriptions(load_date_range(table_path, normalize=False)) == {1: "uno", 2: "DOS", 3: "tres"}
+
+
+def test_correction_refused_after_its_rows_changed(table_path):
+    version = open_table(table_path).version()
+    rows = corrected(table_path, [1], "UNO")
+    apply_changes(table_path, ["id"], updates=corrected(table_path, [1], "otro"))
+    with pytest.raises(ValueError, match="changed since the rows were read"):
+        append_corrections(table_path, rows, ["id"], base_version=version)
+
+
+def test_correction_kept_when_other_rows_changed(table_path):
+    version = open_table(table_path).version()
+    rows = corrected(table_path, [1], "UNO")
+    apply_changes(table_path, ["id"], updates=corrected(table_path, [3], "TRES"),
+                  inserts=pd.DataFrame({"id": [4], "Descripcion": ["cuatro"]}))
+    assert append_corrections(table_path, rows, ["id"], base_version=version) == 1
+    assert descriptions(load_date_range(table_path, normalize=False)) == {1: "UNO", 2: "dos", 3: "TRES", 4: "cuatro"}
+
+
+def test_base_save_supersedes_older_corrections(table_path):
+    append_corrections(table_path, corrected(table_path, [1], "viejo"), ["id"])
+    saved_at = pd.Timestamp.now(tz="UTC").value // 1000
+    updates = corrected(table_path, [1], "nuevo")
+    apply_changes(table_path, ["id"], updates=updates)
+    supersede_corrections(table_path, updates[["id"]], ["id"], saved_at)
+    assert descriptions(load_date_range(table_path, normalize=False))[1] == "nuevo"
+
+
+def test_fold_keeps_corrections_recorded_while_merging(table_path, monkeypatch):
+    append_corrections(table_path, corrected(table_path, [1], "UNO"), ["id"])
+    merge_changes = corrections.merge_changes
+
+    def merge_then_correct(*args, **kwargs):
+        metrics = merge_changes(*args, **kwargs)
+        append_corrections(table_path, corrected(table_path, [1, 3], "tarde"), ["id"])
+        return metrics
+
+    monkeypatch.setattr(corrections, "merge_changes", merge_then_correct)
+    assert fold_corrections(table_path) == 1
+    pending = descriptions(latest_corrections(open_corrections(table_path)))
+    assert pending == {1: "tarde", 3: "tarde"}
+    assert descriptions(load_date_range(table_path, normalize=False)) == {1: "tarde", 2: "dos", 3: "tarde"}
@@ -0,0 +1,41 @@
+"""The incremental refresh of the daily counts agrees with a full recompute"""
+import pytest
+
+pytest.importorskip("deltalake")
+
+from benchmarks.synthetic import work_orders
+from deltalake import write_deltalake
+
+from eerssa.daily_aggregates import (COUNT_COLUMN, GROUP_COLUMNS, aggregate_path, rebuild_daily_aggregates,
+                                     refresh_daily_aggregates)
+from eerssa.loader import load_date_range
+from eerssa.storage import open_dataset, open_table
+from eerssa.writes import apply_changes
+
+
+def counts(table_path: str) -> dict:
+    table = open_dataset(open_table(aggregate_path(table_path))).to_table()
+    rows = table.to_pandas().set_index(GROUP_COLUMNS)[COUNT_COLUMN]
+    return rows[rows != 0].sort_index().to_dict()
+
+
+def test_refresh_matches_rebuild(work_table):
+    refresh_daily_aggregates(work_table)
+    # New orders, an edit that moves orders to another crew and a delete
+    write_deltalake(work_table, work_orders(100, start_id=10_000, seed=99), mode="append")
+    rows = load_date_range(work_table, normalize=False).slice(0, 30).to_pandas()
+    rows["Grupo"] = "Zamora (Agencia)"
+    apply_changes(work_table, ["id"], updates=rows.iloc[:20], deletes=rows.iloc[20:][["id"]])
+
+    assert refresh_daily_aggregates(work_table) == open_table(work_table).version()
+    incremental = counts(work_table)
+    rebuild_daily_aggregates(work_table)
+    assert incremental == counts(work_table)
+    assert sum(incremental.values()) == 2000 + 100 - 10
+
+
+def test_refresh_is_a_no_op_at_the_same_version(work_table):
+    version = refresh_daily_aggregates(work_table)
+    aggregate_version = open_table(aggregate_path(work_table)).version()
+    assert refresh_daily_aggregates(work_table) == version
+    assert open_table(aggregate_path(work_table)).version() == aggregate_version
@@ -0,0 +1,20 @@
+"""Compact dtypes leave keys and editable strings alone"""
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from eerssa.dtypes import to_compact_pandas
+
+
+def test_compacts_other_columns_only():
+    table = pa.table({
+        "id": pa.array([1, 2, 3, 4], pa.int64()),
+        "Cantidad": pa.array([1, 2, 3, 4], pa.int64()),
+        "Grupo": ["a", "a", "b", "a"],
+        "Descripcion": ["x", "x", "x", "x"],
+    })
+    df = to_compact_pandas(table, string_columns=["Descripcion"], key_columns=["id"])
+    assert str(df["id"].dtype) == "int64"
+    assert str(df["Cantidad"].dtype) == "Int8"
+    assert str(df["Grupo"].dtype) == "category"
+    assert str(df["Descripcion"].dtype) == "string"
@@ -0,0 +1,47 @@
+"""Typed round trip of frames through the AgGrid encoding"""
+from datetime import date
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from eerssa.grid_codec import MS_PER_DAY, GridCodec, changed_cells
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "id": [1, 2, 3],
+        "Fecha": [date(2025, 3, 1), None, date(2024, 12, 31)],
+        "InicioEvento": pd.to_datetime(["2025-03-01 08:15:00", None, "2024-12-31 23:59:59"]),
+        "Actividad": pd.Categorical(["INST", "CORT", None]),
+        "Descripcion": ["uno", None, "tres"],
+    }, index=[10, 11, 12])
+
+
+def test_round_trip(frame):
+    codec = GridCodec.from_frame(frame)
+    encoded = codec.encode(frame)
+    assert encoded["Fecha"].tolist()[0] == (date(2025, 3, 1) - date(1970, 1, 1)).days * MS_PER_DAY
+    assert pd.isna(encoded["Fecha"].iloc[1])
+    labels = codec.dictionaries["Actividad"].to_pylist()
+    assert encoded["Actividad"].tolist()[:2] == [labels.index("INST"), labels.index("CORT")]
+
+    decoded = codec.decode_frame(encoded)
+    pd.testing.assert_frame_equal(decoded, frame)
+
+
+def test_decodes_json_floats_and_edits(frame):
+    codec = GridCodec.from_frame(frame)
+    encoded = codec.encode(frame)
+    # What the grid sends back: numbers as floats once a column has a null
+    edited = encoded.astype({"Fecha": "float64", "InicioEvento": "float64"})
+    edited.loc[12, "Fecha"] = float((date(2025, 1, 15) - date(1970, 1, 1)).days * MS_PER_DAY)
+    edited.loc[10, "Descripcion"] = "UNO"
+
+    mask = changed_cells(encoded, edited)
+    assert {(row, col) for row, col in zip(*mask.to_numpy().nonzero())} == {(0, 4), (2, 1)}
+    decoded = codec.decode_frame(edited)
+    assert decoded.loc[12, "Fecha"] == date(2025, 1, 15)
+    assert decoded.loc[10, "InicioEvento"] == pd.Timestamp("2025-03-01 08:15:00")
@@ -0,0 +1,39 @@
+"""Saves through the key index only read the files holding the edited keys"""
+import pytest
+
+pytest.importorskip("deltalake")
+
+from eerssa.key_index import KeyIndex, open_key_index, save_rows
+from eerssa.loader import load_date_range
+from eerssa.storage import open_table
+
+
+def rows(table_path, ids):
+    frame = load_date_range(table_path, normalize=False).to_pandas()
+    return frame[frame["id"].isin(ids)].reset_index(drop=True)
+
+
+def test_save_reads_only_the_located_files(work_table, tmp_path):
+    index = open_key_index(work_table, index_dir=str(tmp_path / "indices"))
+    assert len(index) == 2000 and len(index.files) == 8
+
+    # Keys 10 and 20 live in the first file, 1900 in the last
+    updates = rows(work_table, [10, 20])
+    updates["Descripcion"] = "EDITADO"
+    metrics = save_rows(index, updates=updates, deletes=rows(work_table, [1900])[["id"]])
+    assert metrics["num_target_files_scanned"] == 2
+    assert metrics["num_target_rows_updated"] == 2 and metrics["num_target_rows_deleted"] == 1
+
+    saved = load_date_range(work_table, normalize=False).to_pandas().set_index("id")
+    assert (saved.loc[[10, 20], "Descripcion"] == "EDITADO").all()
+    assert 1900 not in saved.index
+    # The index followed the save
+    assert index.version == open_table(work_table).version()
+    assert index.files_predicate(rows(work_table, [1900])) is None
+
+
+def test_index_survives_a_reload(work_table, tmp_path):
+    index_dir = str(tmp_path / "indices")
+    open_key_index(work_table, index_dir=index_dir)
+    loaded = KeyIndex.load(work_table, index_dir=index_dir)
+    assert len(loaded) == 2000 and loaded.version == open_table(work_table).version()
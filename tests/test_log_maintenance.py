@@ -0,0 +1,47 @@
+"""Checkpoint decisions and table properties applied by maintain_log"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("deltalake")
+
+from deltalake import write_deltalake
+
+from eerssa import write_profile
+from eerssa.log_maintenance import last_checkpoint_version, maintain_log
+from eerssa.storage import open_table
+from eerssa.write_profile import WriteProfile
+
+
+@pytest.fixture
+def table_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "ordenes")
+    monkeypatch.setitem(write_profile._registered, path,
+                        WriteProfile(target_file_size=64 * 1024 ** 2, stats_columns=("Fecha", "id")))
+    for value in range(3):
+        write_deltalake(path, pd.DataFrame({"id": [value], "Fecha": ["2025-01-01"]}), mode="append")
+    return path
+
+
+def test_existing_table_gets_the_profile_properties_once(table_path):
+    expected = {"delta.targetFileSize": str(64 * 1024 ** 2), "delta.dataSkippingStatsColumns": "Fecha,id"}
+    assert maintain_log(table_path, checkpoint_interval=100)["properties"] == expected
+    assert open_table(table_path).metadata().configuration == expected
+    version = open_table(table_path).version()
+    assert maintain_log(table_path, checkpoint_interval=100)["properties"] == {}
+    assert open_table(table_path).version() == version
+
+
+def test_checkpoints_once_enough_commits_piled_up(table_path):
+    # Versions 0-2 plus the commit setting the table properties
+    assert maintain_log(table_path, checkpoint_interval=6) == {
+        "version": 3, "commits_since_checkpoint": 4, "checkpointed": False,
+        "properties": {"delta.targetFileSize": str(64 * 1024 ** 2), "delta.dataSkippingStatsColumns": "Fecha,id"}}
+    assert last_checkpoint_version(table_path) is None
+
+    write_deltalake(table_path, pd.DataFrame({"id": [3, 4], "Fecha": ["2025-01-02"] * 2}), mode="append")
+    write_deltalake(table_path, pd.DataFrame({"id": [5], "Fecha": ["2025-01-03"]}), mode="append")
+    assert maintain_log(table_path, checkpoint_interval=6)["checkpointed"]
+    assert last_checkpoint_version(table_path) == 5
+    # The checkpoint written from the log-only handle carries every data file
+    assert sorted(open_table(table_path).to_pyarrow_table()["id"].to_pylist()) == list(range(6))
+    assert maintain_log(table_path, checkpoint_interval=6)["commits_since_checkpoint"] == 0
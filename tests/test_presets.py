@@ -0,0 +1,35 @@
+"""Memory budget and error reporting of the preset prefetcher"""
+from datetime import date
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("deltalake")
+
+from eerssa.presets import PresetPrefetcher, preset_range
+from eerssa.registry import TableConfig
+
+
+def test_preset_range():
+    assert preset_range("last_7", date(2025, 3, 10)) == (date(2025, 3, 4), date(2025, 3, 10))
+    assert preset_range("this_month", date(2025, 3, 10)) == (date(2025, 3, 1), date(2025, 3, 10))
+    assert preset_range("custom") is None
+
+
+def test_keeps_presets_within_budget(work_table, monkeypatch):
+    loaded = pa.table({"id": list(range(1000))})
+    prefetcher = PresetPrefetcher([TableConfig("ordenes", work_table)], max_bytes=int(loaded.nbytes * 2.5))
+    monkeypatch.setattr(prefetcher, "_load", lambda preset, today: loaded)
+    prefetcher.refresh()
+    # PRESETS order: the first two fit, the rest are served through the cache
+    assert list(prefetcher._warm) == ["last_7", "last_30"]
+
+
+def test_failed_refresh_is_kept_for_the_ui(tmp_path, caplog):
+    prefetcher = PresetPrefetcher([TableConfig("falta", str(tmp_path / "falta"))], poll_seconds=60)
+    prefetcher.start()
+    prefetcher._thread.join(timeout=0.5)
+    prefetcher.stop()
+    prefetcher._thread.join(timeout=5)
+    assert prefetcher.last_error is not None
+    assert "Preset prefetch failed" in caplog.text
@@ -0,0 +1,52 @@
+"""Trigram search over the text columns of a small table"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("deltalake")
+
+from deltalake import write_deltalake
+
+from eerssa.text_index import TextIndex, open_text_index
+from eerssa.writes import apply_changes
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    path = str(tmp_path / "ordenes")
+    write_deltalake(path, pd.DataFrame({
+        "id": [1, 2, 3],
+        "Descripcion": ["Reconexión de medidor", "Cambio de acometida", None],
+        "Direccion": ["Av. Universitaria 12", "Calle Bolívar", "Reconexion pendiente"],
+    }))
+    write_deltalake(path, pd.DataFrame({"id": [4], "Descripcion": ["Poste caído"], "Direccion": ["Vía a Catamayo"]}),
+                    mode="append")
+    return path
+
+
+def ids(table) -> list:
+    return sorted(table["id"].to_pylist())
+
+
+def test_search_ignores_case_and_accents(table_path, tmp_path):
+    index = open_text_index(table_path, index_dir=str(tmp_path / "indices"))
+    assert ids(index.search("RECONEXION")) == [1, 3]
+    assert ids(index.search("bolivar")) == [2]
+    assert ids(index.search("caido", columns=["id"])) == [4]
+    # Every gram matches row 1 but the substring does not
+    assert ids(index.search("medidor reconexion")) == []
+    with pytest.raises(ValueError):
+        index.search("de")
+
+
+def test_refresh_follows_saves_and_persists(table_path, tmp_path):
+    index_dir = str(tmp_path / "indices")
+    open_text_index(table_path, index_dir=index_dir)
+    apply_changes(table_path, ["id"],
+                  updates=pd.DataFrame({"id": [2], "Descripcion": ["Reconexión urgente"], "Direccion": ["Calle Bolívar"]}),
+                  deletes=pd.DataFrame({"id": [3]}))
+
+    stale = TextIndex.load(table_path, index_dir=index_dir)
+    index = open_text_index(table_path, index_dir=index_dir)
+    assert index.version > stale.version
+    assert ids(index.search("reconexion")) == [1, 2]
+    assert ids(TextIndex.load(table_path, index_dir=index_dir).search("reconexion")) == [1, 2]
@@ -0,0 +1,65 @@
+"""Edited rows are cast to the table schema and checked against the work-order rules"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+from eerssa.validation import error_cells, validate_rows, work_order_rules
+
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("Fecha", pa.string()),
+    ("InicioEvento", pa.string()),
+    ("FinEvento", pa.string()),
+    ("Actividad", pa.string()),
+    ("Cantidad", pa.int32()),
+])
+
+
+def rows(**columns) -> pd.DataFrame:
+    base = {
+        "id": ["1", "2"],
+        "Fecha": ["2025-03-01", "2025-03-02T00:00:00-05:00"],
+        "InicioEvento": ["2025-03-01 08:00:00", "2025-03-02T09:00:00-05:00"],
+        "FinEvento": ["2025-03-01 09:00:00", "2025-03-02T10:00:00-05:00"],
+        "Actividad": ["INST", None],
+        "Cantidad": ["3", " 4 "],
+    }
+    base.update(columns)
+    return pd.DataFrame(base, index=[10, 11])
+
+
+def test_valid_rows_are_cast():
+    typed, errors = validate_rows(rows(), SCHEMA, work_order_rules(["INST"], 2025))
+    assert errors.empty
+    assert typed["Cantidad"].to_pylist() == [3, 4]
+    assert typed["Fecha"].type == pa.date32()
+
+
+def test_each_failing_cell_is_reported():
+    edited = rows(
+        Fecha=["2025-13-45", "2024-12-31"],
+        FinEvento=["2025-03-01 07:00:00", "mañana"],
+        Actividad=["NUEVA", "INST"],
+        Cantidad=["tres", "99999999999"],
+    )
+    _, errors = validate_rows(edited, SCHEMA, work_order_rules(["INST"], 2025))
+    assert error_cells(errors) == {
+        (10, "Fecha"), (11, "Fecha"), (10, "FinEvento"), (11, "FinEvento"),
+        (10, "Actividad"), (10, "Cantidad"), (11, "Cantidad"),
+    }
+    messages = errors.groupby(["row", "column"])["message"].agg(" / ".join).to_dict()
+    assert "expected YYYY-MM-DD" in messages[(10, "Fecha")]
+    assert "expected YYYY-MM-DD HH:MM:SS" in messages[(11, "FinEvento")]
+    assert "must not be earlier than InicioEvento" in messages[(10, "FinEvento")]
+    assert "must be between" in messages[(11, "Fecha")]
+    assert "must be one of" in messages[(10, "Actividad")]
+
+
+def test_actividades_come_from_the_whole_table(work_table):
+    from eerssa.daily_aggregates import known_values
+
+    known = known_values(work_table, "Actividad")
+    assert "ALUM" in known and "·" not in known
+    _, errors = validate_rows(rows(Actividad=["ALUM", "CORT"]), SCHEMA, work_order_rules(known, 2025))
+    assert errors.empty
@@ -0,0 +1,60 @@
+"""Keyed saves through eerssa.writes"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("deltalake")
+
+from eerssa.loader import load_date_range
+from eerssa.storage import open_table
+from eerssa.writes import apply_changes, diff_frames
+
+
+def test_diff_frames():
+    original = pd.DataFrame({"id": [1, 2, 3], "Grupo": ["a", None, "c"]})
+    edited = pd.DataFrame({"id": [1, 2, 4], "Grupo": ["A", None, "d"]})
+    updates, inserts, deletes = diff_frames(original, edited, ["id"])
+    assert updates.to_dict("records") == [{"id": 1, "Grupo": "A"}]
+    assert inserts.to_dict("records") == [{"id": 4, "Grupo": "d"}]
+    assert deletes.to_dict("records") == [{"id": 3}]
+
+
+def test_raw_rows_keep_their_stored_format(work_table):
+    loaded = load_date_range(work_table, normalize=False).to_pandas()
+    edited = loaded.copy()
+    edited.loc[0, "Descripcion"] = "EDITADO"
+    updates, inserts, deletes = diff_frames(loaded, edited, ["id"])
+    apply_changes(work_table, ["id"], updates=updates, inserts=inserts, deletes=deletes)
+
+    saved = load_date_range(work_table, normalize=False).to_pandas().set_index("id").loc[loaded.loc[0, "id"]]
+    assert saved["Descripcion"] == "EDITADO"
+    assert saved["Fecha"] == loaded.loc[0, "Fecha"] and saved["Fecha"].endswith("-05:00")
+
+
+def test_mixed_save_is_one_commit(work_table):
+    version = open_table(work_table).version()
+    loaded = load_date_range(work_table, normalize=False).to_pandas()
+    updates = loaded[loaded["id"].isin([5, 1500])].assign(Descripcion="EDITADO")
+    inserts = loaded[loaded["id"] == 7].assign(id=5000)
+    deletes = pd.DataFrame({"id": [10, 11]})
+
+    metrics = apply_changes(work_table, ["id"], updates=updates, inserts=inserts, deletes=deletes)
+    assert (metrics["num_target_rows_updated"], metrics["num_target_rows_inserted"],
+            metrics["num_target_rows_deleted"]) == (2, 1, 2)
+    assert open_table(work_table).version() == version + 1
+
+    saved = load_date_range(work_table, normalize=False).to_pandas().set_index("id")
+    assert len(saved) == len(loaded) - 1
+    assert saved.loc[[5, 1500], "Descripcion"].tolist() == ["EDITADO", "EDITADO"]
+    assert saved.loc[5000, "Fecha"] == saved.loc[7, "Fecha"]
+    assert not saved.index.isin([10, 11]).any()
+
+
+def test_insert_of_an_existing_key_is_refused(work_table):
+    version = open_table(work_table).version()
+    loaded = load_date_range(work_table, normalize=False).to_pandas()
+    updates = loaded[loaded["id"] == 5].assign(Descripcion="EDITADO")
+    inserts = loaded[loaded["id"].isin([8, 9])].assign(id=[9, 6000])
+
+    with pytest.raises(ValueError, match="1 new rows use keys that already exist"):
+        apply_changes(work_table, ["id"], updates=updates, inserts=inserts)
+    assert open_table(work_table).version() == version